@@ -3,18 +3,32 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
+import re
+import sys
 import time
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 import anthropic
+import orjson
 
 from backend.config import settings
+from backend.mcp_servers.apple_health import estimate_ecog_from_steps
+from backend.mcp_servers.clinical_trials import (
+    get_eligibility_criteria,
+    get_trial_details,
+    get_trial_locations,
+    search_trials,
+)
+from backend.mcp_servers.fda_data import get_adverse_events, get_drug_label
+from backend.mcp_servers.geocoding import calculate_distance, geocode_location
 from backend.models.patient import PatientProfile
 from backend.models.session import SessionPhase, SessionState
 from backend.models.trial import MatchedTrial, TrialSummary
+from backend.report.generator import generate_report
+from backend.report.pdf_generator import check_playwright_browsers
 from backend.session import SessionManager
 
 logger = logging.getLogger(__name__)
@@ -22,6 +36,45 @@ logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).parent / "prompts"
 SKILLS_DIR = Path(__file__).parent / "skills"
 
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result for Claude (orjson; unknown types fall back to str)."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Fixed acknowledgement results, pre-serialized in _dumps' compact form
+_ACK_WIDGET = '{"status":"widget_emitted"}'
+_ACK_STATUS = '{"status":"status_emitted"}'
+_ACK_FILTERS = '{"status":"filters_emitted"}'
+_NO_HEALTH_IMPORT = '{"imported":false,"message":"No health data imported"}'
+
+
+# Widget response format: Question: "..." — My answer: ...
+# Handles both em-dash (—) and double-hyphen (--)
+_WIDGET_ANSWER_RE = re.compile(r'^Question:\s*"(.+?)"\s*(?:—|--)\s*My answer:\s*(.+)$')
+
+# History trimming keeps the opening exchange and the most recent messages,
+# with a marker standing in for everything dropped between them.
+_HISTORY_PINNED = 2
+_HISTORY_TAIL = 20
+_TRIM_MARKER: dict[str, Any] = {
+    "role": "user",
+    "content": "[Earlier conversation trimmed to save context. See session state for details.]",
+}
+
+# Streamed text is flushed to the client once this many characters are
+# buffered or this much time has passed since the last flush.
+_TEXT_FLUSH_CHARS = 64
+_TEXT_FLUSH_SECONDS = 0.016
+
+# Status shown while the model is still streaming a tool call's input
+_STREAMING_STATUS = {
+    "save_matched_trials": ("matching", "Compiling detailed trial analysis..."),
+    "generate_report": ("report", "Building your personalized report..."),
+    "save_patient_profile": ("intake", "Saving your profile..."),
+    "search_trials": ("search", "Preparing search..."),
+}
+
 MODEL_CONTEXT_WINDOWS = {
     "claude-opus-4-6": 200_000,
     "claude-sonnet-4-5-20250929": 200_000,
@@ -31,46 +84,94 @@ MODEL_CONTEXT_WINDOWS = {
 
 def _parse_trial_detail(raw: dict) -> dict:
     """Extract essential fields from a full study record to keep context small."""
-    protocol = raw.get("protocolSection", {})
-    ident = protocol.get("identificationModule", {})
-    status = protocol.get("statusModule", {})
-    design = protocol.get("designModule", {})
-    desc = protocol.get("descriptionModule", {})
-    elig = protocol.get("eligibilityModule", {})
-    arms = protocol.get("armsInterventionsModule", {})
-    outcomes = protocol.get("outcomesModule", {})
-    sponsor = protocol.get("sponsorCollaboratorsModule", {})
-
-    interventions = [i.get("name", "") for i in arms.get("interventions", []) if i.get("name")]
-    primary_outcomes = [
-        {"measure": o.get("measure", ""), "timeFrame": o.get("timeFrame", "")}
-        for o in (outcomes.get("primaryOutcomes", []) or [])[:3]
-    ]
+    protocol = raw.get("protocolSection") or {}
+    ident = protocol.get("identificationModule") or {}
+    status = protocol.get("statusModule") or {}
+    design = protocol.get("designModule") or {}
+    desc = protocol.get("descriptionModule") or {}
+    elig = protocol.get("eligibilityModule") or {}
+    arms = protocol.get("armsInterventionsModule") or {}
+    outcomes = protocol.get("outcomesModule") or {}
+    sponsor = protocol.get("sponsorCollaboratorsModule") or {}
+    enrollment = design.get("enrollmentInfo") or {}
+    lead = sponsor.get("leadSponsor") or {}
 
     return {
         "nct_id": ident.get("nctId"),
         "brief_title": ident.get("briefTitle"),
         "official_title": ident.get("officialTitle"),
         "overall_status": status.get("overallStatus"),
-        "phase": " / ".join(design.get("phases", [])),
+        "phase": " / ".join(design.get("phases") or ()),
         "study_type": design.get("studyType"),
         "brief_summary": (desc.get("briefSummary") or "")[:500],
         "detailed_description": (desc.get("detailedDescription") or "")[:500],
-        "interventions": interventions,
-        "primary_outcomes": primary_outcomes,
+        "interventions": [
+            name for i in (arms.get("interventions") or ()) if (name := i.get("name"))
+        ],
+        "primary_outcomes": [
+            {"measure": o.get("measure", ""), "timeFrame": o.get("timeFrame", "")}
+            for o in (outcomes.get("primaryOutcomes") or ())[:3]
+        ],
         "eligibility_criteria_text": (elig.get("eligibilityCriteria") or "")[:2000],
         "min_age": elig.get("minimumAge"),
         "max_age": elig.get("maximumAge"),
         "sex": elig.get("sex"),
-        "enrollment": design.get("enrollmentInfo", {}).get("count"),
-        "sponsor": sponsor.get("leadSponsor", {}).get("name"),
+        "enrollment": enrollment.get("count"),
+        "sponsor": lead.get("name"),
         "arms": [
             {"label": a.get("label", ""), "type": a.get("type", ""), "description": (a.get("description") or "")[:200]}
-            for a in (arms.get("arms", []) or [])[:4]
+            for a in (arms.get("arms") or ())[:4]
         ],
     }
 
 
+def _slim_search_result(r: dict) -> dict:
+    """Trim a search_trials result to the fields Claude needs to pick trials."""
+    locs = r.get("locations")
+    loc0 = locs[0] if locs else None
+    return {
+        "nct_id": r.get("nct_id"),
+        "brief_title": r.get("brief_title", "")[:120],
+        "phase": r.get("phase", ""),
+        "overall_status": r.get("overall_status", ""),
+        "interventions": r.get("interventions", [])[:3],
+        "sponsor": r.get("sponsor", ""),
+        "enrollment_count": r.get("enrollment_count"),
+        "nearest_city": f"{loc0.get('city', '')}, {loc0.get('state', '')}" if loc0 else "",
+        "latitude": loc0.get("latitude") if loc0 else None,
+        "longitude": loc0.get("longitude") if loc0 else None,
+    }
+
+
+def _location_summary(nct_id: str, result: str) -> str | None:
+    """Short 'Found N sites' status line from a get_trial_locations tool result."""
+    try:
+        locs = orjson.loads(result)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(locs, list):
+        return None
+    # Build a short summary of locations found
+    loc_summaries = []
+    for loc in locs[:5]:  # Show up to 5 locations
+        city = loc.get("city", "")
+        loc_state = loc.get("state", "")
+        facility = loc.get("facility", "") or loc.get("name", "")
+        if facility and city:
+            loc_summaries.append(f"{facility}, {city}")
+        elif city and loc_state:
+            loc_summaries.append(f"{city}, {loc_state}")
+        elif facility:
+            loc_summaries.append(facility)
+    if not loc_summaries:
+        return None
+    summary_text = "; ".join(loc_summaries)
+    more = f" (+{len(locs) - 5} more)" if len(locs) > 5 else ""
+    return f"Found {len(locs)} sites for {nct_id}: {summary_text}{more}"
+
+
+# Prompt and skill files are static for the life of the process — read each once.
+@functools.lru_cache(maxsize=32)
 def _load_prompt(name: str) -> str:
     path = PROMPTS_DIR / f"{name}.md"
     if path.exists():
@@ -79,6 +180,7 @@ def _load_prompt(name: str) -> str:
     return ""
 
 
+@functools.lru_cache(maxsize=32)
 def _load_skill(name: str) -> str:
     path = SKILLS_DIR / f"{name}.md"
     if path.exists():
@@ -86,8 +188,8 @@ def _load_skill(name: str) -> str:
     return ""
 
 
-def _build_system_prompt(phase: SessionPhase) -> str:
-    """Build system prompt based on current conversation phase."""
+def _assemble_system_prompt(phase: SessionPhase) -> str:
+    """Assemble the system prompt for a conversation phase from prompt/skill files."""
     base = _load_prompt("orchestrator")
     phase_prompt = ""
 
@@ -108,8 +210,37 @@ def _build_system_prompt(phase: SessionPhase) -> str:
     return f"{base}\n\n## Current Phase: {phase.value}\n\n{phase_prompt}"
 
 
-# Tool definitions for Claude API
-TOOLS: list[dict[str, Any]] = [
+# Six phases, six fixed prompts — assembled once, by warmup_prompts() at app
+# startup or lazily on first use.
+_PHASE_SYSTEM_PROMPTS: dict[SessionPhase, str] = {}
+
+_PROMPT_NAMES = (
+    "orchestrator", "intake", "search", "match_translate", "selection", "report_generator",
+)
+_SKILL_NAMES = ("eligibility_analysis", "medical_translation")
+
+
+async def warmup_prompts() -> None:
+    """Read every prompt/skill file off the event loop and assemble all phase prompts."""
+    await asyncio.gather(
+        *(asyncio.to_thread(_load_prompt, name) for name in _PROMPT_NAMES),
+        *(asyncio.to_thread(_load_skill, name) for name in _SKILL_NAMES),
+    )
+    for phase in SessionPhase:
+        _PHASE_SYSTEM_PROMPTS[phase] = _assemble_system_prompt(phase)
+
+
+def _build_system_prompt(phase: SessionPhase) -> str:
+    """Build system prompt based on current conversation phase."""
+    prompt = _PHASE_SYSTEM_PROMPTS.get(phase)
+    if prompt is None:
+        prompt = _PHASE_SYSTEM_PROMPTS[phase] = _assemble_system_prompt(phase)
+    return prompt
+
+
+# Tool definitions for Claude API. A tuple, since the schemas are fixed for
+# the life of the process and are shared by every session.
+TOOLS: tuple[dict[str, Any], ...] = (
     {
         "name": "search_trials",
         "description": "Search ClinicalTrials.gov for clinical trials matching the patient's criteria. Returns a list of trial summaries.",
@@ -542,12 +673,91 @@ TOOLS: list[dict[str, Any]] = [
             "required": [],
         },
     },
-]
+)
+
+# Network-bound, read-only lookups: they don't write session state, so adjacent
+# calls in one assistant turn can run concurrently. search_trials is excluded
+# because it saves results and must land in tool_use order.
+_CONCURRENT_SAFE_TOOLS = frozenset({
+    "get_trial_details",
+    "get_eligibility_criteria",
+    "get_adverse_events",
+    "get_drug_label",
+    "geocode_location",
+})
+
+# Lookups whose pre-execution status reads the trial get_trial_details records
+_STATUS_AFTER_DETAILS = frozenset({
+    "get_eligibility_criteria",
+    "get_adverse_events",
+    "get_drug_label",
+})
+
+
+def _tool_runs(tool_uses: list[dict]) -> list[list[dict]]:
+    """Split a turn's tool calls into runs that execute one after another.
+
+    Adjacent _CONCURRENT_SAFE_TOOLS lookups share a run; every other tool is a
+    run of its own, so side effects happen in tool_use order. A lookup whose
+    status names the trial fetched by get_trial_details waits for that fetch.
+    """
+    runs: list[list[dict]] = []
+    for tu in tool_uses:
+        safe = tu["name"] in _CONCURRENT_SAFE_TOOLS
+        if (
+            safe
+            and runs
+            and runs[-1][0]["name"] in _CONCURRENT_SAFE_TOOLS
+            and not (
+                tu["name"] in _STATUS_AFTER_DETAILS
+                and any(t["name"] == "get_trial_details" for t in runs[-1])
+            )
+        ):
+            runs[-1].append(tu)
+        else:
+            runs.append([tu])
+    return runs
+
+
+# The tools argument sent on every stream call, built once. The breakpoint on
+# the last tool lets the tool schemas stay prompt-cached across phase changes,
+# when the phase system prompt after them differs.
+_TOOLS_PARAM: tuple[dict[str, Any], ...] = (
+    *TOOLS[:-1],
+    {**TOOLS[-1], "cache_control": {"type": "ephemeral"}},
+)
 
 
 class AgentOrchestrator:
     """Manages Claude conversations with tool use for clinical trial navigation."""
 
+    # One orchestrator lives per connected session; slots drop the per-instance
+    # __dict__ and keep attribute access on the streaming hot path cheap.
+    __slots__ = (
+        "session_id",
+        "session_mgr",
+        "client",
+        "conversation_history",
+        "_pending_emissions",
+        "_intake_answers",
+        "_free_text_counter",
+        "_intake_answers_version",
+        "_intake_section_cache",
+        "_profile_section_cache",
+        "_detected_location",
+        "_last_locations",
+        "_current_nct_id",
+        "_current_brief_title",
+        "_heartbeat_queue",
+        "_iteration_start",
+        "_tools_executed",
+        "_turn_count",
+        "_model",
+        "_context_window",
+        "_beta_headers",
+        "_compaction_disabled",
+    )
+
     def __init__(self, session_id: str, session_mgr: SessionManager):
         self.session_id = session_id
         self.session_mgr = session_mgr
@@ -556,6 +766,12 @@ class AgentOrchestrator:
         self._pending_emissions: list[dict[str, Any]] = []
         self._intake_answers: dict[str, str] = {}
         self._free_text_counter: int = 0
+        # Bumped by _record_intake_answer; keys the rendered answers section
+        self._intake_answers_version: int = 0
+        # (answers dict, answers version, rendered section)
+        self._intake_section_cache: tuple[dict[str, str], int, str] | None = None
+        # (profile version, rendered section) — invalidated by SessionManager.save_profile
+        self._profile_section_cache: tuple[Any, str] | None = None
         self._detected_location: dict[str, Any] | None = None
         # Track the last fetched trial locations for richer distance status messages
         self._last_locations: list[dict[str, Any]] = []
@@ -600,281 +816,295 @@ class AgentOrchestrator:
         Widget responses arrive as: Question: "..." — My answer: ...
         Free-text messages (initial condition description) stored as free_text_N.
         """
-        import re
-
-        # Match widget response format: Question: "..." — My answer: ...
-        # Handles both em-dash (—) and double-hyphen (--)
-        match = re.match(r'^Question:\s*"(.+?)"\s*(?:—|--)\s*My answer:\s*(.+)$', user_message)
+        match = _WIDGET_ANSWER_RE.match(user_message)
         if match:
             question = match.group(1).strip()
             answer = match.group(2).strip()
-            self._intake_answers[question] = answer
+            self._record_intake_answer(question, answer)
         else:
             # Free-text input (e.g., initial condition description)
             self._free_text_counter += 1
-            self._intake_answers[f"free_text_{self._free_text_counter}"] = user_message.strip()
-
-    async def _execute_tool(self, tool_name: str, tool_input: dict) -> str:
-        """Execute a tool call and return the result as a string."""
-        try:
-            if tool_name == "search_trials":
-                from backend.mcp_servers.clinical_trials import search_trials
-                results = await search_trials(**tool_input)
-                # Save to session — filter out entries with no NCT ID
-                valid = [r for r in results if r.get("nct_id")]
-                trials = [TrialSummary(**r) for r in valid]
-                self.session_mgr.save_search_results(self.session_id, trials)
-                # Update session state
-                state = self.session_mgr.get_state(self.session_id)
-                state.search_complete = True
-                self.session_mgr.save_state(self.session_id, state)
-                # Emit filters to sync the stats panel.
-                # Only emit statuses — do NOT override condition, since the user's
-                # original condition was set on first message and Claude may search
-                # with a broader/different term (e.g. "bone sarcoma" vs "ewing sarcoma").
-                emission: dict[str, Any] = {"type": "filters_update"}
-                if tool_input.get("status"):
-                    emission["statuses"] = tool_input["status"]
-                if len(emission) > 1:
-                    self._pending_emissions.append(emission)
-                # Return slim summaries to keep context small
-                slim = [
-                    {
-                        "nct_id": r.get("nct_id"),
-                        "brief_title": r.get("brief_title", "")[:120],
-                        "phase": r.get("phase", ""),
-                        "overall_status": r.get("overall_status", ""),
-                        "interventions": r.get("interventions", [])[:3],
-                        "sponsor": r.get("sponsor", ""),
-                        "enrollment_count": r.get("enrollment_count"),
-                        "nearest_city": (r.get("locations", [{}])[0].get("city", "") + ", " + r.get("locations", [{}])[0].get("state", "")) if r.get("locations") else "",
-                        "latitude": r.get("locations", [{}])[0].get("latitude") if r.get("locations") else None,
-                        "longitude": r.get("locations", [{}])[0].get("longitude") if r.get("locations") else None,
-                    }
-                    for r in valid[:15]
-                ]
-                return json.dumps({"count": len(valid), "trials": slim}, default=str)
-
-            elif tool_name == "get_trial_details":
-                from backend.mcp_servers.clinical_trials import get_trial_details
-                result = await get_trial_details(tool_input["nct_id"])
-                # Extract only the fields Claude needs, skip raw protocol
-                summary = _parse_trial_detail(result)
-                # Cache brief title for richer status messages
-                self._current_nct_id = tool_input["nct_id"]
-                self._current_brief_title = (summary.get("brief_title") or "")[:80]
-                return json.dumps(summary, default=str)
-
-            elif tool_name == "get_eligibility_criteria":
-                from backend.mcp_servers.clinical_trials import get_eligibility_criteria
-                result = await get_eligibility_criteria(tool_input["nct_id"])
-                return json.dumps(result, default=str)
-
-            elif tool_name == "get_trial_locations":
-                from backend.mcp_servers.clinical_trials import get_trial_locations
-                result = await get_trial_locations(tool_input["nct_id"])
-                # Cache locations for richer distance status messages
-                self._last_locations = result[:10]
-                # Limit to 10 closest locations to save context
-                return json.dumps(result[:10], default=str)
-
-            elif tool_name == "geocode_location":
-                from backend.mcp_servers.geocoding import geocode_location
-                result = await geocode_location(tool_input["location_string"])
-                return json.dumps(result, default=str)
-
-            elif tool_name == "calculate_distance":
-                from backend.mcp_servers.geocoding import calculate_distance
-                result = calculate_distance(
-                    tool_input["lat1"], tool_input["lon1"],
-                    tool_input["lat2"], tool_input["lon2"],
-                )
-                return json.dumps({"distance_miles": result})
-
-            elif tool_name == "get_adverse_events":
-                from backend.mcp_servers.fda_data import get_adverse_events
-                result = await get_adverse_events(
-                    tool_input["drug_name"],
-                    tool_input.get("limit", 20),
-                )
-                return json.dumps(result, default=str)
-
-            elif tool_name == "get_drug_label":
-                from backend.mcp_servers.fda_data import get_drug_label
-                result = await get_drug_label(tool_input["drug_name"])
-                # Truncate long label fields
-                if isinstance(result, dict):
-                    for key in result:
-                        if isinstance(result[key], str) and len(result[key]) > 1000:
-                            result[key] = result[key][:1000] + "..."
-                return json.dumps(result, default=str)
-
-            elif tool_name == "save_patient_profile":
-                profile = PatientProfile(**tool_input["profile"])
-                self.session_mgr.save_profile(self.session_id, profile)
-                state = self.session_mgr.get_state(self.session_id)
-                state.profile_complete = True
-                self.session_mgr.save_state(self.session_id, state)
-                # Emit condition filter from profile to sync the stats panel.
-                # Note: age/sex are NOT sent because search_trials doesn't filter
-                # by them — eligibility is evaluated during matching, not search.
-                # Sending them would create a false narrowing (0 results in AACT
-                # while the chat still finds trials via the live API).
-                profile_emission: dict[str, Any] = {
-                    "type": "filters_update",
-                    "condition": profile.condition.primary_diagnosis if profile.condition else "",
-                }
-                if profile.location:
-                    if profile.location.description:
-                        profile_emission["location"] = profile.location.description
-                    if profile.location.latitude and profile.location.longitude:
-                        profile_emission["latitude"] = profile.location.latitude
-                        profile_emission["longitude"] = profile.location.longitude
-                    if profile.location.max_travel_miles:
-                        profile_emission["distance_miles"] = profile.location.max_travel_miles
-                self._pending_emissions.append(profile_emission)
-                return json.dumps({"status": "saved", "profile": profile.model_dump()})
-
-            elif tool_name == "update_session_phase":
-                state = self.session_mgr.get_state(self.session_id)
-                state.phase = SessionPhase(tool_input["phase"])
-                self.session_mgr.save_state(self.session_id, state)
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": tool_input["phase"],
-                    "message": f"Moving to {tool_input['phase']} phase...",
-                })
-                return json.dumps({"status": "updated", "phase": tool_input["phase"]})
-
-            elif tool_name == "emit_widget":
-                self._pending_emissions.append({
-                    "type": "widget",
-                    "widget_type": tool_input["widget_type"],
-                    "question": tool_input["question"],
-                    "question_id": f"q_{len(self._pending_emissions)}",
-                    "options": tool_input["options"],
-                })
-                return json.dumps({"status": "widget_emitted"})
+            self._record_intake_answer(f"free_text_{self._free_text_counter}", user_message.strip())
 
-            elif tool_name == "emit_trial_cards":
-                self._pending_emissions.append({
-                    "type": "trial_cards",
-                    "trials": tool_input["trials"],
-                    "selectable": tool_input.get("selectable", False),
-                })
-                return json.dumps({"status": "trial_cards_emitted", "count": len(tool_input["trials"])})
+    def _record_intake_answer(self, question: str, answer: str) -> None:
+        """Store an intake answer and drop the rendered answers section."""
+        self._intake_answers[question] = answer
+        self._intake_answers_version += 1
 
-            elif tool_name == "emit_status":
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": tool_input["phase"],
-                    "message": tool_input["message"],
-                })
-                return json.dumps({"status": "status_emitted"})
+    def _intake_answers_section(self) -> str:
+        """Render collected intake answers, reusing the last render when unchanged.
 
-            elif tool_name == "save_matched_trials":
-                trials_data = tool_input.get("trials", [])
-                # Normalize fit_score: if Claude passed a 0-1 float, convert to 0-100 percentage
-                for t in trials_data:
-                    score = t.get("fit_score", 0)
-                    if isinstance(score, (int, float)) and 0 < score <= 1.0:
-                        t["fit_score"] = score * 100
-                matched = [MatchedTrial(**t) for t in trials_data]
-                self.session_mgr.save_matched_trials(self.session_id, matched)
-                state = self.session_mgr.get_state(self.session_id)
-                state.matching_complete = True
-                self.session_mgr.save_state(self.session_id, state)
-                return json.dumps({"status": "saved", "count": len(matched)})
+        The cache holds the answers dict itself, so a replaced dict always misses.
+        """
+        answers = self._intake_answers
+        version = self._intake_answers_version
+        cache = self._intake_section_cache
+        if cache is not None and cache[0] is answers and cache[1] == version:
+            return cache[2]
+        lines = ["\nCollected Patient Answers (use these when compiling the profile):"]
+        lines.extend(
+            f"- Patient description: {a}" if q.startswith("free_text_") else f"- {q}: {a}"
+            for q, a in answers.items()
+        )
+        section = "\n".join(lines)
+        self._intake_section_cache = (answers, version, section)
+        return section
+
+    def _profile_section(self) -> str:
+        """Render the saved profile, reusing the last render until the profile is saved again."""
+        version = self.session_mgr.profile_version(self.session_id)
+        cache = self._profile_section_cache
+        if cache is not None and cache[0] == version:
+            return cache[1]
+        profile = self.session_mgr.get_profile(self.session_id)
+        profile_json = orjson.dumps(
+            profile.model_dump(), default=str, option=orjson.OPT_INDENT_2
+        ).decode()
+        section = f"\nPatient profile:\n{profile_json}"
+        hk = profile.health_kit
+        if hk.lab_results or hk.vitals or hk.medications or hk.activity_steps_per_day:
+            section += (f"\n\nApple Health data imported: {len(hk.lab_results)} lab results, "
+                        f"{len(hk.vitals)} vitals, {len(hk.medications)} medications, "
+                        f"avg steps/day: {hk.activity_steps_per_day}")
+        self._profile_section_cache = (version, section)
+        return section
 
-            elif tool_name == "generate_report":
-                from backend.report.generator import generate_report
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": "report",
-                    "message": "Analyzing selected trials...",
-                })
-                profile = self.session_mgr.get_profile(self.session_id)
-                matched = self.session_mgr.get_matched_trials(self.session_id)
-                questions = tool_input.get("questions_for_doctor")
-                glossary_raw = tool_input.get("glossary")
-                # Convert dict glossary to list format expected by generator
-                glossary = None
-                if isinstance(glossary_raw, dict):
-                    glossary = [
-                        {"term": k, "definition": v}
-                        for k, v in glossary_raw.items()
-                    ]
-                elif isinstance(glossary_raw, list):
-                    glossary = glossary_raw
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": "report",
-                    "message": "Generating comprehensive report...",
-                })
-                html = generate_report(profile, matched, questions, glossary)
-                self.session_mgr.save_report(self.session_id, html)
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": "report",
-                    "message": "Formatting PDF report...",
-                })
-                state = self.session_mgr.get_state(self.session_id)
-                state.report_generated = True
-                self.session_mgr.save_state(self.session_id, state)
-                report_url = f"/api/sessions/{self.session_id}/report"
-                emission: dict[str, Any] = {
-                    "type": "report_ready",
-                    "url": report_url,
-                }
-                result_data: dict[str, Any] = {"status": "generated", "url": report_url}
-                # Only advertise PDF if Playwright is available
-                try:
-                    from backend.report.pdf_generator import check_playwright_browsers
-                    if check_playwright_browsers():
-                        pdf_url = f"/api/sessions/{self.session_id}/report.pdf"
-                        emission["pdf_url"] = pdf_url
-                        result_data["pdf_url"] = pdf_url
-                except Exception:
-                    pass
-                self._pending_emissions.append(emission)
-                self._pending_emissions.append({
-                    "type": "status",
-                    "phase": "report",
-                    "message": "Report complete!",
-                })
-                return json.dumps(result_data)
-
-            elif tool_name == "get_health_import_summary":
-                profile = self.session_mgr.get_profile(self.session_id)
-                hk = profile.health_kit
-                if not hk.lab_results and not hk.vitals and not hk.medications and hk.activity_steps_per_day is None:
-                    return json.dumps({"imported": False, "message": "No health data imported"})
-                from backend.mcp_servers.apple_health import estimate_ecog_from_steps
-                return json.dumps({
-                    "imported": True,
-                    "lab_results": [lr.model_dump() for lr in hk.lab_results],
-                    "vitals": [v.model_dump() for v in hk.vitals],
-                    "medications": [m.model_dump() for m in hk.medications],
-                    "activity_steps_per_day": hk.activity_steps_per_day,
-                    "activity_active_minutes_per_day": hk.activity_active_minutes_per_day,
-                    "estimated_ecog": estimate_ecog_from_steps(hk.activity_steps_per_day) if hk.activity_steps_per_day else None,
-                    "import_date": hk.import_date,
-                })
+    async def _execute_tool(self, tool_name: str, tool_input: dict) -> str:
+        """Execute a tool call and return the result as a string."""
+        handler = _TOOL_HANDLERS.get(tool_name)
+        if handler is None:
+            return _dumps({"error": f"Unknown tool: {tool_name}"})
+        try:
+            return await handler(self, tool_input)
+        except Exception as e:
+            logger.exception("Tool execution failed: %s", tool_name)
+            return _dumps({"error": str(e)})
+
+    async def _tool_search_trials(self, tool_input: dict) -> str:
+        results = await search_trials(**tool_input)
+        # Save to session — filter out entries with no NCT ID
+        valid = [r for r in results if r.get("nct_id")]
+        trials = [TrialSummary(**r) for r in valid]
+        self.session_mgr.save_search_results(self.session_id, trials)
+        # Update session state
+        with self.session_mgr.mutate_state(self.session_id) as state:
+            state.search_complete = True
+        # Emit filters to sync the stats panel.
+        # Only emit statuses — do NOT override condition, since the user's
+        # original condition was set on first message and Claude may search
+        # with a broader/different term (e.g. "bone sarcoma" vs "ewing sarcoma").
+        emission: dict[str, Any] = {"type": "filters_update"}
+        if tool_input.get("status"):
+            emission["statuses"] = tool_input["status"]
+        if len(emission) > 1:
+            self._pending_emissions.append(emission)
+        # Return slim summaries to keep context small
+        slim = [_slim_search_result(r) for r in valid[:15]]
+        return _dumps({"count": len(valid), "trials": slim})
+
+    async def _tool_get_trial_details(self, tool_input: dict) -> str:
+        result = await get_trial_details(tool_input["nct_id"])
+        # Extract only the fields Claude needs, skip raw protocol
+        summary = _parse_trial_detail(result)
+        # Cache brief title for richer status messages
+        self._current_nct_id = tool_input["nct_id"]
+        self._current_brief_title = (summary.get("brief_title") or "")[:80]
+        return _dumps(summary)
+
+    async def _tool_get_eligibility_criteria(self, tool_input: dict) -> str:
+        result = await get_eligibility_criteria(tool_input["nct_id"])
+        return _dumps(result)
+
+    async def _tool_get_trial_locations(self, tool_input: dict) -> str:
+        result = await get_trial_locations(tool_input["nct_id"])
+        # Cache locations for richer distance status messages
+        self._last_locations = result[:10]
+        # Limit to 10 closest locations to save context
+        return _dumps(result[:10])
+
+    async def _tool_geocode_location(self, tool_input: dict) -> str:
+        result = await geocode_location(tool_input["location_string"])
+        return _dumps(result)
+
+    async def _tool_calculate_distance(self, tool_input: dict) -> str:
+        result = calculate_distance(
+            tool_input["lat1"], tool_input["lon1"],
+            tool_input["lat2"], tool_input["lon2"],
+        )
+        return _dumps({"distance_miles": result})
+
+    async def _tool_get_adverse_events(self, tool_input: dict) -> str:
+        result = await get_adverse_events(
+            tool_input["drug_name"],
+            tool_input.get("limit", 20),
+        )
+        return _dumps(result)
+
+    async def _tool_get_drug_label(self, tool_input: dict) -> str:
+        result = await get_drug_label(tool_input["drug_name"])
+        # Truncate long label fields
+        if isinstance(result, dict):
+            result = {
+                k: v[:1000] + "..." if isinstance(v, str) and len(v) > 1000 else v
+                for k, v in result.items()
+            }
+        return _dumps(result)
+
+    async def _tool_save_patient_profile(self, tool_input: dict) -> str:
+        profile = PatientProfile(**tool_input["profile"])
+        self.session_mgr.save_profile(self.session_id, profile)
+        with self.session_mgr.mutate_state(self.session_id) as state:
+            state.profile_complete = True
+        # Emit condition filter from profile to sync the stats panel.
+        # Note: age/sex are NOT sent because search_trials doesn't filter
+        # by them — eligibility is evaluated during matching, not search.
+        # Sending them would create a false narrowing (0 results in AACT
+        # while the chat still finds trials via the live API).
+        profile_emission: dict[str, Any] = {
+            "type": "filters_update",
+            "condition": profile.condition.primary_diagnosis if profile.condition else "",
+        }
+        if profile.location:
+            if profile.location.description:
+                profile_emission["location"] = profile.location.description
+            if profile.location.latitude and profile.location.longitude:
+                profile_emission["latitude"] = profile.location.latitude
+                profile_emission["longitude"] = profile.location.longitude
+            if profile.location.max_travel_miles:
+                profile_emission["distance_miles"] = profile.location.max_travel_miles
+        self._pending_emissions.append(profile_emission)
+        return _dumps({"status": "saved", "profile": profile.model_dump()})
+
+    async def _tool_update_session_phase(self, tool_input: dict) -> str:
+        with self.session_mgr.mutate_state(self.session_id) as state:
+            state.phase = SessionPhase(tool_input["phase"])
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": tool_input["phase"],
+            "message": f"Moving to {tool_input['phase']} phase...",
+        })
+        return _dumps({"status": "updated", "phase": tool_input["phase"]})
+
+    async def _tool_emit_widget(self, tool_input: dict) -> str:
+        self._pending_emissions.append({
+            "type": "widget",
+            "widget_type": tool_input["widget_type"],
+            "question": tool_input["question"],
+            "question_id": f"q_{len(self._pending_emissions)}",
+            "options": tool_input["options"],
+        })
+        return _ACK_WIDGET
 
-            elif tool_name == "emit_partial_filters":
-                filters_emission: dict[str, Any] = {"type": "filters_update"}
-                for key in ("condition", "age", "sex", "location", "latitude", "longitude", "distance_miles", "statuses", "phases"):
-                    if key in tool_input and tool_input[key] is not None:
-                        filters_emission[key] = tool_input[key]
-                self._pending_emissions.append(filters_emission)
-                return json.dumps({"status": "filters_emitted"})
+    async def _tool_emit_trial_cards(self, tool_input: dict) -> str:
+        self._pending_emissions.append({
+            "type": "trial_cards",
+            "trials": tool_input["trials"],
+            "selectable": tool_input.get("selectable", False),
+        })
+        return f'{{"status":"trial_cards_emitted","count":{len(tool_input["trials"])}}}'
 
-            else:
-                return json.dumps({"error": f"Unknown tool: {tool_name}"})
+    async def _tool_emit_status(self, tool_input: dict) -> str:
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": tool_input["phase"],
+            "message": tool_input["message"],
+        })
+        return _ACK_STATUS
+
+    async def _tool_save_matched_trials(self, tool_input: dict) -> str:
+        trials_data = tool_input.get("trials", [])
+        # Normalize fit_score: if Claude passed a 0-1 float, convert to 0-100 percentage.
+        # Tool input comes from JSON, so numbers are exactly float/int (never
+        # subclasses) and an identity check on the type is enough.
+        for t in trials_data:
+            score = t.get("fit_score", 0)
+            score_type = type(score)
+            if (score_type is float or score_type is int) and 0 < score <= 1.0:
+                t["fit_score"] = score * 100
+        matched = [MatchedTrial(**t) for t in trials_data]
+        self.session_mgr.save_matched_trials(self.session_id, matched)
+        with self.session_mgr.mutate_state(self.session_id) as state:
+            state.matching_complete = True
+        return f'{{"status":"saved","count":{len(matched)}}}'
+
+    async def _tool_generate_report(self, tool_input: dict) -> str:
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": "report",
+            "message": "Analyzing selected trials...",
+        })
+        profile = self.session_mgr.get_profile(self.session_id)
+        matched = self.session_mgr.get_matched_trials(self.session_id)
+        questions = tool_input.get("questions_for_doctor")
+        glossary_raw = tool_input.get("glossary")
+        # Convert dict glossary to list format expected by generator
+        glossary = None
+        if isinstance(glossary_raw, dict):
+            glossary = [
+                {"term": k, "definition": v}
+                for k, v in glossary_raw.items()
+            ]
+        elif isinstance(glossary_raw, list):
+            glossary = glossary_raw
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": "report",
+            "message": "Generating comprehensive report...",
+        })
+        html = generate_report(profile, matched, questions, glossary)
+        self.session_mgr.save_report(self.session_id, html)
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": "report",
+            "message": "Formatting PDF report...",
+        })
+        with self.session_mgr.mutate_state(self.session_id) as state:
+            state.report_generated = True
+        report_url = f"/api/sessions/{self.session_id}/report"
+        emission: dict[str, Any] = {
+            "type": "report_ready",
+            "url": report_url,
+        }
+        result_data: dict[str, Any] = {"status": "generated", "url": report_url}
+        # Only advertise PDF if Playwright is available
+        try:
+            if check_playwright_browsers():
+                pdf_url = f"/api/sessions/{self.session_id}/report.pdf"
+                emission["pdf_url"] = pdf_url
+                result_data["pdf_url"] = pdf_url
+        except Exception:
+            pass
+        self._pending_emissions.append(emission)
+        self._pending_emissions.append({
+            "type": "status",
+            "phase": "report",
+            "message": "Report complete!",
+        })
+        return _dumps(result_data)
+
+    async def _tool_get_health_import_summary(self, tool_input: dict) -> str:
+        profile = self.session_mgr.get_profile(self.session_id)
+        hk = profile.health_kit
+        if not hk.lab_results and not hk.vitals and not hk.medications and hk.activity_steps_per_day is None:
+            return _NO_HEALTH_IMPORT
+        return _dumps({
+            "imported": True,
+            "lab_results": [lr.model_dump() for lr in hk.lab_results],
+            "vitals": [v.model_dump() for v in hk.vitals],
+            "medications": [m.model_dump() for m in hk.medications],
+            "activity_steps_per_day": hk.activity_steps_per_day,
+            "activity_active_minutes_per_day": hk.activity_active_minutes_per_day,
+            "estimated_ecog": estimate_ecog_from_steps(hk.activity_steps_per_day) if hk.activity_steps_per_day else None,
+            "import_date": hk.import_date,
+        })
 
-        except Exception as e:
-            logger.exception("Tool execution failed: %s", tool_name)
-            return json.dumps({"error": str(e)})
+    async def _tool_emit_partial_filters(self, tool_input: dict) -> str:
+        filters_emission: dict[str, Any] = {"type": "filters_update"}
+        for key in ("condition", "age", "sex", "location", "latitude", "longitude", "distance_miles", "statuses", "phases"):
+            if key in tool_input and tool_input[key] is not None:
+                filters_emission[key] = tool_input[key]
+        self._pending_emissions.append(filters_emission)
+        return _ACK_FILTERS
 
     async def _execute_tool_with_heartbeat(
         self, tool_name: str, tool_input: dict, state: SessionState
@@ -929,11 +1159,60 @@ class AgentOrchestrator:
         else:
             return await self._execute_tool(tool_name, tool_input)
 
+    async def _run_tool_run(self, run: list[dict], state: SessionState) -> list[str]:
+        """Execute one run from ``_tool_runs``; results keep tool_use order.
+
+        A run of several lookups executes under one gather so their network
+        round-trips overlap.
+        """
+        if len(run) == 1:
+            tu = run[0]
+            try:
+                result = await self._execute_tool_with_heartbeat(tu["name"], tu["input"], state)
+            except Exception as e:
+                result = e
+            results: list = [result]
+        else:
+            results = await asyncio.gather(
+                *(self._execute_tool_with_heartbeat(tu["name"], tu["input"], state) for tu in run),
+                return_exceptions=True,
+            )
+        self._tools_executed += len(run)
+
+        # Keep the conversation valid: every tool_use still gets a tool_result
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error("Tool execution failed: %s: %s", run[i]["name"], result)
+                results[i] = _dumps({"error": str(result)})
+        return results
+
+    async def _heartbeats_until(self, task: asyncio.Future) -> AsyncIterator[dict[str, Any]]:
+        """Yield queued heartbeat statuses while *task* runs, then any left over.
+
+        Closing the generator early cancels *task*.
+        """
+        getter: asyncio.Future | None = None
+        try:
+            while not task.done():
+                getter = asyncio.ensure_future(self._heartbeat_queue.get())
+                await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            while not self._heartbeat_queue.empty():
+                yield self._heartbeat_queue.get_nowait()
+        finally:
+            if getter is not None:
+                getter.cancel()
+            task.cancel()
+
     def _trim_history(self, state: SessionState | None = None):
         """Trim conversation history to prevent context overflow.
 
-        Keeps the last ~20 messages, prepending a synthetic context note.
-        Ensures tool_use/tool_result pairs are never split at the boundary.
+        Keeps the opening exchange and the last ~20 messages, with a synthetic
+        context note in between. Ensures tool_use/tool_result pairs are never
+        split at either boundary.
         """
         if self._compaction_disabled:
             return
@@ -961,37 +1240,36 @@ class AgentOrchestrator:
                 and any(isinstance(b, dict) and b.get("type") == "tool_result" for b in c)
             )
 
-        tail_start = len(self.conversation_history) - 20
+        history = self.conversation_history
+        # Pin the opening exchange (usually the patient's own description of
+        # their condition) unless it ends in a tool_use whose result would be cut.
+        pinned = _HISTORY_PINNED if not _has_tool_use(history[_HISTORY_PINNED - 1]) else 1
+        # An earlier trim's marker inside the prefix is re-used, not pinned under a new one
+        if _TRIM_MARKER in history[1:pinned]:
+            pinned = history.index(_TRIM_MARKER, 1)
+        tail_start = len(history) - _HISTORY_TAIL
 
         # Walk backwards so we don't start on a tool_result (which needs
         # its preceding assistant tool_use) or right after a tool_use
         # (the next message must be a tool_result, not our placeholder).
-        while tail_start > 0:
-            msg = self.conversation_history[tail_start]
-            prev = self.conversation_history[tail_start - 1] if tail_start > 0 else None
+        while tail_start > pinned:
+            msg = history[tail_start]
+            prev = history[tail_start - 1]
             if _is_tool_result(msg):
                 tail_start -= 1
-            elif prev and _has_tool_use(prev):
+            elif _has_tool_use(prev):
                 # prev is assistant tool_use and msg is its tool_result pair
                 tail_start -= 1
             else:
                 break
 
-        if tail_start < 1:
+        # Nothing left to drop beyond a marker from a previous trim
+        if tail_start <= pinned + 1:
             return
 
-        kept_end = self.conversation_history[tail_start:]
-
-        # Ensure kept_end starts with a user message (API requirement).
-        # If it starts with assistant, prepend a synthetic user message.
-        bridge: list[dict] = [
-            {"role": "user", "content": "[Earlier conversation trimmed to save context. See session state for details.]"},
-        ]
-        if kept_end and kept_end[0].get("role") == "user":
-            # Need assistant message between our user bridge and the user in kept_end
-            bridge.append({"role": "assistant", "content": "Understood, continuing from current context."})
-
-        self.conversation_history = bridge + kept_end
+        # Splice in place: pinned prefix + trim marker + recent tail. Consecutive
+        # same-role turns around the marker are merged by the API.
+        history[pinned:tail_start] = [_TRIM_MARKER]
 
     async def process_message(self, user_message: str):
         """Process a user message and yield response chunks.
@@ -1007,9 +1285,14 @@ class AgentOrchestrator:
         state = self.session_mgr.get_state(self.session_id)
         system_prompt = _build_system_prompt(state.phase)
 
-        # Add context about the current session state
+        # Add context about the current session state. The phase prompt is a
+        # fixed prefix, so it carries the prompt-cache breakpoint; the session
+        # context changes turn to turn and follows it uncached.
         session_context = self._build_session_context(state)
-        full_system = f"{system_prompt}\n\n## Session Context\n{session_context}"
+        system_blocks = [
+            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": f"## Session Context\n{session_context}"},
+        ]
 
         # Extract intake answers before they can be trimmed
         if state.phase == SessionPhase.INTAKE and not state.profile_complete:
@@ -1036,65 +1319,88 @@ class AgentOrchestrator:
             async with self.client.messages.stream(
                 model=self._model,
                 max_tokens=16384,
-                system=full_system,
-                tools=TOOLS,
+                system=system_blocks,
+                tools=_TOOLS_PARAM,
                 messages=self.conversation_history,
                 extra_headers=self._beta_headers or None,
             ) as stream:
                 current_tool_use = None
                 _tool_json_len = 0  # Track JSON size for progress updates
-
-                # Map tool names to user-friendly status messages
-                _TOOL_STATUS = {
-                    "save_matched_trials": ("matching", "Compiling detailed trial analysis..."),
-                    "generate_report": ("report", "Building your personalized report..."),
-                    "save_patient_profile": ("intake", "Saving your profile..."),
-                    "search_trials": ("search", "Preparing search..."),
-                }
+                # Text deltas are coalesced before being yielded to the transport
+                pending_text: list[str] = []
+                pending_len = 0
+                last_flush = time.monotonic()
 
                 async for event in stream:
-                    if event.type == "content_block_start":
-                        if hasattr(event.content_block, "type"):
-                            if event.content_block.type == "text":
-                                pass  # Will get text via deltas
-                            elif event.content_block.type == "tool_use":
+                    # Deltas dominate the event stream, so they are matched first
+                    match event.type:
+                        case "content_block_delta":
+                            delta = event.delta
+                            delta_type = delta.type
+                            if delta_type == "text_delta":
+                                text = delta.text
+                                text_chunks.append(text)
+                                pending_text.append(text)
+                                pending_len += len(text)
+                                now = time.monotonic()
+                                if (
+                                    pending_len >= _TEXT_FLUSH_CHARS
+                                    or now - last_flush >= _TEXT_FLUSH_SECONDS
+                                ):
+                                    yield {"type": "text", "content": "".join(pending_text)}
+                                    pending_text.clear()
+                                    pending_len = 0
+                                    last_flush = now
+                            elif delta_type == "input_json_delta":
+                                if current_tool_use is not None:
+                                    partial = delta.partial_json
+                                    current_tool_use["input_json"] += partial
+                                    _tool_json_len += len(partial)
+                                    # Emit progress for large tool outputs (every ~10KB)
+                                    if _tool_json_len > 10000 and _tool_json_len % 10000 < len(partial):
+                                        kb = _tool_json_len // 1024
+                                        name = current_tool_use["name"]
+                                        status = _STREAMING_STATUS.get(name)
+                                        if status:
+                                            yield {"type": "status", "phase": status[0], "message": f"{status[1]} ({kb}KB processed)"}
+
+                        case "content_block_start":
+                            block = event.content_block
+                            if block.type == "tool_use":
+                                # Tool names come from the closed TOOLS set; interning
+                                # lets the dispatch dict lookups below hit the identity
+                                # fast path instead of comparing string contents.
+                                tool_name = sys.intern(block.name)
                                 current_tool_use = {
-                                    "id": event.content_block.id,
-                                    "name": event.content_block.name,
+                                    "id": block.id,
+                                    "name": tool_name,
                                     "input_json": "",
                                 }
                                 _tool_json_len = 0
                                 # Emit status when tool generation starts
-                                status = _TOOL_STATUS.get(event.content_block.name)
+                                status = _STREAMING_STATUS.get(tool_name)
                                 if status:
                                     yield {"type": "status", "phase": status[0], "message": status[1]}
-
-                    elif event.type == "content_block_delta":
-                        if hasattr(event.delta, "text"):
-                            text_chunks.append(event.delta.text)
-                            yield {"type": "text", "content": event.delta.text}
-                        elif hasattr(event.delta, "partial_json"):
+                            # Text blocks arrive via deltas
+
+                        case "content_block_stop":
+                            if pending_text:
+                                yield {"type": "text", "content": "".join(pending_text)}
+                                pending_text.clear()
+                                pending_len = 0
+                                last_flush = time.monotonic()
                             if current_tool_use is not None:
-                                current_tool_use["input_json"] += event.delta.partial_json
-                                _tool_json_len += len(event.delta.partial_json)
-                                # Emit progress for large tool outputs (every ~10KB)
-                                if _tool_json_len > 10000 and _tool_json_len % 10000 < len(event.delta.partial_json):
-                                    kb = _tool_json_len // 1024
-                                    name = current_tool_use["name"]
-                                    status = _TOOL_STATUS.get(name)
-                                    if status:
-                                        yield {"type": "status", "phase": status[0], "message": f"{status[1]} ({kb}KB processed)"}
-
-                    elif event.type == "content_block_stop":
-                        if current_tool_use is not None:
-                            try:
-                                current_tool_use["input"] = json.loads(
-                                    current_tool_use["input_json"] or "{}"
-                                )
-                            except json.JSONDecodeError:
-                                current_tool_use["input"] = {}
-                            tool_uses.append(current_tool_use)
-                            current_tool_use = None
+                                try:
+                                    current_tool_use["input"] = orjson.loads(
+                                        current_tool_use["input_json"] or "{}"
+                                    )
+                                except orjson.JSONDecodeError:
+                                    current_tool_use["input"] = {}
+                                tool_uses.append(current_tool_use)
+                                current_tool_use = None
+
+                if pending_text:
+                    yield {"type": "text", "content": "".join(pending_text)}
 
                 # Get the final message for stop_reason
                 response = await stream.get_final_message()
@@ -1113,19 +1419,12 @@ class AgentOrchestrator:
                 }
 
             # Build the assistant message content for history
-            assistant_content = []
-            if text_chunks:
-                assistant_content.append({
-                    "type": "text",
-                    "text": "".join(text_chunks),
-                })
-            for tu in tool_uses:
-                assistant_content.append({
-                    "type": "tool_use",
-                    "id": tu["id"],
-                    "name": tu["name"],
-                    "input": tu["input"],
-                })
+            text = "".join(text_chunks)
+            assistant_content = [{"type": "text", "text": text}] if text else []
+            assistant_content += [
+                {"type": "tool_use", "id": tu["id"], "name": tu["name"], "input": tu["input"]}
+                for tu in tool_uses
+            ]
 
             self.conversation_history.append({
                 "role": "assistant",
@@ -1151,165 +1450,35 @@ class AgentOrchestrator:
                 yield {"type": "done"}
                 return
 
-            # Execute tools and build tool results
+            # Run the tools run by run. Each run's statuses go out right before it
+            # starts, so labels built from earlier results see them, and heartbeats
+            # stream while it executes.
             tool_results = []
+            results: list[str] = []
             self._tools_executed = 0
             self._iteration_start = time.monotonic()
-            total_tools = len(tool_uses)
-            for tu in tool_uses:
-                # Emit status for certain tools
-                if tu["name"] in ("search_trials",):
-                    yield {
-                        "type": "status",
-                        "phase": "searching",
-                        "message": "Searching ClinicalTrials.gov...",
-                    }
-                elif tu["name"] == "get_trial_details":
-                    nct_id = tu["input"].get("nct_id", "")
-                    self._current_nct_id = nct_id
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": f"Analyzing {nct_id}: fetching study details...",
-                    }
-                elif tu["name"] == "get_eligibility_criteria":
-                    nct_id = tu["input"].get("nct_id", "")
-                    title_suffix = f" — {self._current_brief_title}" if self._current_brief_title and self._current_nct_id == nct_id else ""
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": f"Analyzing {nct_id}{title_suffix}: checking eligibility...",
-                    }
-                elif tu["name"] in ("get_adverse_events", "get_drug_label"):
-                    drug = tu["input"].get("drug_name", "")
-                    nct_ctx = f" ({self._current_nct_id})" if self._current_nct_id else ""
-                    yield {
-                        "type": "status",
-                        "phase": "fda_lookup",
-                        "message": f"Looking up FDA data for {drug}{nct_ctx}...",
-                    }
-                elif tu["name"] == "save_matched_trials":
-                    trial_count = len(tu["input"].get("trials", []))
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": f"Saving {trial_count} matched trials...",
-                    }
-                elif tu["name"] == "generate_report":
-                    yield {
-                        "type": "status",
-                        "phase": "report",
-                        "message": "Generating your personalized report...",
-                    }
-                elif tu["name"] == "geocode_location":
-                    yield {
-                        "type": "status",
-                        "phase": "geocoding",
-                        "message": f"Looking up location: {tu['input'].get('location_string', '')}...",
-                    }
-                elif tu["name"] == "calculate_distance":
-                    # Try to find the facility name from cached locations by matching lat/lon
-                    dist_label = "trial site"
-                    lat2 = tu["input"].get("lat2")
-                    lon2 = tu["input"].get("lon2")
-                    if lat2 is not None and lon2 is not None and self._last_locations:
-                        for loc in self._last_locations:
-                            loc_lat = loc.get("latitude") or loc.get("lat")
-                            loc_lon = loc.get("longitude") or loc.get("lon")
-                            if loc_lat is not None and loc_lon is not None:
-                                if abs(float(loc_lat) - float(lat2)) < 0.01 and abs(float(loc_lon) - float(lon2)) < 0.01:
-                                    city = loc.get("city", "")
-                                    loc_state = loc.get("state", "")
-                                    facility = loc.get("facility", "") or loc.get("name", "")
-                                    if city and loc_state:
-                                        dist_label = f"{city}, {loc_state}"
-                                    elif facility:
-                                        dist_label = facility
-                                    break
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": f"Calculating distance to {dist_label}...",
-                    }
-                elif tu["name"] == "get_trial_locations":
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": f"Fetching locations for {tu['input'].get('nct_id', '')}...",
-                    }
-                elif tu["name"] == "get_health_import_summary":
-                    yield {
-                        "type": "status",
-                        "phase": "matching",
-                        "message": "Reviewing imported health data...",
-                    }
-                elif tu["name"] == "save_patient_profile":
-                    yield {
-                        "type": "status",
-                        "phase": "intake",
-                        "message": "Compiling your patient profile...",
-                    }
-                elif tu["name"] == "update_session_phase":
-                    phase_name = tu["input"].get("phase", "next")
-                    yield {
-                        "type": "status",
-                        "phase": phase_name,
-                        "message": f"Transitioning to {phase_name} phase...",
-                    }
-                elif tu["name"] == "emit_widget":
-                    yield {
-                        "type": "status",
-                        "phase": "intake",
-                        "message": "Preparing question...",
-                    }
-                elif tu["name"] == "emit_trial_cards":
-                    trial_count = len(tu["input"].get("trials", []))
-                    yield {
-                        "type": "status",
-                        "phase": "selection",
-                        "message": f"Presenting {trial_count} trial cards...",
-                    }
-                elif tu["name"] == "emit_status":
-                    pass  # emit_status handles itself
-                elif tu["name"] == "emit_partial_filters":
-                    pass  # Lightweight tool, no status needed
-                else:
-                    yield {
-                        "type": "status",
-                        "phase": state.phase.value,
-                        "message": f"Running {tu['name']}...",
-                    }
-
-                result = await self._execute_tool_with_heartbeat(tu["name"], tu["input"], state)
-                # Drain any heartbeat emissions that were queued
-                while not self._heartbeat_queue.empty():
-                    yield self._heartbeat_queue.get_nowait()
-                self._tools_executed += 1
-
+            for run in _tool_runs(tool_uses):
+                for tu in run:
+                    if tu["name"] in _PRE_EXECUTION_STATUS:
+                        describe = _PRE_EXECUTION_STATUS[tu["name"]]
+                        if describe is None:
+                            continue
+                        phase, message = describe(self, tu["input"])
+                    else:
+                        phase, message = state.phase.value, f"Running {tu['name']}..."
+                    yield {"type": "status", "phase": phase, "message": message}
+
+                pending = asyncio.ensure_future(self._run_tool_run(run, state))
+                async for heartbeat in self._heartbeats_until(pending):
+                    yield heartbeat
+                results += pending.result()
+
+            for tu, result in zip(tool_uses, results):
                 # Emit location summary for get_trial_locations
-                if tu["name"] == "get_trial_locations" and self._last_locations:
-                    locs = self._last_locations
-                    # Build a short summary of locations found
-                    loc_summaries = []
-                    for loc in locs[:5]:  # Show up to 5 locations
-                        city = loc.get("city", "")
-                        loc_state = loc.get("state", "")
-                        facility = loc.get("facility", "") or loc.get("name", "")
-                        if facility and city:
-                            loc_summaries.append(f"{facility}, {city}")
-                        elif city and loc_state:
-                            loc_summaries.append(f"{city}, {loc_state}")
-                        elif facility:
-                            loc_summaries.append(facility)
-                    if loc_summaries:
-                        nct = tu["input"].get("nct_id", "")
-                        summary_text = "; ".join(loc_summaries)
-                        more = f" (+{len(locs) - 5} more)" if len(locs) > 5 else ""
-                        yield {
-                            "type": "status",
-                            "phase": "matching",
-                            "message": f"Found {len(locs)} sites for {nct}: {summary_text}{more}",
-                        }
+                if tu["name"] == "get_trial_locations":
+                    summary = _location_summary(tu["input"].get("nct_id", ""), result)
+                    if summary:
+                        yield {"type": "status", "phase": "matching", "message": summary}
 
                 tool_results.append({
                     "type": "tool_result",
@@ -1353,23 +1522,11 @@ class AgentOrchestrator:
 
         # During intake, inject all collected answers so they survive history trimming
         if self._intake_answers and not state.profile_complete:
-            answers_section = "\nCollected Patient Answers (use these when compiling the profile):"
-            for q, a in self._intake_answers.items():
-                if q.startswith("free_text_"):
-                    answers_section += f"\n- Patient description: {a}"
-                else:
-                    answers_section += f"\n- {q}: {a}"
-            parts.append(answers_section)
+            parts.append(self._intake_answers_section())
 
         if state.profile_complete:
             try:
-                profile = self.session_mgr.get_profile(self.session_id)
-                parts.append(f"\nPatient profile:\n{json.dumps(profile.model_dump(), indent=2, default=str)}")
-                hk = profile.health_kit
-                if hk.lab_results or hk.vitals or hk.medications or hk.activity_steps_per_day:
-                    parts.append(f"\nApple Health data imported: {len(hk.lab_results)} lab results, "
-                                 f"{len(hk.vitals)} vitals, {len(hk.medications)} medications, "
-                                 f"avg steps/day: {hk.activity_steps_per_day}")
+                parts.append(self._profile_section())
             except Exception:
                 pass
 
@@ -1377,3 +1534,105 @@ class AgentOrchestrator:
             parts.append(f"\nSelected trial IDs: {', '.join(state.selected_trial_ids)}")
 
         return "\n".join(parts)
+
+
+# Tool name -> handler. Built once so dispatch is a single dict lookup.
+_TOOL_HANDLERS: dict[str, Callable[[AgentOrchestrator, dict], Awaitable[str]]] = {
+    "search_trials": AgentOrchestrator._tool_search_trials,
+    "get_trial_details": AgentOrchestrator._tool_get_trial_details,
+    "get_eligibility_criteria": AgentOrchestrator._tool_get_eligibility_criteria,
+    "get_trial_locations": AgentOrchestrator._tool_get_trial_locations,
+    "geocode_location": AgentOrchestrator._tool_geocode_location,
+    "calculate_distance": AgentOrchestrator._tool_calculate_distance,
+    "get_adverse_events": AgentOrchestrator._tool_get_adverse_events,
+    "get_drug_label": AgentOrchestrator._tool_get_drug_label,
+    "save_patient_profile": AgentOrchestrator._tool_save_patient_profile,
+    "update_session_phase": AgentOrchestrator._tool_update_session_phase,
+    "emit_widget": AgentOrchestrator._tool_emit_widget,
+    "emit_trial_cards": AgentOrchestrator._tool_emit_trial_cards,
+    "emit_status": AgentOrchestrator._tool_emit_status,
+    "save_matched_trials": AgentOrchestrator._tool_save_matched_trials,
+    "generate_report": AgentOrchestrator._tool_generate_report,
+    "get_health_import_summary": AgentOrchestrator._tool_get_health_import_summary,
+    "emit_partial_filters": AgentOrchestrator._tool_emit_partial_filters,
+}
+
+
+# Pre-execution status messages, keyed by tool name. Each entry maps
+# (orchestrator, tool input) -> (phase, message); None means the tool is silent.
+# Tools not listed get a generic "Running <tool>..." in the current phase.
+
+
+def _status_trial_details(orch: AgentOrchestrator, inp: dict) -> tuple[str, str]:
+    return "matching", f"Analyzing {inp.get('nct_id', '')}: fetching study details..."
+
+
+def _status_eligibility(orch: AgentOrchestrator, inp: dict) -> tuple[str, str]:
+    nct_id = inp.get("nct_id", "")
+    title = orch._current_brief_title
+    title_suffix = f" — {title}" if title and orch._current_nct_id == nct_id else ""
+    return "matching", f"Analyzing {nct_id}{title_suffix}: checking eligibility..."
+
+
+def _status_fda(orch: AgentOrchestrator, inp: dict) -> tuple[str, str]:
+    nct_ctx = f" ({orch._current_nct_id})" if orch._current_nct_id else ""
+    return "fda_lookup", f"Looking up FDA data for {inp.get('drug_name', '')}{nct_ctx}..."
+
+
+def _status_distance(orch: AgentOrchestrator, inp: dict) -> tuple[str, str]:
+    # Try to find the facility name from cached locations by matching lat/lon
+    dist_label = "trial site"
+    lat2 = inp.get("lat2")
+    lon2 = inp.get("lon2")
+    if lat2 is not None and lon2 is not None and orch._last_locations:
+        for loc in orch._last_locations:
+            loc_lat = loc.get("latitude") or loc.get("lat")
+            loc_lon = loc.get("longitude") or loc.get("lon")
+            if loc_lat is None or loc_lon is None:
+                continue
+            if abs(float(loc_lat) - float(lat2)) < 0.01 and abs(float(loc_lon) - float(lon2)) < 0.01:
+                city = loc.get("city", "")
+                loc_state = loc.get("state", "")
+                facility = loc.get("facility", "") or loc.get("name", "")
+                if city and loc_state:
+                    dist_label = f"{city}, {loc_state}"
+                elif facility:
+                    dist_label = facility
+                break
+    return "matching", f"Calculating distance to {dist_label}..."
+
+
+def _status_phase_change(orch: AgentOrchestrator, inp: dict) -> tuple[str, str]:
+    phase_name = inp.get("phase", "next")
+    return phase_name, f"Transitioning to {phase_name} phase..."
+
+
+_PRE_EXECUTION_STATUS: dict[str, Callable[[AgentOrchestrator, dict], tuple[str, str]] | None] = {
+    "search_trials": lambda orch, inp: ("searching", "Searching ClinicalTrials.gov..."),
+    "get_trial_details": _status_trial_details,
+    "get_eligibility_criteria": _status_eligibility,
+    "get_adverse_events": _status_fda,
+    "get_drug_label": _status_fda,
+    "save_matched_trials": lambda orch, inp: (
+        "matching", f"Saving {len(inp.get('trials', []))} matched trials..."
+    ),
+    "generate_report": lambda orch, inp: ("report", "Generating your personalized report..."),
+    "geocode_location": lambda orch, inp: (
+        "geocoding", f"Looking up location: {inp.get('location_string', '')}..."
+    ),
+    "calculate_distance": _status_distance,
+    "get_trial_locations": lambda orch, inp: (
+        "matching", f"Fetching locations for {inp.get('nct_id', '')}..."
+    ),
+    "get_health_import_summary": lambda orch, inp: (
+        "matching", "Reviewing imported health data..."
+    ),
+    "save_patient_profile": lambda orch, inp: ("intake", "Compiling your patient profile..."),
+    "update_session_phase": _status_phase_change,
+    "emit_widget": lambda orch, inp: ("intake", "Preparing question..."),
+    "emit_trial_cards": lambda orch, inp: (
+        "selection", f"Presenting {len(inp.get('trials', []))} trial cards..."
+    ),
+    "emit_status": None,  # emit_status handles itself
+    "emit_partial_filters": None,  # Lightweight tool, no status needed
+}
@@ -0,0 +1,365 @@
+"""REST endpoints for session data, reports and Apple Health imports."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, File, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
+from pydantic import TypeAdapter, ValidationError
+
+from backend.cache import coalesced
+from backend.config import settings
+from backend.mcp_servers.apple_health import estimate_ecog_from_steps, parse_apple_health_xml
+from backend.models.patient import HealthKitImport
+from backend.models.trial import MatchedTrial, TrialSummary
+from backend.session import session_mgr
+from backend.websocket import notify_session
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+
+_DUMMY_EXPORT = Path(__file__).resolve().parent.parent / "static" / "dummy_healthkit_export.zip"
+
+
+@router.post("")
+async def create_session():
+    session_id = session_mgr.create_session()
+    return {"session_id": session_id}
+
+
+# Session GETs serialize straight from the models via pydantic-core, skipping the
+# model_dump() dict and FastAPI's jsonable_encoder pass.
+_TRIALS_ADAPTER = TypeAdapter(list[TrialSummary])
+_MATCHED_ADAPTER = TypeAdapter(list[MatchedTrial])
+
+
+def _json_response(body: bytes | str) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/{session_id}/profile")
+async def get_profile(session_id: str):
+    profile = session_mgr.get_profile(session_id)
+    return _json_response(profile.model_dump_json())
+
+
+@router.get("/{session_id}/state")
+async def get_state(session_id: str):
+    state = session_mgr.get_state(session_id)
+    return _json_response(state.model_dump_json())
+
+
+@router.get("/{session_id}/trials")
+async def get_trials(session_id: str):
+    trials = session_mgr.get_search_results(session_id)
+    return _json_response(_TRIALS_ADAPTER.dump_json(trials))
+
+
+@router.get("/{session_id}/matched")
+async def get_matched(session_id: str):
+    matched = session_mgr.get_matched_trials(session_id)
+    return _json_response(_MATCHED_ADAPTER.dump_json(matched))
+
+
+@router.get("/{session_id}/report")
+async def get_report(session_id: str):
+    html = session_mgr.get_report(session_id)
+    if html is None:
+        return JSONResponse({"error": "Report not yet generated"}, status_code=404)
+    return HTMLResponse(html)
+
+
+_BODY_RE = re.compile(r"(<body[^>]*>)", re.IGNORECASE)
+_PDF_FALLBACK_BANNER = (
+    '<div style="background:#fff3cd;color:#856404;padding:12px 16px;'
+    "border:1px solid #ffc107;border-radius:4px;margin-bottom:16px;"
+    'font-family:sans-serif;font-size:14px;">'
+    "<strong>PDF generation unavailable</strong> &mdash; showing HTML version. "
+    "To enable PDF export, run <code>playwright install chromium</code> on the server."
+    "</div>"
+)
+
+# Rendered PDF files keyed by (session_id, digest of the report HTML). A regenerated
+# report hashes differently, so stale PDFs are never served.
+_pdf_cache: LRUCache = LRUCache(maxsize=1024)
+# Renders in progress, so a double-click or retry waits for the first Chromium run
+_pdf_inflight: dict[tuple, asyncio.Task] = {}
+# Background render jobs by job id; finished jobs are forgotten after 10 minutes
+_pdf_jobs: TTLCache = TTLCache(maxsize=256, ttl=600)
+_pdf_slots = asyncio.Semaphore(settings.max_concurrent_pdfs)
+
+
+def _write_pdf(path: Path, pdf_bytes: bytes) -> None:
+    """Atomically write *pdf_bytes* to *path* and drop renders written before it.
+
+    Renders that finish later are kept, so a concurrent render of another version
+    never loses its file to this one.
+    """
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(pdf_bytes)
+    tmp.replace(path)
+    written = path.stat().st_mtime_ns
+    for old in path.parent.glob("report-*.pdf"):
+        try:
+            if old != path and old.stat().st_mtime_ns < written:
+                old.unlink()
+        except FileNotFoundError:
+            continue
+
+
+async def _render_pdf(html: str, path: Path, browser) -> Path:
+    """Render *html* to *path* unless an earlier run already did, and return *path*.
+
+    Waits for a free Chromium slot before rendering.
+    """
+    if path.exists():
+        return path
+
+    from backend.report.pdf_generator import generate_pdf
+
+    async with _pdf_slots:
+        pdf_bytes = await generate_pdf(html, browser=browser)
+    await asyncio.to_thread(_write_pdf, path, pdf_bytes)
+    return path
+
+
+def _report_etag(html: str) -> tuple[bytes, str]:
+    """Digest of the report HTML and the ETag derived from it.
+
+    The PDF is a pure function of the HTML, so its ETag is known before rendering.
+    """
+    digest = hashlib.blake2b(html.encode(), digest_size=16).digest()
+    return digest, f'"{digest.hex()}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    tags = request.headers.get("if-none-match", "")
+    return any(t.strip().removeprefix("W/") in (etag, "*") for t in tags.split(",") if t)
+
+
+def _queue_pdf_render(request: Request, session_id: str, html: str) -> asyncio.Task:
+    """Render *html* in the background, sharing any render of the same report.
+
+    Renders use the Chromium instance kept on ``app.state`` when startup launched one.
+    """
+    digest, _ = _report_etag(html)
+    key = (session_id, digest)
+    path = session_mgr.session_dir(session_id) / f"report-{digest.hex()}.pdf"
+    if not path.exists():
+        _pdf_cache.pop(key, None)  # superseded by a newer render and deleted
+    browser = getattr(request.app.state, "pdf_browser", None)
+    task = asyncio.ensure_future(
+        coalesced(_pdf_cache, _pdf_inflight, key, _render_pdf, html, path, browser)
+    )
+    # Failures are reported by polling; mark them retrieved so asyncio doesn't log them
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+def _start_pdf_job(request: Request, session_id: str, html: str) -> str:
+    """Queue a render of *html* and register it as a pollable job; return the job id."""
+    _, etag = _report_etag(html)
+    job_id = uuid.uuid4().hex
+    _pdf_jobs[job_id] = {
+        "session_id": session_id,
+        "task": _queue_pdf_render(request, session_id, html),
+        "etag": etag,
+        "created": time.time(),
+    }
+    return job_id
+
+
+def _pdf_response(session_id: str, path: Path, etag: str) -> FileResponse:
+    # Streamed from disk in chunks (or via pathsend where the server supports it)
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"trial-report-{session_id[:8]}.pdf",
+        headers={"ETag": etag, "Cache-Control": "private, max-age=300"},
+    )
+
+
+@router.post("/{session_id}/report.pdf/jobs", status_code=202)
+async def start_report_pdf_job(session_id: str, request: Request):
+    html = session_mgr.get_report(session_id)
+    if html is None:
+        return JSONResponse({"error": "Report not yet generated"}, status_code=404)
+    job_id = _start_pdf_job(request, session_id, html)
+    return {"job_id": job_id, "status": "pending"}
+
+
+@router.get("/{session_id}/report.pdf/jobs/{job_id}")
+async def get_report_pdf_job(session_id: str, job_id: str):
+    """Poll a render job: 202 while pending, the PDF once done, 500 if it failed.
+
+    A job whose PDF was since replaced by a newer render of the report is 404.
+    """
+    job = _pdf_jobs.get(job_id)
+    if job is None or job["session_id"] != session_id:
+        return JSONResponse({"error": "Unknown PDF job"}, status_code=404)
+    task: asyncio.Task = job["task"]
+    if not task.done():
+        return JSONResponse({"job_id": job_id, "status": "pending"}, status_code=202)
+    if task.cancelled() or task.exception() is not None:
+        error = "cancelled" if task.cancelled() else str(task.exception())
+        return JSONResponse({"job_id": job_id, "status": "error", "error": error}, status_code=500)
+    path: Path = task.result()
+    if not path.exists():  # superseded by a newer render of the report
+        return JSONResponse({"error": "PDF no longer available"}, status_code=404)
+    return _pdf_response(session_id, path, job["etag"])
+
+
+@router.get("/{session_id}/report.pdf")
+async def get_report_pdf(session_id: str, request: Request):
+    html = session_mgr.get_report(session_id)
+    if html is None:
+        return JSONResponse({"error": "Report not yet generated"}, status_code=404)
+
+    # An unchanged report needs neither a render nor a transfer
+    _, etag = _report_etag(html)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    from backend.report.pdf_generator import PDFGenerationError
+
+    try:
+        path = await _queue_pdf_render(request, session_id, html)
+        if not path.exists():  # deleted by a concurrent render; render it again
+            path = await _queue_pdf_render(request, session_id, html)
+        return _pdf_response(session_id, path, etag)
+    except PDFGenerationError as exc:
+        logger.warning("PDF generation failed, returning HTML fallback: %s", exc)
+        # Inject the banner right after <body> if present, otherwise prepend.
+        fallback_html, injected = _BODY_RE.subn(rf"\1{_PDF_FALLBACK_BANNER}", html, count=1)
+        if not injected:
+            fallback_html = _PDF_FALLBACK_BANNER + html
+        return HTMLResponse(content=fallback_html)
+
+
+# ---------------------------------------------------------------------------
+# Apple Health Import endpoints
+# ---------------------------------------------------------------------------
+
+def _build_import_summary(hk: HealthKitImport, ecog: int | None) -> dict:
+    """Return a JSON-serialisable summary dict for a HealthKitImport."""
+    return {
+        "status": "ok",
+        "lab_count": len(hk.lab_results),
+        "vital_count": len(hk.vitals),
+        "medication_count": len(hk.medications),
+        "activity_steps_per_day": hk.activity_steps_per_day,
+        "activity_active_minutes_per_day": hk.activity_active_minutes_per_day,
+        "estimated_ecog": ecog,
+        "import_date": hk.import_date,
+        "source_file": hk.source_file,
+        "labs": [{"test_name": l.test_name, "value": l.value, "unit": l.unit} for l in hk.lab_results],
+        "vitals": [{"type": v.type, "value": v.value, "unit": v.unit} for v in hk.vitals],
+        "medications": [{"name": m.name, "dose": m.dose, "frequency": m.frequency} for m in hk.medications],
+    }
+
+
+def _merge_health_kit(session_id: str, hk: HealthKitImport) -> dict:
+    """Merge a HealthKitImport into the session profile and return a summary."""
+    profile = session_mgr.get_profile(session_id)
+    profile.health_kit = hk
+
+    # Auto-populate ECOG from step data if available
+    ecog_estimate: int | None = None
+    if hk.activity_steps_per_day is not None:
+        ecog_estimate = estimate_ecog_from_steps(hk.activity_steps_per_day)
+        profile.demographics.estimated_ecog = ecog_estimate
+
+    session_mgr.save_profile(session_id, profile)
+    return _build_import_summary(hk, ecog_estimate)
+
+
+async def _finish_import(session_id: str, hk: HealthKitImport) -> dict:
+    """Stamp, merge and announce an import; return its summary."""
+    if not hk.import_date:
+        hk.import_date = datetime.now(timezone.utc).isoformat()
+
+    summary = _merge_health_kit(session_id, hk)
+    await notify_session(session_id, {"type": "health_imported", **summary})
+    return summary
+
+
+async def _import_from_zip(session_id: str, zip_source, source_name: str, label: str):
+    """Parse the first XML export inside *zip_source* (path or seekable file) and import it."""
+    with zipfile.ZipFile(zip_source, "r") as zf:
+        xml_name = next((n for n in zf.namelist() if n.endswith(".xml")), None)
+        if xml_name is None:
+            return JSONResponse({"error": f"No XML file found in {label} ZIP"}, status_code=400)
+        with io.BufferedReader(zf.open(xml_name), buffer_size=1 << 20) as xml_stream:
+            hk = parse_apple_health_xml(xml_stream, zip_file=zf)
+    hk.source_file = source_name
+    return await _finish_import(session_id, hk)
+
+
+@router.post("/{session_id}/health-import")
+async def health_import(
+    session_id: str,
+    use_dummy: bool = False,
+    file: UploadFile | None = File(default=None),
+):
+    """Import Apple Health data from a ZIP file upload or the built-in dummy export."""
+    # Validate session exists
+    try:
+        session_mgr.session_dir(session_id)
+    except ValueError:
+        return JSONResponse({"error": f"Session {session_id} not found"}, status_code=404)
+
+    if use_dummy:
+        # Use the bundled dummy HealthKit export
+        dummy_path = _DUMMY_EXPORT
+        if not dummy_path.exists():
+            return JSONResponse(
+                {"error": "Dummy HealthKit export not found at backend/static/dummy_healthkit_export.zip"},
+                status_code=404,
+            )
+        return await _import_from_zip(session_id, dummy_path, dummy_path.name, "dummy")
+
+    # File upload path
+    if file is None:
+        return JSONResponse(
+            {"error": "Provide a file upload or set ?use_dummy=true"},
+            status_code=400,
+        )
+
+    # Starlette spools the upload to a seekable file; open the ZIP from it in place
+    file.file.seek(0)
+    return await _import_from_zip(session_id, file.file, file.filename or "upload.zip", "uploaded")
+
+
+@router.post("/{session_id}/health-import-json")
+async def health_import_json(session_id: str, request: Request):
+    """Import Apple Health data from a JSON payload matching the HealthKitImport schema.
+
+    The body is parsed by pydantic-core in one pass rather than json.loads followed
+    by model validation; payloads can carry thousands of records.
+    """
+    # Validate session exists
+    try:
+        session_mgr.session_dir(session_id)
+    except ValueError:
+        return JSONResponse({"error": f"Session {session_id} not found"}, status_code=404)
+
+    try:
+        hk = HealthKitImport.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in exc.errors()]
+        ) from exc
+    return await _finish_import(session_id, hk)
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import re
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import timedelta
+from decimal import Decimal
 from typing import Any
 
+import orjson
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, field_validator
 
+from backend.cache import coalesced
 from backend.mcp_servers.aact_queries import (
     get_pool,
     get_total_count,
@@ -31,14 +41,11 @@ from backend.mcp_servers.aact_queries import (
     query_related_conditions,
     query_top_drugs,
     query_state_distribution,
-    query_enrollment_targets,
-    query_phase_pipeline,
-    query_lead_sponsors,
-    query_sponsor_collaboration,
-    query_recruitment_summary,
+    query_studies_facets,
+    query_sponsor_facets,
 )
 from backend.mcp_servers.geocoding import reverse_geocode, geocode_location
-from backend.session import SessionManager
+from backend.session import session_mgr
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/stats", tags=["stats"])
@@ -48,8 +55,14 @@ class StatsQuery(BaseModel):
     condition: str = ""
     age: int | None = None
     sex: str = ""
-    statuses: list[str] | None = None
-    states: list[str] | None = None
+    statuses: tuple[str, ...] | None = None
+    states: tuple[str, ...] | None = None
+
+    @field_validator("statuses", "states")
+    @classmethod
+    def _canonical(cls, v: tuple[str, ...] | None) -> tuple[str, ...] | None:
+        """Sort and de-duplicate so equivalent filters share cache keys and SQL."""
+        return tuple(sorted(set(v))) if v else None
 
 
 class GeoReverseQuery(BaseModel):
@@ -83,16 +96,69 @@ class RawQueryRequest(BaseModel):
     sql: str
 
 
+# ---------------------------------------------------------------------------
+# Response micro-cache
+# ---------------------------------------------------------------------------
+
+# Stats panels fire bursts of identical queries while the user edits filters;
+# AACT is refreshed daily, so a minute of staleness is invisible.
+_STATS_CACHE: TTLCache = TTLCache(maxsize=512, ttl=60)
+
+
+def _filter_key(stat_name: str, q: StatsQuery) -> tuple:
+    """Cache key for a filter-driven query (statuses/states are already canonical)."""
+    return (
+        stat_name,
+        q.condition,
+        q.age,
+        q.sex,
+        q.statuses,
+        q.states,
+    )
+
+
+# One in-flight query per key: the frontend opens every panel at once, so
+# identical requests routinely overlap before the first one lands in the cache.
+_INFLIGHT: dict[tuple, asyncio.Task] = {}
+
+
+async def _cached(key: tuple, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """Return the cached result for ``key``, awaiting ``fn(*args)`` once on a miss."""
+    return await coalesced(_STATS_CACHE, _INFLIGHT, key, fn, *args)
+
+
+def _aact_endpoint(fn: Callable | None = None, *, expose_error: bool = False) -> Callable:
+    """Map AACT failures raised by an endpoint to 503 responses.
+
+    RuntimeError means no database URL is configured. Other errors are logged;
+    with ``expose_error`` their text is included in the response detail.
+    HTTPExceptions raised by the endpoint itself pass through.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await fn(*args, **kwargs)
+            except HTTPException:
+                raise
+            except RuntimeError:
+                raise HTTPException(status_code=503, detail="AACT database not configured")
+            except Exception as e:
+                logger.error(f"AACT {kwargs.get('stat_name', fn.__name__)} error: {e}")
+                if expose_error:
+                    raise HTTPException(status_code=503, detail=f"AACT database error: {e}")
+                raise HTTPException(status_code=503, detail="AACT database unavailable")
+
+        return wrapper
+
+    return decorate if fn is None else decorate(fn)
+
+
 @router.get("/total")
+@_aact_endpoint
 async def total_count() -> dict[str, Any]:
-    try:
-        count = await get_total_count()
-        return {"total": count}
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT total count error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+    return {"total": await get_total_count()}
 
 
 @router.post("/geo/reverse")
@@ -114,379 +180,205 @@ async def forward_geocode_endpoint(body: GeoForwardQuery) -> dict:
     return {"latitude": result["latitude"], "longitude": result["longitude"], "display": display}
 
 
-@router.post("/query", response_model=StatsResponse)
-async def query_stats(q: StatsQuery) -> StatsResponse:
-    try:
-        filters = q.model_dump(exclude_none=True)
-        result = await query_faceted_stats(filters)
+async def _faceted_json(filters: dict[str, Any]) -> bytes:
+    result = await query_faceted_stats(filters)
 
-        # Fill in funnel placeholders with matched count
-        for step in result["funnel"]:
-            if step["count"] == -1:
-                step["count"] = result["matched"]
+    # Fill in funnel placeholders with matched count
+    matched = result["matched"]
+    result["funnel"] = [
+        {**step, "count": matched} if step["count"] == -1 else step for step in result["funnel"]
+    ]
 
-        return StatsResponse(**result)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT query error: {e}")
-        raise HTTPException(status_code=503, detail=f"AACT database error: {str(e)}")
+    # Validate and serialize in one pass; the cache then holds ready-to-send bytes
+    return StatsResponse.model_validate(result).model_dump_json().encode()
+
+
+@router.post("/query", response_model=StatsResponse)
+@_aact_endpoint(expose_error=True)
+async def query_stats(q: StatsQuery) -> Response:
+    filters = q.model_dump(exclude_none=True)
+    body = await _cached(_filter_key("query", q), _faceted_json, filters)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/top-conditions")
+@_aact_endpoint
 async def top_conditions(limit: int = 15) -> list[dict]:
-    try:
-        return await get_top_conditions(limit)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT top conditions error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+    return await get_top_conditions(limit)
 
 
-@router.post("/sponsors")
-async def sponsor_distribution(q: StatsQuery) -> list[dict]:
-    """Top 10 sponsors by trial count for current filters."""
-    try:
-        filters = q.model_dump(exclude_none=True)
-        return await query_sponsor_distribution(filters)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT sponsor distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+@router.post("/matched-trials")
+@_aact_endpoint
+async def matched_trials(q: StatsQuery, page: int = 1, per_page: int = 10) -> dict:
+    """Paginated list of trials matching current filters."""
+    filters = q.model_dump(exclude_none=True)
+    key = (*_filter_key("matched-trials", q), page, per_page)
+    return await _cached(key, query_matched_trials, filters, page, per_page)
 
 
-@router.post("/enrollment")
-async def enrollment_distribution(q: StatsQuery) -> list[dict]:
-    """Enrollment size distribution for current filters."""
-    try:
-        filters = q.model_dump(exclude_none=True)
-        return await query_enrollment_distribution(filters)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT enrollment distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+_SELECT_START = re.compile(r"SELECT\b", re.IGNORECASE)
+_FORBIDDEN_KW = re.compile(
+    r"\b(DROP|DELETE|UPDATE|INSERT|ALTER|TRUNCATE|CREATE|GRANT|REVOKE)\b", re.IGNORECASE
+)
 
 
-@router.post("/matched-trials")
-async def matched_trials(q: StatsQuery, page: int = 1, per_page: int = 10) -> dict:
-    """Paginated list of trials matching current filters."""
-    try:
-        filters = q.model_dump(exclude_none=True)
-        return await query_matched_trials(filters, page, per_page)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT matched trials error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+def _json_default(obj: Any) -> Any:
+    """orjson fallback for column types it doesn't encode natively."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    return str(obj)
+
+
+def _encode_rows(rows: list) -> bytes:
+    return b",".join(orjson.dumps(dict(row), default=_json_default) for row in rows)
 
 
 @router.post("/raw-query")
-async def raw_query(body: RawQueryRequest) -> dict:
-    """Execute a read-only SQL query against the AACT database. SELECT only, max 500 rows."""
+async def raw_query(body: RawQueryRequest) -> Response:
+    """Execute a read-only SQL query against the AACT database. SELECT only, max 500 rows.
+
+    The rows are fetched in a read-only transaction and encoded with orjson in one
+    pass; the LIMIT keeps the result small, so the connection goes back to the
+    pool before the response is sent.
+    """
     sql = body.sql.strip()
-    if not sql.upper().startswith("SELECT"):
+    if not _SELECT_START.match(sql):
         raise HTTPException(status_code=400, detail="Only SELECT queries are allowed")
     # Safety: block dangerous keywords
-    upper = sql.upper()
-    for kw in ("DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "TRUNCATE", "CREATE", "GRANT", "REVOKE"):
-        if kw in upper:
-            raise HTTPException(status_code=400, detail=f"Forbidden keyword: {kw}")
+    if m := _FORBIDDEN_KW.search(sql):
+        raise HTTPException(status_code=400, detail=f"Forbidden keyword: {m.group(1).upper()}")
     try:
         pool = await get_pool()
-        rows = await pool.fetch(f"{sql} LIMIT 500")
-        if not rows:
-            return {"columns": [], "rows": []}
-        columns = list(rows[0].keys())
-        data = [dict(row) for row in rows]
-        return {"columns": columns, "rows": data}
     except RuntimeError:
         raise HTTPException(status_code=503, detail="AACT database not configured")
+
+    try:
+        async with pool.acquire() as conn, conn.transaction(readonly=True):
+            rows = await conn.fetch(f"{sql} LIMIT 500")
     except Exception as e:
         logger.error(f"Raw query error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+    if not rows:
+        return JSONResponse({"columns": [], "rows": []})
+    columns = orjson.dumps(list(rows[0].keys()))
+    return Response(
+        content=b'{"columns":' + columns + b',"rows":[' + _encode_rows(rows) + b"]}",
+        media_type="application/json",
+    )
+
 
 # ---------------------------------------------------------------------------
 # Per-session stats endpoints (accept session_id, derive nct_ids)
 # ---------------------------------------------------------------------------
 
-_session_mgr = SessionManager()
-
-
-def _get_nct_ids(session_id: str) -> list[str]:
+def _get_nct_ids(session_id: str) -> tuple[str, ...]:
     """Extract nct_ids from a session's search results."""
     try:
-        trials = _session_mgr.get_search_results(session_id)
+        nct_ids = session_mgr.get_nct_ids(session_id)
     except ValueError:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
-    if not trials:
+    if not nct_ids:
         raise HTTPException(status_code=404, detail="No search results in session")
-    return [t.nct_id for t in trials]
-
-
-@router.get("/study-types")
-async def study_types(session_id: str) -> list[dict]:
-    """Study type distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_study_type_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT study type distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/gender")
-async def gender_distribution(session_id: str) -> list[dict]:
-    """Gender eligibility distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_gender_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT gender distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/age-groups")
-async def age_groups(session_id: str) -> list[dict]:
-    """Age group distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_age_group_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT age group distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/intervention-types")
-async def intervention_types(session_id: str) -> list[dict]:
-    """Intervention type distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_intervention_type_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT intervention type distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/duration")
-async def duration_distribution(session_id: str) -> list[dict]:
-    """Study duration distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_duration_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT duration distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/start-years")
-async def start_years(session_id: str) -> list[dict]:
-    """Start year distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_start_year_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT start year distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/facility-counts")
-async def facility_counts(session_id: str) -> list[dict]:
-    """Facility count distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_facility_count_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT facility count distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/countries")
-async def countries(session_id: str) -> list[dict]:
-    """Country distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_country_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT country distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/completion-rate")
-async def completion_rate(session_id: str) -> list[dict]:
-    """Completion rate (completed vs terminated/withdrawn/suspended) for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_completion_rate(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT completion rate error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/funder-types")
-async def funder_types(session_id: str) -> list[dict]:
-    """Funder type distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_funder_type_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT funder type distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-# ---------------------------------------------------------------------------
-# Group F: Additional per-session stats endpoints
-# ---------------------------------------------------------------------------
-
-
-@router.get("/trial-site-cities")
-async def trial_site_cities(session_id: str) -> list[dict]:
-    """Top US trial site cities for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_trial_site_cities(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT trial site cities error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/trial-freshness")
-async def trial_freshness(session_id: str) -> list[dict]:
-    """Trial freshness (start date recency) for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_trial_freshness(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT trial freshness error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/related-conditions")
-async def related_conditions(session_id: str) -> list[dict]:
-    """Top related conditions for a session's trials."""
+    return nct_ids
+
+
+async def _session_facet(
+    fused: Callable[[Sequence[str]], Awaitable[dict[str, list[dict]]]],
+    facet: str,
+    nct_ids: tuple[str, ...],
+) -> list[dict]:
+    """One facet of a fused per-session query, which runs once per set of trials."""
+    facets = await _cached((fused.__name__, nct_ids), fused, nct_ids)
+    return facets[facet]
+
+
+def _fused_stat(fused: Callable, facet: str) -> Callable[[Sequence[str]], Awaitable[list[dict]]]:
+    return functools.partial(_session_facet, fused, facet)
+
+
+SESSION_STATS: dict[str, Callable[[Sequence[str]], Awaitable[list[dict]]]] = {
+    "study-types": query_study_type_distribution,
+    "gender": query_gender_distribution,
+    "age-groups": query_age_group_distribution,
+    "intervention-types": query_intervention_type_distribution,
+    "duration": query_duration_distribution,
+    "start-years": query_start_year_distribution,
+    "facility-counts": query_facility_count_distribution,
+    "countries": query_country_distribution,
+    "completion-rate": query_completion_rate,
+    "funder-types": query_funder_type_distribution,
+    "trial-site-cities": query_trial_site_cities,
+    "trial-freshness": query_trial_freshness,
+    "related-conditions": query_related_conditions,
+    "top-drugs": query_top_drugs,
+    "state-distribution": query_state_distribution,
+    # These five come from two fused queries, shared through the stats cache
+    "enrollment-targets": _fused_stat(query_studies_facets, "enrollment_targets"),
+    "phase-pipeline": _fused_stat(query_studies_facets, "phase_pipeline"),
+    "lead-sponsors": _fused_stat(query_sponsor_facets, "lead_sponsors"),
+    "sponsor-collaboration": _fused_stat(query_sponsor_facets, "sponsor_collaboration"),
+    "recruitment-summary": _fused_stat(query_studies_facets, "recruitment_summary"),
+}
+
+# Facets over the live filter set (no session required)
+FILTER_STATS: dict[str, Callable[[dict], Awaitable[list[dict]]]] = {
+    "sponsors": query_sponsor_distribution,
+    "enrollment": query_enrollment_distribution,
+}
+
+
+@router.get("/session-bundle")
+async def session_bundle(session_id: str, include: str | None = None) -> dict[str, list[dict]]:
+    """Several per-session distributions in one round trip.
+
+    ``include`` is a comma-separated subset of SESSION_STATS names (default: all).
+    A stat whose query fails is left out rather than failing the whole bundle.
+    """
     nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_related_conditions(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT related conditions error: {e}")
+    wanted = set(include.split(",")) if include else SESSION_STATS.keys()
+    names = [name for name in SESSION_STATS if name in wanted]
+    results = await asyncio.gather(
+        *(_cached((name, nct_ids), SESSION_STATS[name], nct_ids) for name in names),
+        return_exceptions=True,
+    )
+    bundle: dict[str, list[dict]] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.error(f"AACT {name} error: {result}")
+        else:
+            bundle[name] = result
+    if names and not bundle:
+        if any(isinstance(r, RuntimeError) for r in results):
+            raise HTTPException(status_code=503, detail="AACT database not configured")
         raise HTTPException(status_code=503, detail="AACT database unavailable")
+    return bundle
 
 
-@router.get("/top-drugs")
-async def top_drugs(session_id: str) -> list[dict]:
-    """Top drugs/interventions for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_top_drugs(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT top drugs error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
+# Parametric routes are registered last so fixed paths above match first.
 
-@router.get("/state-distribution")
-async def state_distribution(session_id: str) -> list[dict]:
-    """US state distribution for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_state_distribution(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT state distribution error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
 
+@router.get("/{stat_name}", deprecated=True)
+@_aact_endpoint
+async def session_stat(stat_name: str, session_id: str) -> list[dict]:
+    """Distribution named by ``stat_name`` for a session's trials.
 
-@router.get("/enrollment-targets")
-async def enrollment_targets(session_id: str) -> list[dict]:
-    """Enrollment target size distribution for a session's trials."""
+    Superseded by ``/session-bundle``, which fetches many stats per request.
+    """
+    fn = SESSION_STATS.get(stat_name)
+    if fn is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stat: {stat_name}")
     nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_enrollment_targets(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT enrollment targets error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+    return await _cached((stat_name, nct_ids), fn, nct_ids)
 
 
-@router.get("/phase-pipeline")
-async def phase_pipeline(session_id: str) -> list[dict]:
-    """Phase pipeline (trials by clinical phase) for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_phase_pipeline(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT phase pipeline error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/lead-sponsors")
-async def lead_sponsors(session_id: str) -> list[dict]:
-    """Top lead sponsors for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_lead_sponsors(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT lead sponsors error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/sponsor-collaboration")
-async def sponsor_collaboration(session_id: str) -> list[dict]:
-    """Sponsor collaboration level (solo vs multi-sponsor) for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_sponsor_collaboration(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT sponsor collaboration error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
-
-
-@router.get("/recruitment-summary")
-async def recruitment_summary(session_id: str) -> list[dict]:
-    """Recruitment status summary for a session's trials."""
-    nct_ids = _get_nct_ids(session_id)
-    try:
-        return await query_recruitment_summary(nct_ids)
-    except RuntimeError:
-        raise HTTPException(status_code=503, detail="AACT database not configured")
-    except Exception as e:
-        logger.error(f"AACT recruitment summary error: {e}")
-        raise HTTPException(status_code=503, detail="AACT database unavailable")
+@router.post("/{stat_name}")
+@_aact_endpoint
+async def filter_stat(stat_name: str, q: StatsQuery) -> list[dict]:
+    """Distribution named by ``stat_name`` (top sponsors, enrollment size) for current filters."""
+    fn = FILTER_STATS.get(stat_name)
+    if fn is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stat: {stat_name}")
+    return await _cached(_filter_key(stat_name, q), fn, q.model_dump(exclude_none=True))
@@ -0,0 +1,50 @@
+"""In-process result caching shared by API endpoints.
+
+``coalesced`` pairs a cachetools cache with a table of in-flight tasks so that
+concurrent misses for the same key run the underlying coroutine only once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable, Hashable, MutableMapping
+from typing import Any
+
+
+def _settle(
+    cache: MutableMapping, inflight: dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task
+) -> None:
+    """Done-callback: release the in-flight slot and cache a successful result."""
+    inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    try:
+        cache[key] = task.result()
+    except ValueError:
+        pass  # larger than a size-bounded cache can hold; just don't cache it
+
+
+async def coalesced(
+    cache: MutableMapping,
+    inflight: dict[Hashable, asyncio.Task],
+    key: Hashable,
+    fn: Callable[..., Awaitable[Any]],
+    *args: Any,
+) -> Any:
+    """Return ``cache[key]``, awaiting ``fn(*args)`` on a miss.
+
+    Concurrent misses for the same key share a single call. The call runs as
+    its own task, so one waiter's cancellation doesn't abort it for the
+    others. Failures propagate to every waiter and are not cached.
+    """
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn(*args))
+        inflight[key] = task
+        task.add_done_callback(functools.partial(_settle, cache, inflight, key))
+    return await asyncio.shield(task)
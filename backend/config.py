@@ -7,13 +7,27 @@ class Settings(BaseSettings):
     anthropic_api_key: str = ""
     openfda_api_key: str = ""
     aact_database_url: str = ""
+    # AACT allows 10 connections per account; keep max x uvicorn workers under that
+    aact_pool_min: int = 2
+    aact_pool_max: int = 8
+    aact_command_timeout: float = 15
     host: str = "0.0.0.0"
     port: int = 8100
     log_level: str = "info"
     sessions_dir: Path = Path("sessions")
     model: str = "claude-opus-4-6"
+    # Each Chromium render holds ~150MB; cap how many run at once
+    max_concurrent_pdfs: int = 2
+    # Disable when a reverse proxy or CDN serves backend/static/ itself
+    serve_static: bool = True
 
-    model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
+    # Read once at import; frozen so nothing can change configuration mid-run
+    model_config = {
+        "env_file": ".env",
+        "env_file_encoding": "utf-8",
+        "extra": "ignore",
+        "frozen": True,
+    }
 
 
 settings = Settings()
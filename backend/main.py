@@ -1,20 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import tempfile
-from datetime import datetime, timezone
 from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from backend.config import settings
-from backend.models.patient import HealthKitImport
-from backend.session import SessionManager
-from backend.websocket import notify_session
 
 logger = logging.getLogger(__name__)
 
@@ -33,232 +28,34 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Only the verbs and headers the frontend sends; preflights are cached for a day
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
+    # Lets the frontend name PDF downloads the way the server does
+    expose_headers=["Content-Disposition"],
+    max_age=86400,
 )
 
-session_mgr = SessionManager()
-
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "clinical-trial-navigator"}
 
 
-@app.post("/api/sessions")
-async def create_session():
-    session_id = session_mgr.create_session()
-    return {"session_id": session_id}
-
-
-@app.get("/api/sessions/{session_id}/profile")
-async def get_profile(session_id: str):
-    profile = session_mgr.get_profile(session_id)
-    return profile.model_dump()
-
-
-@app.get("/api/sessions/{session_id}/state")
-async def get_state(session_id: str):
-    state = session_mgr.get_state(session_id)
-    return state.model_dump()
-
-
-@app.get("/api/sessions/{session_id}/trials")
-async def get_trials(session_id: str):
-    trials = session_mgr.get_search_results(session_id)
-    return [t.model_dump() for t in trials]
-
-
-@app.get("/api/sessions/{session_id}/matched")
-async def get_matched(session_id: str):
-    matched = session_mgr.get_matched_trials(session_id)
-    return [t.model_dump() for t in matched]
-
-
-@app.get("/api/sessions/{session_id}/report")
-async def get_report(session_id: str):
-    html = session_mgr.get_report(session_id)
-    if html is None:
-        return JSONResponse({"error": "Report not yet generated"}, status_code=404)
-    return HTMLResponse(html)
-
-
-@app.get("/api/sessions/{session_id}/report.pdf")
-async def get_report_pdf(session_id: str):
-    html = session_mgr.get_report(session_id)
-    if html is None:
-        return JSONResponse({"error": "Report not yet generated"}, status_code=404)
-
-    from backend.report.pdf_generator import PDFGenerationError, generate_pdf
-
-    try:
-        pdf_bytes = await generate_pdf(html)
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=trial-report-{session_id[:8]}.pdf"},
-        )
-    except PDFGenerationError as exc:
-        logger.warning("PDF generation failed, returning HTML fallback: %s", exc)
-        banner = (
-            '<div style="background:#fff3cd;color:#856404;padding:12px 16px;'
-            "border:1px solid #ffc107;border-radius:4px;margin-bottom:16px;"
-            'font-family:sans-serif;font-size:14px;">'
-            "<strong>PDF generation unavailable</strong> &mdash; showing HTML version. "
-            "To enable PDF export, run <code>playwright install chromium</code> on the server."
-            "</div>"
-        )
-        # Inject the banner right after <body> if present, otherwise prepend.
-        if "<body" in html.lower():
-            import re
-
-            fallback_html = re.sub(
-                r"(<body[^>]*>)",
-                rf"\1{banner}",
-                html,
-                count=1,
-                flags=re.IGNORECASE,
-            )
-        else:
-            fallback_html = banner + html
-        return HTMLResponse(content=fallback_html)
-
-
-# ---------------------------------------------------------------------------
-# Apple Health Import endpoints
-# ---------------------------------------------------------------------------
-
-def _build_import_summary(hk: HealthKitImport, ecog: int | None) -> dict:
-    """Return a JSON-serialisable summary dict for a HealthKitImport."""
-    return {
-        "status": "ok",
-        "lab_count": len(hk.lab_results),
-        "vital_count": len(hk.vitals),
-        "medication_count": len(hk.medications),
-        "activity_steps_per_day": hk.activity_steps_per_day,
-        "activity_active_minutes_per_day": hk.activity_active_minutes_per_day,
-        "estimated_ecog": ecog,
-        "import_date": hk.import_date,
-        "source_file": hk.source_file,
-        "labs": [{"test_name": l.test_name, "value": l.value, "unit": l.unit} for l in hk.lab_results],
-        "vitals": [{"type": v.type, "value": v.value, "unit": v.unit} for v in hk.vitals],
-        "medications": [{"name": m.name, "dose": m.dose, "frequency": m.frequency} for m in hk.medications],
-    }
-
-
-def _merge_health_kit(session_id: str, hk: HealthKitImport) -> dict:
-    """Merge a HealthKitImport into the session profile and return a summary."""
-    from backend.mcp_servers.apple_health import estimate_ecog_from_steps
-
-    profile = session_mgr.get_profile(session_id)
-    profile.health_kit = hk
-
-    # Auto-populate ECOG from step data if available
-    ecog_estimate: int | None = None
-    if hk.activity_steps_per_day is not None:
-        ecog_estimate = estimate_ecog_from_steps(hk.activity_steps_per_day)
-        profile.demographics.estimated_ecog = ecog_estimate
-
-    session_mgr.save_profile(session_id, profile)
-    return _build_import_summary(hk, ecog_estimate)
-
-
-@app.post("/api/sessions/{session_id}/health-import")
-async def health_import(
-    session_id: str,
-    use_dummy: bool = False,
-    file: UploadFile | None = File(default=None),
-):
-    """Import Apple Health data from a ZIP file upload or the built-in dummy export."""
-    import zipfile
-
-    from backend.mcp_servers.apple_health import parse_apple_health_xml
-
-    # Validate session exists
-    try:
-        session_mgr.session_dir(session_id)
-    except ValueError:
-        return JSONResponse({"error": f"Session {session_id} not found"}, status_code=404)
-
-    if use_dummy:
-        # Use the bundled dummy HealthKit export
-        dummy_path = Path(__file__).parent / "static" / "dummy_healthkit_export.zip"
-        if not dummy_path.exists():
-            return JSONResponse(
-                {"error": "Dummy HealthKit export not found at backend/static/dummy_healthkit_export.zip"},
-                status_code=404,
-            )
-        with zipfile.ZipFile(dummy_path, "r") as zf:
-            # Look for export.xml inside the ZIP
-            xml_names = [n for n in zf.namelist() if n.endswith(".xml")]
-            if not xml_names:
-                return JSONResponse({"error": "No XML file found in dummy ZIP"}, status_code=400)
-            with zf.open(xml_names[0]) as xml_stream:
-                hk = parse_apple_health_xml(xml_stream, zip_file=zf)
-        hk.source_file = "dummy_healthkit_export.zip"
-        if not hk.import_date:
-            hk.import_date = datetime.now(timezone.utc).isoformat()
-
-        summary = _merge_health_kit(session_id, hk)
-        await notify_session(session_id, {"type": "health_imported", **summary})
-        return summary
-
-    # File upload path
-    if file is None:
-        return JSONResponse(
-            {"error": "Provide a file upload or set ?use_dummy=true"},
-            status_code=400,
-        )
-
-    # Save upload to a temp file so the ZIP can be opened by path
-    suffix = Path(file.filename or "upload.zip").suffix or ".zip"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-        contents = await file.read()
-        tmp.write(contents)
-
-    try:
-        with zipfile.ZipFile(tmp_path, "r") as zf:
-            xml_names = [n for n in zf.namelist() if n.endswith(".xml")]
-            if not xml_names:
-                return JSONResponse({"error": "No XML file found in uploaded ZIP"}, status_code=400)
-            with zf.open(xml_names[0]) as xml_stream:
-                hk = parse_apple_health_xml(xml_stream, zip_file=zf)
-        hk.source_file = file.filename or "upload.zip"
-        if not hk.import_date:
-            hk.import_date = datetime.now(timezone.utc).isoformat()
-
-        summary = _merge_health_kit(session_id, hk)
-        await notify_session(session_id, {"type": "health_imported", **summary})
-        return summary
-    finally:
-        tmp_path.unlink(missing_ok=True)
-
-
-@app.post("/api/sessions/{session_id}/health-import-json")
-async def health_import_json(session_id: str, hk: HealthKitImport):
-    """Import Apple Health data from a JSON payload matching the HealthKitImport schema."""
-    # Validate session exists
-    try:
-        session_mgr.session_dir(session_id)
-    except ValueError:
-        return JSONResponse({"error": f"Session {session_id} not found"}, status_code=404)
-
-    if not hk.import_date:
-        hk.import_date = datetime.now(timezone.utc).isoformat()
-
-    summary = _merge_health_kit(session_id, hk)
-    await notify_session(session_id, {"type": "health_imported", **summary})
-    return summary
-
-
 # ---------------------------------------------------------------------------
 # Static files
 # ---------------------------------------------------------------------------
 _static_dir = Path(__file__).parent / "static"
 _static_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=str(_static_dir)), name="static")
+if settings.serve_static:
+    # The directory was just created above, so skip StaticFiles' own existence check
+    app.mount("/static", StaticFiles(directory=_static_dir, check_dir=False), name="static")
+
+
+# Session, report and health-import endpoints
+from backend.api.sessions import router as sessions_router  # noqa: E402
 
+app.include_router(sessions_router)
 
 # Stats API (direct REST, not through Claude)
 from backend.api.stats import router as stats_router  # noqa: E402
@@ -266,7 +63,6 @@ from backend.api.stats import router as stats_router  # noqa: E402
 app.include_router(stats_router)
 
 
-@app.on_event("startup")
 async def startup_aact_pool():
     if settings.aact_database_url:
         try:
@@ -280,12 +76,42 @@ async def startup_aact_pool():
         logger.warning("AACT_DATABASE_URL not set — stats panel will be unavailable")
 
 
-@app.on_event("startup")
+async def startup_warm_prompts():
+    """Load agent prompt files before the first chat turn needs them."""
+    from backend.agents.orchestrator import warmup_prompts
+
+    await warmup_prompts()
+
+
 async def startup_check_playwright():
-    """Check if Playwright browsers are installed and log a warning if not."""
-    from backend.report.pdf_generator import check_playwright_browsers
+    """Check if Playwright browsers are installed and launch one for PDF renders."""
+    from backend.report.pdf_generator import (
+        PDFGenerationError,
+        check_playwright_browsers,
+        launch_browser,
+    )
+
+    app.state.playwright = app.state.pdf_browser = None
+    # The check shells out to the playwright CLI; keep it off the event loop
+    if not await asyncio.to_thread(check_playwright_browsers):
+        return
+    try:
+        app.state.playwright, app.state.pdf_browser = await launch_browser()
+    except PDFGenerationError as exc:
+        logger.warning("Could not keep a Chromium browser open; PDFs will launch one each: %s", exc)
+
 
-    check_playwright_browsers()
+@app.on_event("startup")
+async def startup():
+    """Run the independent startup steps concurrently.
+
+    A failing step is logged and doesn't stop the others or the app from starting.
+    """
+    steps = (startup_aact_pool, startup_warm_prompts, startup_check_playwright)
+    results = await asyncio.gather(*(step() for step in steps), return_exceptions=True)
+    for step, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.error("Startup step %s failed", step.__name__, exc_info=result)
 
 
 @app.on_event("shutdown")
@@ -295,6 +121,15 @@ async def shutdown_aact_pool():
     await close_pool()
 
 
+@app.on_event("shutdown")
+async def shutdown_pdf_browser():
+    if getattr(app.state, "pdf_browser", None) is not None:
+        from backend.report.pdf_generator import close_browser
+
+        await close_browser(app.state.playwright, app.state.pdf_browser)
+        app.state.playwright = app.state.pdf_browser = None
+
+
 # WebSocket endpoint is registered in websocket.py
 from backend.websocket import router as ws_router  # noqa: E402
 
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Sequence
 from typing import Any
 
 import asyncpg
+from cachetools import TTLCache
 
+from backend.cache import coalesced
 from backend.config import settings
 
 logger = logging.getLogger(__name__)
@@ -34,6 +38,20 @@ def _build_condition_clauses(
     return sql, params, start_idx
 
 
+# Leading number of an AACT age string such as "18 Years"; NULL when missing or blank.
+# Each is evaluated once per row, and a NULL bound never excludes a trial.
+_MIN_AGE_YEARS = "CAST(NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') AS INTEGER)"
+_MAX_AGE_YEARS = "CAST(NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') AS INTEGER)"
+
+
+def _age_eligible_sql(idx: int) -> str:
+    """Predicate: the trial's age range (alias ``e``) admits the age bound to ``$idx``."""
+    return (
+        f"(COALESCE({_MIN_AGE_YEARS} <= ${idx}, true)"
+        f" AND COALESCE({_MAX_AGE_YEARS} >= ${idx}, true))"
+    )
+
+
 ACTIVE_STATUSES = [
     "recruiting",
     "not yet recruiting",
@@ -44,18 +62,34 @@ ACTIVE_STATUSES = [
 
 _pool: asyncpg.Pool | None = None
 
+# Aggregates that don't depend on the session's filters (the all-trials total, the
+# all-status breakdown per condition and the top conditions). AACT refreshes its
+# snapshot daily, so a few minutes of staleness is invisible; it saves a full
+# studies scan per request.
+_AGGREGATES: TTLCache = TTLCache(maxsize=256, ttl=600)
+_AGGREGATES_INFLIGHT: dict[tuple, asyncio.Task] = {}
+
 
 async def get_pool() -> asyncpg.Pool:
-    """Lazy-init asyncpg connection pool. Max 5 connections to stay under AACT's 10-per-account limit."""
+    """Lazy-init asyncpg connection pool, sized by the AACT_POOL_* settings.
+
+    The default max of 8 stays under AACT's 10-per-account limit; lower it when
+    running several uvicorn workers. Idle connections are closed after 5 minutes,
+    and each keeps up to 256 prepared statements.
+    """
     global _pool
     if _pool is None:
         if not settings.aact_database_url:
             raise RuntimeError("AACT_DATABASE_URL not configured")
         _pool = await asyncpg.create_pool(
             settings.aact_database_url,
-            min_size=2,
-            max_size=5,
-            command_timeout=15,
+            min_size=settings.aact_pool_min,
+            max_size=settings.aact_pool_max,
+            command_timeout=settings.aact_command_timeout,
+            max_inactive_connection_lifetime=300,
+            # Per-session SQL is constant and the faceted queries only vary with the
+            # filter shape; room for every variant keeps them prepared per connection
+            statement_cache_size=256,
         )
     return _pool
 
@@ -65,25 +99,40 @@ async def close_pool() -> None:
     if _pool is not None:
         await _pool.close()
         _pool = None
+    _AGGREGATES.clear()
 
 
 async def get_total_count() -> int:
-    """Count all trials in the database."""
+    """Count all trials in the database (cached; see ``_AGGREGATES``)."""
+    return await coalesced(_AGGREGATES, _AGGREGATES_INFLIGHT, ("total",), _fetch_total_count)
+
+
+async def _fetch_total_count() -> int:
     pool = await get_pool()
     row = await pool.fetchval("SELECT COUNT(*) FROM ctgov.studies")
     return int(row)
 
 
 async def get_all_status_distribution(condition: str = "") -> dict[str, int]:
-    """Get trial counts for ALL statuses (not just active). Optionally filter by condition."""
+    """Get trial counts for ALL statuses (not just active). Optionally filter by condition.
+
+    Cached per condition; the returned dict is shared, so don't mutate it.
+    """
+    key = ("all_status", condition)
+    return await coalesced(
+        _AGGREGATES, _AGGREGATES_INFLIGHT, key, _fetch_all_status_distribution, condition
+    )
+
+
+async def _fetch_all_status_distribution(condition: str) -> dict[str, int]:
     pool = await get_pool()
     if condition:
         cond_join, cond_params, _ = _build_condition_clauses(condition, "c", 1)
         if cond_join:
-            q = f"""SELECT s.overall_status, COUNT(DISTINCT s.nct_id) as cnt
-                    FROM ctgov.studies s
-                    {cond_join}
-                    GROUP BY s.overall_status ORDER BY cnt DESC"""
+            q = f"""SELECT overall_status, COUNT(*) as cnt
+                    FROM (SELECT DISTINCT s.nct_id, s.overall_status
+                          FROM ctgov.studies s {cond_join}) m
+                    GROUP BY overall_status ORDER BY cnt DESC"""
             rows = await pool.fetch(q, *cond_params)
         else:
             rows = await pool.fetch(
@@ -92,21 +141,29 @@ async def get_all_status_distribution(condition: str = "") -> dict[str, int]:
     else:
         q = "SELECT overall_status, COUNT(*) as cnt FROM ctgov.studies GROUP BY overall_status ORDER BY cnt DESC"
         rows = await pool.fetch(q)
-    return {row["overall_status"]: int(row["cnt"]) for row in rows}
+    return {row["overall_status"]: row["cnt"] for row in rows}
 
 
 async def get_top_conditions(limit: int = 15) -> list[dict[str, Any]]:
-    """Return top conditions by active trial count."""
+    """Return top conditions by active trial count.
+
+    Cached per limit; the returned list is shared, so don't mutate it.
+    """
+    key = ("top_conditions", limit)
+    return await coalesced(_AGGREGATES, _AGGREGATES_INFLIGHT, key, _fetch_top_conditions, limit)
+
+
+async def _fetch_top_conditions(limit: int) -> list[dict[str, Any]]:
     pool = await get_pool()
-    placeholders = ", ".join(f"${i+1}" for i in range(len(ACTIVE_STATUSES)))
-    q = f"""SELECT c.downcase_name AS condition, COUNT(DISTINCT s.nct_id) AS cnt
-            FROM ctgov.studies s
-            INNER JOIN ctgov.conditions c ON c.nct_id = s.nct_id
-            WHERE LOWER(s.overall_status) IN ({placeholders})
-              AND c.downcase_name IS NOT NULL AND c.downcase_name != ''
-            GROUP BY c.downcase_name ORDER BY cnt DESC LIMIT ${len(ACTIVE_STATUSES)+1}"""
-    rows = await pool.fetch(q, *ACTIVE_STATUSES, limit)
-    return [{"condition": row["condition"], "count": int(row["cnt"])} for row in rows]
+    q = """SELECT condition, COUNT(*) AS cnt
+            FROM (SELECT DISTINCT s.nct_id, c.downcase_name AS condition
+                  FROM ctgov.studies s
+                  INNER JOIN ctgov.conditions c ON c.nct_id = s.nct_id
+                  WHERE LOWER(s.overall_status) = ANY($1::text[])
+                    AND c.downcase_name IS NOT NULL AND c.downcase_name != '') m
+            GROUP BY condition ORDER BY cnt DESC LIMIT $2"""
+    rows = await pool.fetch(q, ACTIVE_STATUSES, limit)
+    return [{"condition": row["condition"], "count": row["cnt"]} for row in rows]
 
 
 async def query_faceted_stats(filters: dict[str, Any]) -> dict[str, Any]:
@@ -117,6 +174,7 @@ async def query_faceted_stats(filters: dict[str, Any]) -> dict[str, Any]:
     params: list[Any] = []
     joins: list[str] = []
     idx = 1
+    cond_join = ""
 
     condition = filters.get("condition", "").strip()
     if condition:
@@ -129,10 +187,9 @@ async def query_faceted_stats(filters: dict[str, Any]) -> dict[str, Any]:
     statuses = filters.get("statuses") or ACTIVE_STATUSES
     if statuses:
         lowered = [s.lower() for s in statuses]
-        placeholders = ", ".join(f"${idx + i}" for i in range(len(lowered)))
-        where_clauses.append(f"LOWER(s.overall_status) IN ({placeholders})")
-        params.extend(lowered)
-        idx += len(lowered)
+        where_clauses.append(f"LOWER(s.overall_status) = ANY(${idx}::text[])")
+        params.append(lowered)
+        idx += 1
 
     sex = filters.get("sex", "").strip()
     if sex and sex.lower() not in ("all", ""):
@@ -146,91 +203,87 @@ async def query_faceted_stats(filters: dict[str, Any]) -> dict[str, Any]:
         # Only add eligibilities join if not already added
         if not any("eligibilities" in j for j in joins):
             joins.append(f"INNER JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id")
-        age_val = int(age)
-        where_clauses.append(
-            f"(e.minimum_age IS NULL OR e.minimum_age = '' OR "
-            f"NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') IS NULL OR "
-            f"CAST(NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') AS INTEGER) <= ${idx})"
-        )
-        params.append(age_val)
-        idx += 1
-        where_clauses.append(
-            f"(e.maximum_age IS NULL OR e.maximum_age = '' OR "
-            f"NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') IS NULL OR "
-            f"CAST(NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') AS INTEGER) >= ${idx})"
-        )
-        params.append(age_val)
+        where_clauses.append(_age_eligible_sql(idx))
+        params.append(int(age))
         idx += 1
 
     states = filters.get("states")
     if states:
         joins.append(f"INNER JOIN ctgov.facilities f ON f.nct_id = s.nct_id")
-        placeholders = ", ".join(f"${idx + i}" for i in range(len(states)))
-        where_clauses.append(f"f.state IN ({placeholders})")
-        params.extend(states)
-        idx += len(states)
+        where_clauses.append(f"f.state = ANY(${idx}::text[])")
+        params.append(list(states))
+        idx += 1
 
     where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
     join_sql = " ".join(joins)
 
-    # Get matched count
+    # Shown to the user as "the query behind these numbers"
     count_q = f"SELECT COUNT(DISTINCT s.nct_id) FROM ctgov.studies s {join_sql}{where_sql}"
-    matched = int(await pool.fetchval(count_q, *params))
-
-    # Get total (active trials only)
-    total = await get_total_count()
-
-    # Phase distribution (of matched)
-    phase_q = f"""
-        SELECT s.phase, COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s {join_sql}{where_sql}
-        GROUP BY s.phase ORDER BY cnt DESC
-    """
-    phase_rows = await pool.fetch(phase_q, *params)
-    phase_distribution = {(row["phase"] or "N/A"): int(row["cnt"]) for row in phase_rows}
-
-    # Status distribution (of matched)
-    status_q = f"""
-        SELECT s.overall_status, COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s {join_sql}{where_sql}
-        GROUP BY s.overall_status ORDER BY cnt DESC
-    """
-    status_rows = await pool.fetch(status_q, *params)
-    status_distribution = {row["overall_status"]: int(row["cnt"]) for row in status_rows}
 
-    # Geographic distribution (by country, global)
-    geo_q = f"""
-        SELECT f2.country, COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s
-        {join_sql}
-        {"INNER JOIN" if not any("facilities" in j for j in joins) else "LEFT JOIN"}
-            ctgov.facilities f2 ON f2.nct_id = s.nct_id
-        {where_sql}
-        {"AND" if where_clauses else "WHERE"} f2.country IS NOT NULL
-        GROUP BY f2.country ORDER BY cnt DESC
-    """
-    geo_rows = await pool.fetch(geo_q, *params)
-    geo_distribution = {row["country"]: int(row["cnt"]) for row in geo_rows}
-
-    # US state-level distribution (for map drill-down)
-    state_geo_q = f"""
-        SELECT f2.state, COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s
-        {join_sql}
-        {"INNER JOIN" if not any("facilities" in j for j in joins) else "LEFT JOIN"}
-            ctgov.facilities f2 ON f2.nct_id = s.nct_id
-        {where_sql}
-        {"AND" if where_clauses else "WHERE"} f2.country = 'United States' AND f2.state IS NOT NULL
-        GROUP BY f2.state ORDER BY cnt DESC
+    # The all-status breakdown ignores every filter but the condition. On a cache
+    # miss it rides along in the facet query (the condition params come first, so
+    # they bind the same placeholders) rather than costing its own round trip.
+    all_status_key = ("all_status", condition)
+    all_status = _AGGREGATES.get(all_status_key)
+    all_status_sql = ""
+    if all_status is None:
+        cond_only = (
+            f"SELECT DISTINCT s.nct_id, s.overall_status FROM ctgov.studies s {cond_join}"
+            if cond_join
+            else "SELECT overall_status FROM ctgov.studies"
+        )
+        all_status_sql = f"""
+        UNION ALL
+        SELECT 'all_status', overall_status, COUNT(*) FROM ({cond_only}) cond_only
+            GROUP BY overall_status"""
+
+    # One round trip: resolve the matched set once, then derive the count and all
+    # four distributions from it instead of re-running the join per facet.
+    facets_q = f"""
+        WITH matched AS (
+            SELECT DISTINCT s.nct_id, s.phase, s.overall_status
+            FROM ctgov.studies s {join_sql}{where_sql}
+        ), matched_geo AS (
+            SELECT DISTINCT m.nct_id, f2.country, f2.state
+            FROM matched m
+            INNER JOIN ctgov.facilities f2 ON f2.nct_id = m.nct_id
+            WHERE f2.country IS NOT NULL
+        )
+        SELECT 'matched' AS kind, NULL AS key, COUNT(*) AS cnt FROM matched
+        UNION ALL
+        SELECT 'phase', phase, COUNT(*) FROM matched GROUP BY phase
+        UNION ALL
+        SELECT 'status', overall_status, COUNT(*) FROM matched GROUP BY overall_status
+        UNION ALL
+        -- one row per (trial, state), so a country still needs DISTINCT
+        SELECT 'country', country, COUNT(DISTINCT nct_id) FROM matched_geo GROUP BY country
+        UNION ALL
+        SELECT 'state', state, COUNT(*) FROM matched_geo
+            WHERE country = 'United States' AND state IS NOT NULL GROUP BY state{all_status_sql}
+        ORDER BY cnt DESC
     """
-    state_geo_rows = await pool.fetch(state_geo_q, *params)
-    geo_distribution_states = {row["state"]: int(row["cnt"]) for row in state_geo_rows}
-
-    # Build funnel
-    funnel = await _build_funnel(pool, filters)
-
-    # All-status distribution (includes completed, terminated, etc.)
-    all_status = await get_all_status_distribution(condition)
+    # The facets, the total and the funnel are independent; run them concurrently
+    # on separate pool connections.
+    facet_rows, total, funnel = await asyncio.gather(
+        pool.fetch(facets_q, *params),
+        # Total (all trials)
+        get_total_count(),
+        _build_funnel(pool, filters),
+    )
+
+    facets: dict[str, dict[str | None, int]] = {
+        "matched": {}, "phase": {}, "status": {}, "country": {}, "state": {}, "all_status": {},
+    }
+    for row in facet_rows:
+        facets[row["kind"]][row["key"]] = row["cnt"]
+    matched = facets["matched"].get(None, 0)
+    phase_distribution = {(phase or "N/A"): cnt for phase, cnt in facets["phase"].items()}
+    status_distribution = facets["status"]
+    geo_distribution = facets["country"]
+    geo_distribution_states = facets["state"]
+    if all_status is None:
+        # All-status distribution (includes completed, terminated, etc.)
+        all_status = _AGGREGATES[all_status_key] = facets["all_status"]
 
     return {
         "total": total,
@@ -254,64 +307,49 @@ async def _build_funnel(pool: asyncpg.Pool, filters: dict[str, Any]) -> list[dic
     if not condition:
         return funnel
 
-    # + Condition (per-word match)
-    cond_join_f, cond_params_f, next_idx = _build_condition_clauses(condition, "c", 1)
-    if cond_join_f:
-        row = await pool.fetchval(
-            f"SELECT COUNT(DISTINCT s.nct_id) FROM ctgov.studies s {cond_join_f}",
-            *cond_params_f,
-        )
-    else:
-        row = 0
-    count_condition = int(row)
-    funnel.append({"stage": f"Condition: {condition}", "count": count_condition})
+    # Condition, +status and +age stages in one pass: dedupe the condition matches
+    # once, flag each trial, and count the flags with FILTER.
+    cond_join, params, idx = _build_condition_clauses(condition, "c", 1)
+    params = list(params)
+    in_status = "true"
+    eligibility_join = ""
+    age_ok = "true"
 
     statuses = filters.get("statuses")
     if statuses:
-        lowered_s = [s.lower() for s in statuses]
-        cond_join_s, cond_params_s, s_idx = _build_condition_clauses(condition, "c", 1)
-        placeholders = ", ".join(f"${s_idx + i}" for i in range(len(lowered_s)))
-        row = await pool.fetchval(
-            f"""SELECT COUNT(DISTINCT s.nct_id) FROM ctgov.studies s
-                {cond_join_s}
-                WHERE LOWER(s.overall_status) IN ({placeholders})""",
-            *cond_params_s,
-            *lowered_s,
-        )
-        count_status = int(row)
-        funnel.append({"stage": "+ Recruiting", "count": count_status})
-    else:
-        count_status = count_condition
+        in_status = f"LOWER(s.overall_status) = ANY(${idx}::text[])"
+        params.append([s.lower() for s in statuses])
+        idx += 1
 
     age = filters.get("age")
     if age is not None:
         age_val = int(age)
-        base_join_a, base_params_a, p_idx = _build_condition_clauses(condition, "c", 1)
-        base_params: list[Any] = list(base_params_a)
-        status_where = ""
-        if statuses:
-            lowered_s = [s.lower() for s in statuses]
-            placeholders = ", ".join(f"${p_idx + i}" for i in range(len(lowered_s)))
-            status_where = f" AND LOWER(s.overall_status) IN ({placeholders})"
-            base_params.extend(lowered_s)
-            p_idx += len(statuses)
-        row = await pool.fetchval(
-            f"""SELECT COUNT(DISTINCT s.nct_id) FROM ctgov.studies s
-                {base_join_a}
-                INNER JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id
-                WHERE (e.minimum_age IS NULL OR e.minimum_age = '' OR
-                    NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') IS NULL OR
-                    CAST(NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') AS INTEGER) <= ${p_idx})
-                AND (e.maximum_age IS NULL OR e.maximum_age = '' OR
-                    NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') IS NULL OR
-                    CAST(NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') AS INTEGER) >= ${p_idx+1})
-                {status_where}""",
-            *base_params,
-            age_val,
-            age_val,
-        )
-        count_age = int(row)
-        funnel.append({"stage": f"+ Age: {age_val}", "count": count_age})
+        eligibility_join = "LEFT JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id"
+        age_ok = f"(e.nct_id IS NOT NULL AND {_age_eligible_sql(idx)})"
+        params.append(age_val)
+        idx += 1
+
+    row = await pool.fetchrow(
+        f"""WITH base AS (
+                SELECT DISTINCT s.nct_id, {in_status} AS in_status, {age_ok} AS age_ok
+                FROM ctgov.studies s
+                {cond_join}
+                {eligibility_join}
+            )
+            SELECT COUNT(*) AS c_cond,
+                   COUNT(*) FILTER (WHERE in_status) AS c_status,
+                   COUNT(*) FILTER (WHERE in_status AND age_ok) AS c_age
+            FROM base""",
+        *params,
+    )
+
+    # Condition words too short to match leave no join; report no condition matches
+    count_condition = row["c_cond"] if cond_join else 0
+    funnel.append({"stage": f"Condition: {condition}", "count": count_condition})
+    if statuses:
+        funnel.append({"stage": "+ Recruiting", "count": row["c_status"]})
+    if age is not None:
+        funnel.append({"stage": f"+ Age: {age_val}", "count": row["c_age"]})
 
     sex = filters.get("sex", "").strip()
     if sex and sex.lower() not in ("all", ""):
@@ -344,27 +382,31 @@ async def query_sponsor_distribution(filters: dict[str, Any]) -> list[dict[str,
     statuses = filters.get("statuses") or ACTIVE_STATUSES
     if statuses:
         lowered = [s.lower() for s in statuses]
-        placeholders = ", ".join(f"${idx + i}" for i in range(len(lowered)))
-        where_clauses.append(f"LOWER(s.overall_status) IN ({placeholders})")
-        params.extend(lowered)
-        idx += len(lowered)
+        where_clauses.append(f"LOWER(s.overall_status) = ANY(${idx}::text[])")
+        params.append(lowered)
+        idx += 1
 
     where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
     join_sql = " ".join(joins)
 
+    # Dedupe the matched trials first (condition joins fan out), then join the
+    # single lead sponsor per trial and count plain rows.
     q = f"""
-        SELECT sp.name AS sponsor, COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s
-        {join_sql}
-        INNER JOIN ctgov.sponsors sp ON sp.nct_id = s.nct_id AND sp.lead_or_collaborator = 'lead'
-        {where_sql}
-        {"AND" if where_clauses else "WHERE"} sp.name IS NOT NULL AND sp.name != ''
+        WITH m AS (SELECT DISTINCT s.nct_id FROM ctgov.studies s {join_sql}{where_sql})
+        SELECT sp.name AS sponsor, COUNT(*) as cnt
+        FROM m
+        INNER JOIN ctgov.sponsors sp ON sp.nct_id = m.nct_id AND sp.lead_or_collaborator = 'lead'
+        WHERE sp.name IS NOT NULL AND sp.name != ''
         GROUP BY sp.name
         ORDER BY cnt DESC
         LIMIT 10
     """
     rows = await pool.fetch(q, *params)
-    return [{"sponsor": row["sponsor"], "count": int(row["cnt"])} for row in rows]
+    return [{"sponsor": row["sponsor"], "count": row["cnt"]} for row in rows]
+
+
+# Labels for width_bucket(enrollment, ARRAY[50, 200, 500, 1000]), indexed 0-4
+_ENROLLMENT_BUCKETS = ("<50", "50-200", "200-500", "500-1K", "1K+")
 
 
 async def query_enrollment_distribution(filters: dict[str, Any]) -> list[dict[str, Any]]:
@@ -386,36 +428,28 @@ async def query_enrollment_distribution(filters: dict[str, Any]) -> list[dict[st
     statuses = filters.get("statuses") or ACTIVE_STATUSES
     if statuses:
         lowered = [s.lower() for s in statuses]
-        placeholders = ", ".join(f"${idx + i}" for i in range(len(lowered)))
-        where_clauses.append(f"LOWER(s.overall_status) IN ({placeholders})")
-        params.extend(lowered)
-        idx += len(lowered)
+        where_clauses.append(f"LOWER(s.overall_status) = ANY(${idx}::text[])")
+        params.append(lowered)
+        idx += 1
 
     where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
     join_sql = " ".join(joins)
 
     q = f"""
-        SELECT
-            CASE
-                WHEN s.enrollment < 50 THEN '<50'
-                WHEN s.enrollment < 200 THEN '50-200'
-                WHEN s.enrollment < 500 THEN '200-500'
-                WHEN s.enrollment < 1000 THEN '500-1K'
-                ELSE '1K+'
-            END AS bucket,
-            COUNT(DISTINCT s.nct_id) as cnt
-        FROM ctgov.studies s
-        {join_sql}
-        {where_sql}
-        {"AND" if where_clauses else "WHERE"} s.enrollment IS NOT NULL AND s.enrollment > 0
-        GROUP BY bucket
-        ORDER BY MIN(s.enrollment)
+        WITH m AS (
+            SELECT DISTINCT s.nct_id, s.enrollment
+            FROM ctgov.studies s
+            {join_sql}
+            {where_sql}
+            {"AND" if where_clauses else "WHERE"} s.enrollment IS NOT NULL AND s.enrollment > 0
+        )
+        SELECT width_bucket(enrollment, ARRAY[50, 200, 500, 1000]) AS b, COUNT(*) as cnt
+        FROM m
+        GROUP BY b
+        ORDER BY b
     """
     rows = await pool.fetch(q, *params)
-    # Ensure consistent ordering
-    bucket_order = ["<50", "50-200", "200-500", "500-1K", "1K+"]
-    result_map = {row["bucket"]: int(row["cnt"]) for row in rows}
-    return [{"bucket": b, "count": result_map.get(b, 0)} for b in bucket_order if result_map.get(b, 0) > 0]
+    return [{"bucket": _ENROLLMENT_BUCKETS[row["b"]], "count": row["cnt"]} for row in rows]
 
 
 async def query_matched_trials(filters: dict[str, Any], page: int = 1, per_page: int = 10) -> dict[str, Any]:
@@ -437,32 +471,36 @@ async def query_matched_trials(filters: dict[str, Any], page: int = 1, per_page:
     statuses = filters.get("statuses") or ACTIVE_STATUSES
     if statuses:
         lowered = [s.lower() for s in statuses]
-        placeholders = ", ".join(f"${idx + i}" for i in range(len(lowered)))
-        where_clauses.append(f"LOWER(s.overall_status) IN ({placeholders})")
-        params.extend(lowered)
-        idx += len(lowered)
+        where_clauses.append(f"LOWER(s.overall_status) = ANY(${idx}::text[])")
+        params.append(lowered)
+        idx += 1
 
     where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
     join_sql = " ".join(joins)
 
-    # Get total count
-    count_q = f"SELECT COUNT(DISTINCT s.nct_id) FROM ctgov.studies s {join_sql}{where_sql}"
-    total = int(await pool.fetchval(count_q, *params))
+    # Total count
+    matched_q = f"SELECT DISTINCT s.nct_id FROM ctgov.studies s {join_sql}{where_sql}"
+    count_q = f"SELECT COUNT(*) FROM ({matched_q}) m"
 
-    # Get page of results
+    # Page of results: pick the page's IDs from the deduped set first, so titles
+    # and condition names are only looked up for the rows actually returned.
     offset = (page - 1) * per_page
     q = f"""
-        SELECT DISTINCT s.nct_id, s.brief_title,
-               (SELECT string_agg(DISTINCT con.name, '; ')
-                FROM ctgov.conditions con WHERE con.nct_id = s.nct_id) AS condition_name
-        FROM ctgov.studies s
-        {join_sql}
-        {where_sql}
-        ORDER BY s.nct_id
-        LIMIT ${idx} OFFSET ${idx + 1}
+        WITH page AS ({matched_q} ORDER BY s.nct_id LIMIT ${idx} OFFSET ${idx + 1})
+        SELECT st.nct_id, st.brief_title, names.condition_name
+        FROM page
+        INNER JOIN ctgov.studies st ON st.nct_id = page.nct_id
+        LEFT JOIN LATERAL (
+            SELECT string_agg(DISTINCT con.name, '; ') AS condition_name
+            FROM ctgov.conditions con WHERE con.nct_id = page.nct_id
+        ) names ON true
+        ORDER BY st.nct_id
     """
-    params.extend([per_page, offset])
-    rows = await pool.fetch(q, *params)
+    # Neither depends on the other; run them on separate pool connections
+    total, rows = await asyncio.gather(
+        pool.fetchval(count_q, *params),
+        pool.fetch(q, *params, per_page, offset),
+    )
 
     trials = [
         {
@@ -486,49 +524,69 @@ async def query_matched_trials(filters: dict[str, Any], page: int = 1, per_page:
 # Per-session stats queries (accept nct_ids list)
 # ---------------------------------------------------------------------------
 
-def _nct_placeholders(nct_ids: list[str], start_idx: int = 1) -> tuple[str, int]:
-    """Return ($1, $2, ...) placeholder string and next available param index."""
-    placeholders = ", ".join(f"${start_idx + i}" for i in range(len(nct_ids)))
-    return placeholders, start_idx + len(nct_ids)
 
+def _name_value_rows(rows: list[asyncpg.Record]) -> list[dict[str, Any]]:
+    """Shape ``SELECT <name>, COUNT(*)`` rows for the charts.
+
+    Unpacks each record by position; COUNT(*) already decodes to a Python int.
+    """
+    return [{"name": name, "value": value} for name, value in rows]
+
+
+_STUDY_TYPE_DISTRIBUTION_SQL = """
+    SELECT s.study_type AS name, COUNT(*) AS value
+    FROM ctgov.studies s
+    WHERE s.nct_id = ANY($1::text[])
+      AND s.study_type IS NOT NULL AND s.study_type != ''
+    GROUP BY s.study_type
+    ORDER BY value DESC
+"""
 
-async def query_study_type_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+
+async def query_study_type_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Count trials by study type (Interventional, Observational, etc.)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT s.study_type AS name, COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-          AND s.study_type IS NOT NULL AND s.study_type != ''
-        GROUP BY s.study_type
-        ORDER BY value DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_STUDY_TYPE_DISTRIBUTION_SQL, nct_ids)
+    return _name_value_rows(rows)
+
 
+_GENDER_DISTRIBUTION_SQL = """
+    SELECT COALESCE(e.gender, 'Not specified') AS name, COUNT(*) AS value
+    FROM ctgov.studies s
+    LEFT JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id
+    WHERE s.nct_id = ANY($1::text[])
+    GROUP BY e.gender
+    ORDER BY value DESC
+"""
 
-async def query_gender_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+
+async def query_gender_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Count trials by eligible gender (All, Female, Male)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT COALESCE(e.gender, 'Not specified') AS name, COUNT(DISTINCT s.nct_id) AS value
+    rows = await pool.fetch(_GENDER_DISTRIBUTION_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+_AGE_GROUP_DISTRIBUTION_SQL = f"""
+    SELECT
+        COALESCE(min_age < 18, true) AS includes_pediatric,
+        COALESCE(min_age <= 64, true) AND COALESCE(max_age >= 18, true) AS includes_adult,
+        COALESCE(max_age >= 65, true) AS includes_older_adult
+    FROM (
+        SELECT {_MIN_AGE_YEARS} AS min_age, {_MAX_AGE_YEARS} AS max_age
         FROM ctgov.studies s
-        LEFT JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id
-        WHERE s.nct_id IN ({ph})
-        GROUP BY e.gender
-        ORDER BY value DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+        INNER JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id
+        WHERE s.nct_id = ANY($1::text[])
+          AND e.minimum_age IS NOT NULL AND e.minimum_age != ''
+    ) ages
+"""
 
 
-async def query_age_group_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+async def query_age_group_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Bucket trials by age eligibility into Pediatric (0-17), Adult (18-64), Older Adult (65+).
 
     A trial can appear in multiple buckets if its age range spans groups.
@@ -536,32 +594,7 @@ async def query_age_group_distribution(nct_ids: list[str]) -> list[dict[str, Any
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
-            CASE
-                WHEN NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') IS NULL
-                     OR CAST(NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') AS INTEGER) < 18
-                THEN true ELSE false
-            END AS includes_pediatric,
-            CASE
-                WHEN (NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') IS NULL
-                      OR CAST(NULLIF(REGEXP_REPLACE(e.minimum_age, '[^0-9]', '', 'g'), '') AS INTEGER) <= 64)
-                 AND (NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') IS NULL
-                      OR CAST(NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') AS INTEGER) >= 18)
-                THEN true ELSE false
-            END AS includes_adult,
-            CASE
-                WHEN NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') IS NULL
-                     OR CAST(NULLIF(REGEXP_REPLACE(e.maximum_age, '[^0-9]', '', 'g'), '') AS INTEGER) >= 65
-                THEN true ELSE false
-            END AS includes_older_adult
-        FROM ctgov.studies s
-        INNER JOIN ctgov.eligibilities e ON e.nct_id = s.nct_id
-        WHERE s.nct_id IN ({ph})
-          AND e.minimum_age IS NOT NULL AND e.minimum_age != ''
-    """
-    rows = await pool.fetch(q, *nct_ids)
+    rows = await pool.fetch(_AGE_GROUP_DISTRIBUTION_SQL, nct_ids)
     counts = {"Pediatric (0-17)": 0, "Adult (18-64)": 0, "Older Adult (65+)": 0}
     for row in rows:
         if row["includes_pediatric"]:
@@ -573,164 +606,169 @@ async def query_age_group_distribution(nct_ids: list[str]) -> list[dict[str, Any
     return [{"name": k, "value": v} for k, v in counts.items() if v > 0]
 
 
-async def query_intervention_type_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+_INTERVENTION_TYPE_DISTRIBUTION_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT i.nct_id, i.intervention_type AS name
+        FROM ctgov.interventions i
+        WHERE i.nct_id = ANY($1::text[])
+          AND i.intervention_type IS NOT NULL AND i.intervention_type != ''
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+"""
+
+
+async def query_intervention_type_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Count trials by intervention type (Drug, Biological, Device, Procedure, etc.)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT COALESCE(i.intervention_type, 'Other') AS name,
-               COUNT(DISTINCT s.nct_id) AS value
-        FROM ctgov.studies s
-        INNER JOIN ctgov.interventions i ON i.nct_id = s.nct_id
-        WHERE s.nct_id IN ({ph})
-          AND i.intervention_type IS NOT NULL AND i.intervention_type != ''
-        GROUP BY i.intervention_type
-        ORDER BY value DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
-
-
-async def query_duration_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+    rows = await pool.fetch(_INTERVENTION_TYPE_DISTRIBUTION_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+# Duration in days, bucketed at 1, 2 and 5 years
+_DURATION_BUCKETS = ("< 1 year", "1-2 years", "2-5 years", "5+ years")
+_DURATION_DISTRIBUTION_SQL = """
+    SELECT width_bucket(s.completion_date - s.start_date, ARRAY[365, 730, 1825]) AS b,
+           COUNT(*) AS value
+    FROM ctgov.studies s
+    WHERE s.nct_id = ANY($1::text[])
+      AND s.start_date IS NOT NULL
+      AND s.completion_date IS NOT NULL
+      AND s.completion_date > s.start_date
+    GROUP BY b
+    ORDER BY b
+"""
+
+
+async def query_duration_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Bucket trials by study duration (< 1 year, 1-2 years, 2-5 years, 5+ years)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
-            CASE
-                WHEN (s.completion_date - s.start_date) < 365 THEN '< 1 year'
-                WHEN (s.completion_date - s.start_date) < 730 THEN '1-2 years'
-                WHEN (s.completion_date - s.start_date) < 1825 THEN '2-5 years'
-                ELSE '5+ years'
-            END AS name,
-            COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-          AND s.start_date IS NOT NULL
-          AND s.completion_date IS NOT NULL
-          AND s.completion_date > s.start_date
-        GROUP BY name
-        ORDER BY MIN(s.completion_date - s.start_date)
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_DURATION_DISTRIBUTION_SQL, nct_ids)
+    return [{"name": _DURATION_BUCKETS[row["b"]], "value": row["value"]} for row in rows]
+
+
+# date_part returns a float; EXTRACT returns numeric on Postgres 14+, which is
+# slower to compute and group by
+_START_YEAR_DISTRIBUTION_SQL = """
+    SELECT date_part('year', s.start_date)::INTEGER AS year, COUNT(*) AS value
+    FROM ctgov.studies s
+    WHERE s.nct_id = ANY($1::text[])
+      AND s.start_date IS NOT NULL
+    GROUP BY year
+    ORDER BY year
+"""
 
 
-async def query_start_year_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+async def query_start_year_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Count trials by start date year."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT EXTRACT(YEAR FROM s.start_date)::INTEGER AS year, COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-          AND s.start_date IS NOT NULL
-        GROUP BY year
-        ORDER BY year
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": str(row["year"]), "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_START_YEAR_DISTRIBUTION_SQL, nct_ids)
+    return [{"name": str(row["year"]), "value": row["value"]} for row in rows]
 
 
-async def query_facility_count_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+# Facility counts, bucketed by lower bounds 2, 6, 11 and 51 (zero sites counts as "1")
+_FACILITY_COUNT_BUCKETS = ("1", "2-5", "6-10", "11-50", "50+")
+_FACILITY_COUNT_DISTRIBUTION_SQL = """
+    WITH facility_counts AS (
+        SELECT s.nct_id, COUNT(f.id) AS fcount
+        FROM ctgov.studies s
+        LEFT JOIN ctgov.facilities f ON f.nct_id = s.nct_id
+        WHERE s.nct_id = ANY($1::text[])
+        GROUP BY s.nct_id
+    )
+    SELECT width_bucket(fcount, ARRAY[2, 6, 11, 51]::bigint[]) AS b, COUNT(*) AS value
+    FROM facility_counts
+    GROUP BY b
+    ORDER BY b
+"""
+
+
+async def query_facility_count_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Bucket trials by number of facilities (1, 2-5, 6-10, 11-50, 50+)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        WITH facility_counts AS (
-            SELECT s.nct_id, COUNT(f.id) AS fcount
-            FROM ctgov.studies s
-            LEFT JOIN ctgov.facilities f ON f.nct_id = s.nct_id
-            WHERE s.nct_id IN ({ph})
-            GROUP BY s.nct_id
-        )
-        SELECT
-            CASE
-                WHEN fcount <= 1 THEN '1'
-                WHEN fcount <= 5 THEN '2-5'
-                WHEN fcount <= 10 THEN '6-10'
-                WHEN fcount <= 50 THEN '11-50'
-                ELSE '50+'
-            END AS name,
-            COUNT(*) AS value
-        FROM facility_counts
-        GROUP BY name
-        ORDER BY MIN(fcount)
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_FACILITY_COUNT_DISTRIBUTION_SQL, nct_ids)
+    return [{"name": _FACILITY_COUNT_BUCKETS[row["b"]], "value": row["value"]} for row in rows]
 
 
-async def query_country_distribution(nct_ids: list[str], limit: int = 15) -> list[dict[str, Any]]:
+_COUNTRY_DISTRIBUTION_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT f.nct_id, f.country AS name
+        FROM ctgov.facilities f
+        WHERE f.nct_id = ANY($1::text[])
+          AND f.country IS NOT NULL AND f.country != ''
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+    LIMIT $2
+"""
+
+
+async def query_country_distribution(
+    nct_ids: Sequence[str], limit: int = 15
+) -> list[dict[str, Any]]:
     """Count trials by country (top results)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, next_idx = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT f.country AS name, COUNT(DISTINCT s.nct_id) AS value
-        FROM ctgov.studies s
-        INNER JOIN ctgov.facilities f ON f.nct_id = s.nct_id
-        WHERE s.nct_id IN ({ph})
-          AND f.country IS NOT NULL AND f.country != ''
-        GROUP BY f.country
-        ORDER BY value DESC
-        LIMIT ${next_idx}
-    """
-    rows = await pool.fetch(q, *nct_ids, limit)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
-
-
-async def query_completion_rate(nct_ids: list[str]) -> list[dict[str, Any]]:
+    rows = await pool.fetch(_COUNTRY_DISTRIBUTION_SQL, nct_ids, limit)
+    return _name_value_rows(rows)
+
+
+_COMPLETION_RATE_SQL = """
+    SELECT
+        CASE
+            WHEN LOWER(s.overall_status) = 'completed' THEN 'Completed'
+            WHEN LOWER(s.overall_status) IN ('terminated', 'withdrawn', 'suspended') THEN 'Terminated/Withdrawn/Suspended'
+            ELSE 'Other/Ongoing'
+        END AS name,
+        COUNT(*) AS value
+    FROM ctgov.studies s
+    WHERE s.nct_id = ANY($1::text[])
+    GROUP BY name
+    ORDER BY value DESC
+"""
+
+
+async def query_completion_rate(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Percentage of trials that completed vs terminated/withdrawn/suspended."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
-            CASE
-                WHEN LOWER(s.overall_status) = 'completed' THEN 'Completed'
-                WHEN LOWER(s.overall_status) IN ('terminated', 'withdrawn', 'suspended') THEN 'Terminated/Withdrawn/Suspended'
-                ELSE 'Other/Ongoing'
-            END AS name,
-            COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-        GROUP BY name
-        ORDER BY value DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_COMPLETION_RATE_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+_FUNDER_TYPE_DISTRIBUTION_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT sp.nct_id, sp.agency_class AS name
+        FROM ctgov.sponsors sp
+        WHERE sp.nct_id = ANY($1::text[])
+          AND sp.lead_or_collaborator = 'lead'
+          AND sp.agency_class IS NOT NULL AND sp.agency_class != ''
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+"""
 
 
-async def query_funder_type_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
+async def query_funder_type_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Count trials by funder type (Industry, NIH, Other, Network)."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT COALESCE(sp.agency_class, 'Unknown') AS name,
-               COUNT(DISTINCT s.nct_id) AS value
-        FROM ctgov.studies s
-        INNER JOIN ctgov.sponsors sp ON sp.nct_id = s.nct_id
-            AND sp.lead_or_collaborator = 'lead'
-        WHERE s.nct_id IN ({ph})
-          AND sp.agency_class IS NOT NULL AND sp.agency_class != ''
-        GROUP BY sp.agency_class
-        ORDER BY value DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    rows = await pool.fetch(_FUNDER_TYPE_DISTRIBUTION_SQL, nct_ids)
+    return _name_value_rows(rows)
 
 
 # ---------------------------------------------------------------------------
@@ -738,153 +776,141 @@ async def query_funder_type_distribution(nct_ids: list[str]) -> list[dict[str, A
 # ---------------------------------------------------------------------------
 
 
-async def query_trial_site_cities(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Top 15 US trial site cities by number of trials."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT f.city || ', ' || f.state AS name,
-               COUNT(DISTINCT f.nct_id) AS value
+_TRIAL_SITE_CITIES_SQL = """
+    SELECT city || ', ' || state AS name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT f.nct_id, f.city, f.state
         FROM ctgov.facilities f
-        WHERE f.nct_id IN ({ph})
+        WHERE f.nct_id = ANY($1::text[])
           AND f.country = 'United States'
           AND f.city IS NOT NULL
-        GROUP BY f.city, f.state
-        ORDER BY value DESC
-        LIMIT 15
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    ) t
+    GROUP BY city, state
+    ORDER BY value DESC
+    LIMIT 15
+"""
 
 
-async def query_trial_freshness(nct_ids: list[str]) -> list[dict[str, Any]]:
+async def query_trial_site_cities(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
+    """Top 15 US trial site cities by number of trials."""
+    if not nct_ids:
+        return []
+    pool = await get_pool()
+    rows = await pool.fetch(_TRIAL_SITE_CITIES_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+_TRIAL_FRESHNESS_SQL = """
+    SELECT
+        CASE
+            WHEN s.start_date > NOW() - INTERVAL '6 months' THEN 'Last 6 months'
+            WHEN s.start_date > NOW() - INTERVAL '12 months' THEN '6-12 months'
+            WHEN s.start_date > NOW() - INTERVAL '2 years' THEN '1-2 years'
+            WHEN s.start_date > NOW() - INTERVAL '5 years' THEN '2-5 years'
+            ELSE '5+ years'
+        END AS name,
+        COUNT(*) AS value
+    FROM ctgov.studies s
+    WHERE s.nct_id = ANY($1::text[])
+      AND s.start_date IS NOT NULL
+    GROUP BY name
+    ORDER BY MIN(s.start_date) DESC
+"""
+
+
+async def query_trial_freshness(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
     """Bucket trials by how recently they started."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
-            CASE
-                WHEN s.start_date > NOW() - INTERVAL '6 months' THEN 'Last 6 months'
-                WHEN s.start_date > NOW() - INTERVAL '12 months' THEN '6-12 months'
-                WHEN s.start_date > NOW() - INTERVAL '2 years' THEN '1-2 years'
-                WHEN s.start_date > NOW() - INTERVAL '5 years' THEN '2-5 years'
-                ELSE '5+ years'
-            END AS name,
-            COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-          AND s.start_date IS NOT NULL
-        GROUP BY name
-        ORDER BY MIN(s.start_date) DESC
-    """
-    rows = await pool.fetch(q, *nct_ids)
+    rows = await pool.fetch(_TRIAL_FRESHNESS_SQL, nct_ids)
     # Ensure consistent ordering from newest to oldest
     bucket_order = ["Last 6 months", "6-12 months", "1-2 years", "2-5 years", "5+ years"]
-    result_map = {row["name"]: int(row["value"]) for row in rows}
+    result_map = {row["name"]: row["value"] for row in rows}
     return [{"name": b, "value": result_map[b]} for b in bucket_order if result_map.get(b, 0) > 0]
 
 
-async def query_related_conditions(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Top 15 conditions associated with the matched trials."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT c.name AS name,
-               COUNT(DISTINCT c.nct_id) AS value
+_RELATED_CONDITIONS_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT c.nct_id, c.name
         FROM ctgov.conditions c
-        WHERE c.nct_id IN ({ph})
+        WHERE c.nct_id = ANY($1::text[])
           AND c.name IS NOT NULL
-        GROUP BY c.name
-        ORDER BY value DESC
-        LIMIT 15
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+    LIMIT 15
+"""
 
 
-async def query_top_drugs(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Top 15 drugs/interventions by trial count."""
+async def query_related_conditions(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
+    """Top 15 conditions associated with the matched trials."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT i.name AS name,
-               COUNT(DISTINCT i.nct_id) AS value
+    rows = await pool.fetch(_RELATED_CONDITIONS_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+_TOP_DRUGS_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT i.nct_id, i.name
         FROM ctgov.interventions i
-        WHERE i.nct_id IN ({ph})
+        WHERE i.nct_id = ANY($1::text[])
           AND i.name IS NOT NULL
-        GROUP BY i.name
-        ORDER BY value DESC
-        LIMIT 15
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+    LIMIT 15
+"""
 
 
-async def query_state_distribution(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Top 15 US states by trial count."""
+async def query_top_drugs(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
+    """Top 15 drugs/interventions by trial count."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT f.state AS name,
-               COUNT(DISTINCT f.nct_id) AS value
+    rows = await pool.fetch(_TOP_DRUGS_SQL, nct_ids)
+    return _name_value_rows(rows)
+
+
+_STATE_DISTRIBUTION_SQL = """
+    SELECT name, COUNT(*) AS value
+    FROM (
+        SELECT DISTINCT f.nct_id, f.state AS name
         FROM ctgov.facilities f
-        WHERE f.nct_id IN ({ph})
+        WHERE f.nct_id = ANY($1::text[])
           AND f.country = 'United States'
           AND f.state IS NOT NULL
-        GROUP BY f.state
-        ORDER BY value DESC
-        LIMIT 15
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    ) t
+    GROUP BY name
+    ORDER BY value DESC
+    LIMIT 15
+"""
 
 
-async def query_enrollment_targets(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Bucket trials by enrollment target size."""
+async def query_state_distribution(nct_ids: Sequence[str]) -> list[dict[str, Any]]:
+    """Top 15 US states by trial count."""
     if not nct_ids:
         return []
     pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
-            CASE
-                WHEN s.enrollment < 20 THEN '<20'
-                WHEN s.enrollment < 50 THEN '20-50'
-                WHEN s.enrollment < 100 THEN '50-100'
-                WHEN s.enrollment < 300 THEN '100-300'
-                WHEN s.enrollment < 1000 THEN '300-1K'
-                ELSE '1K+'
-            END AS name,
-            COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-          AND s.enrollment IS NOT NULL AND s.enrollment > 0
-        GROUP BY name
-        ORDER BY MIN(s.enrollment)
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    bucket_order = ["<20", "20-50", "50-100", "100-300", "300-1K", "1K+"]
-    result_map = {row["name"]: int(row["value"]) for row in rows}
-    return [{"name": b, "value": result_map[b]} for b in bucket_order if result_map.get(b, 0) > 0]
+    rows = await pool.fetch(_STATE_DISTRIBUTION_SQL, nct_ids)
+    return _name_value_rows(rows)
 
 
-async def query_phase_pipeline(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Count trials by phase, ordered by clinical progression."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
+# Studies-only session facets (phase pipeline, enrollment targets, recruitment
+# summary) share one scan of the session's studies via GROUPING SETS.
+_PHASE_ORDER = (
+    "Early Phase 1", "Phase 1", "Phase 1/2", "Phase 2", "Phase 2/3", "Phase 3", "Phase 4",
+)
+_PHASE_RANK = {name: rank for rank, name in enumerate(_PHASE_ORDER)}
+# Labels for width_bucket(enrollment, ARRAY[20, 50, 100, 300, 1000]), indexed 0-5
+_ENROLLMENT_TARGET_BUCKETS = ("<20", "20-50", "50-100", "100-300", "300-1K", "1K+")
+
+_STUDIES_FACETS_SQL = """
+    WITH b AS (
         SELECT
             CASE
                 WHEN s.phase = 'Early Phase 1' THEN 'Early Phase 1'
@@ -896,87 +922,10 @@ async def query_phase_pipeline(nct_ids: list[str]) -> list[dict[str, Any]]:
                 WHEN s.phase = 'Phase 4' THEN 'Phase 4'
                 WHEN s.phase IS NULL OR s.phase = 'N/A' OR s.phase = '' THEN 'Not Applicable'
                 ELSE s.phase
-            END AS name,
-            COUNT(*) AS value
-        FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
-        GROUP BY name
-        ORDER BY
-            CASE name
-                WHEN 'Early Phase 1' THEN 1
-                WHEN 'Phase 1' THEN 2
-                WHEN 'Phase 1/2' THEN 3
-                WHEN 'Phase 2' THEN 4
-                WHEN 'Phase 2/3' THEN 5
-                WHEN 'Phase 3' THEN 6
-                WHEN 'Phase 4' THEN 7
-                ELSE 8
-            END
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
-
-
-async def query_lead_sponsors(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Top 10 lead sponsors by trial count."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT sp.name AS name,
-               COUNT(DISTINCT sp.nct_id) AS value
-        FROM ctgov.sponsors sp
-        WHERE sp.nct_id IN ({ph})
-          AND sp.lead_or_collaborator = 'lead'
-          AND sp.name IS NOT NULL
-        GROUP BY sp.name
-        ORDER BY value DESC
-        LIMIT 10
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
-
-
-async def query_sponsor_collaboration(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Bucket trials by number of sponsors (Solo, 2, 3-5, 6+)."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        WITH sponsor_counts AS (
-            SELECT sp.nct_id, COUNT(*) AS scount
-            FROM ctgov.sponsors sp
-            WHERE sp.nct_id IN ({ph})
-            GROUP BY sp.nct_id
-        )
-        SELECT
+            END AS phase,
             CASE
-                WHEN scount = 1 THEN 'Solo'
-                WHEN scount = 2 THEN '2 sponsors'
-                WHEN scount <= 5 THEN '3-5 sponsors'
-                ELSE '6+ sponsors'
-            END AS name,
-            COUNT(*) AS value
-        FROM sponsor_counts
-        GROUP BY name
-        ORDER BY MIN(scount)
-    """
-    rows = await pool.fetch(q, *nct_ids)
-    bucket_order = ["Solo", "2 sponsors", "3-5 sponsors", "6+ sponsors"]
-    result_map = {row["name"]: int(row["value"]) for row in rows}
-    return [{"name": b, "value": result_map[b]} for b in bucket_order if result_map.get(b, 0) > 0]
-
-
-async def query_recruitment_summary(nct_ids: list[str]) -> list[dict[str, Any]]:
-    """Summarise trials into broad recruitment status groups."""
-    if not nct_ids:
-        return []
-    pool = await get_pool()
-    ph, _ = _nct_placeholders(nct_ids)
-    q = f"""
-        SELECT
+                WHEN s.enrollment > 0 THEN width_bucket(s.enrollment, ARRAY[20, 50, 100, 300, 1000])
+            END AS enrollment,
             CASE
                 WHEN UPPER(REPLACE(s.overall_status, ' ', '_'))
                      IN ('RECRUITING', 'NOT_YET_RECRUITING', 'ENROLLING_BY_INVITATION')
@@ -989,12 +938,104 @@ async def query_recruitment_summary(nct_ids: list[str]) -> list[dict[str, Any]]:
                      IN ('TERMINATED', 'WITHDRAWN', 'SUSPENDED')
                     THEN 'Stopped early'
                 ELSE 'Other'
-            END AS name,
-            COUNT(*) AS value
+            END AS recruitment
         FROM ctgov.studies s
-        WHERE s.nct_id IN ({ph})
+        WHERE s.nct_id = ANY($1::text[])
+    )
+    SELECT
+        CASE
+            WHEN GROUPING(phase) = 0 THEN 'phase'
+            WHEN GROUPING(enrollment) = 0 THEN 'enrollment'
+            ELSE 'recruitment'
+        END AS facet,
+        phase, enrollment, recruitment, COUNT(*) AS value
+    FROM b
+    GROUP BY GROUPING SETS ((phase), (enrollment), (recruitment))
+"""
+
+
+async def query_studies_facets(nct_ids: Sequence[str]) -> dict[str, list[dict[str, Any]]]:
+    """Phase pipeline, enrollment targets and recruitment summary in one query.
+
+    Returns ``{"phase_pipeline", "enrollment_targets", "recruitment_summary"}`` lists:
+    phases in clinical-progression order, enrollment buckets smallest first (trials
+    without a target are left out) and recruitment groups by descending count.
+    """
+    phase: list[dict[str, Any]] = []
+    enrollment: dict[int, int] = {}
+    recruitment: list[dict[str, Any]] = []
+    if nct_ids:
+        pool = await get_pool()
+        for row in await pool.fetch(_STUDIES_FACETS_SQL, nct_ids):
+            if row["facet"] == "phase":
+                phase.append({"name": row["phase"], "value": row["value"]})
+            elif row["facet"] == "enrollment":
+                if row["enrollment"] is not None:
+                    enrollment[row["enrollment"]] = row["value"]
+            else:
+                recruitment.append({"name": row["recruitment"], "value": row["value"]})
+    phase.sort(key=lambda r: _PHASE_RANK.get(r["name"], len(_PHASE_ORDER)))
+    recruitment.sort(key=lambda r: r["value"], reverse=True)
+    return {
+        "phase_pipeline": phase,
+        "enrollment_targets": [
+            {"name": _ENROLLMENT_TARGET_BUCKETS[b], "value": enrollment[b]}
+            for b in sorted(enrollment)
+        ],
+        "recruitment_summary": recruitment,
+    }
+
+
+# Lead sponsors and sponsor-count buckets read the same sponsors rows; the CTE is
+# referenced twice, so Postgres materializes it and probes sponsors once.
+# Labels for width_bucket(sponsor count, ARRAY[2, 3, 6]), indexed 0-3
+_SPONSOR_COUNT_BUCKETS = ("Solo", "2 sponsors", "3-5 sponsors", "6+ sponsors")
+
+_SPONSOR_FACETS_SQL = """
+    WITH sp AS (
+        SELECT sp.nct_id, sp.name, sp.lead_or_collaborator
+        FROM ctgov.sponsors sp
+        WHERE sp.nct_id = ANY($1::text[])
+    )
+    (
+        SELECT 'lead' AS facet, name, NULL::integer AS bucket, COUNT(*) AS value
+        FROM (
+            SELECT DISTINCT nct_id, name FROM sp
+            WHERE lead_or_collaborator = 'lead' AND name IS NOT NULL
+        ) t
         GROUP BY name
         ORDER BY value DESC
+        LIMIT 10
+    )
+    UNION ALL
+    (
+        SELECT 'collaboration', NULL, width_bucket(scount, ARRAY[2, 3, 6]::bigint[]) AS bucket,
+               COUNT(*)
+        FROM (SELECT nct_id, COUNT(*) AS scount FROM sp GROUP BY nct_id) c
+        GROUP BY bucket
+    )
+"""
+
+
+async def query_sponsor_facets(nct_ids: Sequence[str]) -> dict[str, list[dict[str, Any]]]:
+    """Top 10 lead sponsors and trials bucketed by sponsor count, in one query.
+
+    Returns ``{"lead_sponsors", "sponsor_collaboration"}`` lists: sponsors by
+    descending trial count, buckets from Solo to 6+.
     """
-    rows = await pool.fetch(q, *nct_ids)
-    return [{"name": row["name"], "value": int(row["value"])} for row in rows]
+    lead: list[dict[str, Any]] = []
+    buckets: dict[int, int] = {}
+    if nct_ids:
+        pool = await get_pool()
+        for row in await pool.fetch(_SPONSOR_FACETS_SQL, nct_ids):
+            if row["facet"] == "lead":
+                lead.append({"name": row["name"], "value": row["value"]})
+            else:
+                buckets[row["bucket"]] = row["value"]
+    lead.sort(key=lambda r: r["value"], reverse=True)
+    return {
+        "lead_sponsors": lead,
+        "sponsor_collaboration": [
+            {"name": _SPONSOR_COUNT_BUCKETS[b], "value": buckets[b]} for b in sorted(buckets)
+        ],
+    }
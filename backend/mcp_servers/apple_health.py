@@ -1,9 +1,9 @@
 """Apple Health XML export parser.
 
 Parses Apple Health ``export.xml`` files (optionally inside a ZIP) and
-returns a populated :class:`HealthKitImport` model.  Uses
-``xml.etree.ElementTree.iterparse`` for memory efficiency — export files
-can easily exceed 1 GB.
+returns a populated :class:`HealthKitImport` model.  Streams the XML with
+``lxml.etree.iterparse`` (falling back to ``xml.etree.ElementTree`` when lxml
+is not installed) for memory efficiency — export files can easily exceed 1 GB.
 
 Only records from the last 90 days are considered.  Step-count and
 exercise-time records are aggregated into per-day totals and then
@@ -16,6 +16,7 @@ resolves relative to the ZIP archive when one is provided.
 
 from __future__ import annotations
 
+import io
 import json
 import logging
 import zipfile
@@ -23,9 +24,14 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 from io import BytesIO
 from pathlib import Path
-from typing import IO, BinaryIO
+from typing import IO, Any, BinaryIO, Iterator
 from xml.etree.ElementTree import iterparse
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - lxml is a declared dependency
+    lxml_etree = None
+
 from backend.models.patient import (
     HealthKitImport,
     LabResult,
@@ -38,6 +44,12 @@ logger = logging.getLogger(__name__)
 # ── Apple Health date format ──────────────────────────────────────────
 _HK_DATE_FMT = "%Y-%m-%d %H:%M:%S %z"
 
+# Read exports in 1 MiB blocks; they are often 1-2 GB uncompressed
+_READ_BUFFER = 1 << 20
+
+# The only elements the parser reads; Workout, ActivitySummary etc. are skipped
+_RECORD_TAGS = ("Record", "ClinicalRecord")
+
 # ── HKQuantityType identifiers we care about ─────────────────────────
 _STEP_COUNT = "HKQuantityTypeIdentifierStepCount"
 _EXERCISE_TIME = "HKQuantityTypeIdentifierAppleExerciseTime"
@@ -134,7 +146,7 @@ def parse_apple_health_xml(
     # Determine how to open the stream
     if isinstance(xml_path_or_stream, (str, Path)):
         source_name = str(xml_path_or_stream)
-        stream: IO[bytes] = open(xml_path_or_stream, "rb")
+        stream: IO[bytes] = open(xml_path_or_stream, "rb", buffering=_READ_BUFFER)
         should_close = True
     else:
         source_name = getattr(xml_path_or_stream, "name", "stream")
@@ -142,31 +154,25 @@ def parse_apple_health_xml(
         should_close = False
 
     try:
-        for event, elem in iterparse(stream, events=("end",)):
-            tag = elem.tag
-
+        for elem in _iter_records(stream):
             # ── <Record> elements ────────────────────────────────
-            if tag == "Record":
+            if elem.tag == "Record":
                 rec_type = elem.get("type", "")
                 if rec_type not in _ALL_QUANTITY_TYPES:
-                    elem.clear()
                     continue
 
                 start_date_str = elem.get("startDate", "")
                 try:
                     rec_dt = datetime.strptime(start_date_str, _HK_DATE_FMT)
                 except (ValueError, TypeError):
-                    elem.clear()
                     continue
 
                 if rec_dt < cutoff_90d:
-                    elem.clear()
                     continue
 
                 try:
                     value = float(elem.get("value", ""))
                 except (ValueError, TypeError):
-                    elem.clear()
                     continue
 
                 unit = elem.get("unit", "")
@@ -187,23 +193,18 @@ def parse_apple_health_xml(
                     if prev is None or rec_dt > prev[0]:
                         vitals_latest[rec_type] = (rec_dt, vital)
 
-                elem.clear()
-
             # ── <ClinicalRecord> elements ────────────────────────
-            elif tag == "ClinicalRecord":
+            else:
                 rec_type = elem.get("type", "")
                 if rec_type not in _CLINICAL_TYPES:
-                    elem.clear()
                     continue
 
                 resource_path = elem.get("resourceFilePath", "")
                 if not resource_path or zip_file is None:
-                    elem.clear()
                     continue
 
                 fhir_json = _load_fhir_json(zip_file, resource_path)
                 if fhir_json is None:
-                    elem.clear()
                     continue
 
                 if rec_type == _LAB_RESULT_TYPE:
@@ -214,13 +215,6 @@ def parse_apple_health_xml(
                     med = _parse_fhir_medication(fhir_json)
                     if med is not None:
                         medications.append(med)
-
-                elem.clear()
-
-            else:
-                # For other elements just keep going; clear large sub-trees
-                # only if they are not ancestors of something we need.
-                pass
     finally:
         if should_close:
             stream.close()
@@ -240,6 +234,36 @@ def parse_apple_health_xml(
     )
 
 
+def _iter_records(stream: IO[bytes]) -> Iterator[Any]:
+    """Yield each ``<Record>`` / ``<ClinicalRecord>`` element, freeing it once consumed.
+
+    lxml matches the two tags in C, so the thousands of other elements in an
+    export never reach Python; the stdlib parser reports every element and is
+    filtered here.
+    """
+    if lxml_etree is not None:
+        context = lxml_etree.iterparse(
+            stream, events=("end",), tag=_RECORD_TAGS, resolve_entities=False
+        )
+        for _, elem in context:
+            yield elem
+            # Free the record and every finished sibling before it (including
+            # skipped elements such as Workout), so the tree stays flat.
+            elem.clear(keep_tail=True)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return
+
+    # The start event hands us the root so finished records can be detached
+    # from it; clearing an element alone leaves an empty shell per record.
+    context = iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag in _RECORD_TAGS:
+            yield elem
+            root.clear()
+
+
 def parse_apple_health_zip(zip_path_or_stream: str | Path | BinaryIO) -> HealthKitImport:
     """Convenience wrapper that opens a ``.zip`` Apple Health export.
 
@@ -260,7 +284,7 @@ def parse_apple_health_zip(zip_path_or_stream: str | Path | BinaryIO) -> HealthK
         if xml_name is None:
             raise FileNotFoundError("No export.xml found inside the ZIP archive")
 
-        with zf.open(xml_name) as xml_stream:
+        with io.BufferedReader(zf.open(xml_name), buffer_size=_READ_BUFFER) as xml_stream:
             result = parse_apple_health_xml(xml_stream, zip_file=zf)
             result.source_file = str(zip_path_or_stream) if isinstance(zip_path_or_stream, (str, Path)) else "upload.zip"
             return result
@@ -64,15 +64,74 @@ def check_playwright_browsers() -> bool:
         return False
 
 
-async def generate_pdf(html: str) -> bytes:
+async def launch_browser():
+    """Start Playwright and launch a Chromium instance that outlives one render.
+
+    Returns ``(playwright, browser)``. Pass the browser to :func:`generate_pdf`
+    and hand both to :func:`close_browser` on shutdown.
+
+    Raises :class:`PDFGenerationError` if Playwright or Chromium is missing.
+    """
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError as exc:
+        raise PDFGenerationError("Playwright is not installed.") from exc
+
+    pw = await async_playwright().start()
+    try:
+        browser = await pw.chromium.launch(headless=True, args=["--no-sandbox"])
+    except Exception as exc:
+        await pw.stop()
+        raise PDFGenerationError(f"Failed to launch Chromium browser: {exc}") from exc
+    return pw, browser
+
+
+async def close_browser(pw, browser) -> None:
+    """Close a browser started by :func:`launch_browser`."""
+    try:
+        await browser.close()
+    finally:
+        await pw.stop()
+
+
+async def _print_page(page, html: str) -> bytes:
+    await page.set_content(html, wait_until="networkidle")
+    # Allow extra time for static map images to load
+    await page.wait_for_timeout(3000)
+    return await page.pdf(
+        format="A4",
+        margin={
+            "top": "1cm",
+            "bottom": "1cm",
+            "left": "1.5cm",
+            "right": "1.5cm",
+        },
+        print_background=True,
+    )
+
+
+async def generate_pdf(html: str, browser=None) -> bytes:
     """Render *html* to PDF via headless Chromium and return the raw bytes.
 
-    The browser is launched, used once, and then closed so we don't leak
-    resources.
+    With a connected *browser* (see :func:`launch_browser`) the page is
+    rendered in a fresh context of it. Otherwise a browser is launched, used
+    once, and then closed so we don't leak resources.
 
     Raises :class:`PDFGenerationError` if the browser cannot be launched
     (e.g. Playwright browsers are not installed).
     """
+    if browser is not None and browser.is_connected():
+        try:
+            context = await browser.new_context()
+            try:
+                return await _print_page(await context.new_page(), html)
+            finally:
+                await context.close()
+        except Exception as exc:
+            raise PDFGenerationError(
+                f"Unexpected error during PDF generation: {exc}"
+            ) from exc
+
     try:
         from playwright.async_api import async_playwright
     except ImportError as exc:
@@ -96,20 +155,7 @@ async def generate_pdf(html: str) -> bytes:
 
             try:
                 page = await browser.new_page()
-                await page.set_content(html, wait_until="networkidle")
-                # Allow extra time for static map images to load
-                await page.wait_for_timeout(3000)
-                pdf_bytes = await page.pdf(
-                    format="A4",
-                    margin={
-                        "top": "1cm",
-                        "bottom": "1cm",
-                        "left": "1.5cm",
-                        "right": "1.5cm",
-                    },
-                    print_background=True,
-                )
-                return pdf_bytes
+                return await _print_page(page, html)
             finally:
                 await browser.close()
     except PDFGenerationError:
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import itertools
 import json
 import secrets
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
+from cachetools import LRUCache, TTLCache
+
 from backend.config import settings
 from backend.models.patient import PatientProfile
 from backend.models.session import SessionState
@@ -17,6 +22,13 @@ class SessionManager:
     def __init__(self, base_dir: Path | None = None):
         self.base_dir = base_dir or settings.sessions_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        # nct_ids per session, read on every stats request; refreshed by save_search_results
+        self._nct_ids: TTLCache = TTLCache(maxsize=2048, ttl=30)
+        # (version, profile) by session, written through by save_profile; read on most
+        # requests. Versions come from one counter, so a profile evicted and loaded
+        # again never reuses a version callers may have cached a render under.
+        self._profiles: LRUCache = LRUCache(maxsize=1024)
+        self._profile_versions = itertools.count(1)
 
     def _generate_short_id(self, length: int = 6) -> str:
         while True:
@@ -53,14 +65,33 @@ class SessionManager:
         path = self.session_dir(session_id) / "state.json"
         self._write_json(path, state.model_dump())
 
+    @contextmanager
+    def mutate_state(self, session_id: str) -> Iterator[SessionState]:
+        """Load session state for a read-modify-write; saved when the block exits cleanly."""
+        state = self.get_state(session_id)
+        yield state
+        self.save_state(session_id, state)
+
+    def _cached_profile(self, session_id: str) -> tuple[int, PatientProfile]:
+        entry = self._profiles.get(session_id)
+        if entry is None:
+            path = self.session_dir(session_id) / "patient_profile.json"
+            profile = PatientProfile(**json.loads(path.read_text()))
+            entry = self._profiles[session_id] = (next(self._profile_versions), profile)
+        return entry
+
     def get_profile(self, session_id: str) -> PatientProfile:
-        path = self.session_dir(session_id) / "patient_profile.json"
-        data = json.loads(path.read_text())
-        return PatientProfile(**data)
+        """Return the session's profile; callers get their own copy to mutate and save."""
+        return self._cached_profile(session_id)[1].model_copy(deep=True)
 
     def save_profile(self, session_id: str, profile: PatientProfile) -> None:
         path = self.session_dir(session_id) / "patient_profile.json"
         self._write_json(path, profile.model_dump())
+        self._profiles[session_id] = (next(self._profile_versions), profile.model_copy(deep=True))
+
+    def profile_version(self, session_id: str) -> int:
+        """Version that changes whenever the session's profile is saved through this manager."""
+        return self._cached_profile(session_id)[0]
 
     def get_search_results(self, session_id: str) -> list[TrialSummary]:
         path = self.session_dir(session_id) / "search_results.json"
@@ -72,6 +103,21 @@ class SessionManager:
     def save_search_results(self, session_id: str, trials: list[TrialSummary]) -> None:
         path = self.session_dir(session_id) / "search_results.json"
         self._write_json(path, [t.model_dump() for t in trials])
+        self._nct_ids[session_id] = tuple(t.nct_id for t in trials)
+
+    def get_nct_ids(self, session_id: str) -> tuple[str, ...]:
+        """NCT IDs of the session's search results, without re-reading them from disk.
+
+        The tuple is shared between callers and doubles as a hashable cache key.
+        """
+        try:
+            return self._nct_ids[session_id]
+        except KeyError:
+            pass
+        nct_ids = tuple(t.nct_id for t in self.get_search_results(session_id))
+        if nct_ids:
+            self._nct_ids[session_id] = nct_ids
+        return nct_ids
 
     def get_matched_trials(self, session_id: str) -> list[MatchedTrial]:
         path = self.session_dir(session_id) / "matched_trials.json"
@@ -96,3 +142,7 @@ class SessionManager:
 
     def _write_json(self, path: Path, data: dict | list) -> None:
         path.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+
+
+# Shared instance so the stats cache sees writes made by the orchestrator.
+session_mgr = SessionManager()
@@ -0,0 +1,48 @@
+-- Indexes for a self-hosted AACT mirror (restored from the AACT pg_dump snapshot).
+--
+-- The public AACT server is shared and read-only, so these cannot be created
+-- there. Apply once after each restore:
+--
+--   psql "$AACT_DATABASE_URL" -f backend/sql/aact_indexes.sql
+--
+-- Every statement is idempotent. VACUUM can't run inside a transaction, so
+-- don't wrap the file in one (psql -1).
+
+-- Condition matching: _build_condition_clauses emits one unanchored
+-- `downcase_name ILIKE '%word%'` per search word (words shorter than 3 chars are
+-- dropped, matching the trigram minimum). A B-tree can't serve those; a trigram
+-- GIN index turns each into a bitmap index scan instead of a conditions seq scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS conditions_downcase_trgm
+    ON ctgov.conditions USING gin (downcase_name gin_trgm_ops);
+
+-- Status filtering: every faceted query filters `LOWER(s.overall_status) = ANY(...)`.
+-- An expression index on exactly that expression makes the predicate sargable
+-- without changing the SQL (a generated lowercase column would need a schema
+-- change on every restore).
+CREATE INDEX IF NOT EXISTS studies_status_lower_idx
+    ON ctgov.studies (lower(overall_status));
+
+-- Active trials: the default status filter (ACTIVE_STATUSES in aact_queries.py)
+-- selects a small slice of studies. This partial index covers the columns the
+-- distributions read, so the active set is served by an index-only scan. Keep
+-- the list in sync with ACTIVE_STATUSES; Postgres only uses it when the bound
+-- status array is a subset of it.
+CREATE INDEX IF NOT EXISTS studies_active_nct_idx
+    ON ctgov.studies (nct_id)
+    INCLUDE (phase, overall_status, enrollment, study_type, start_date, completion_date)
+    WHERE lower(overall_status) IN (
+        'recruiting', 'not yet recruiting', 'active, not recruiting',
+        'enrolling by invitation', 'available'
+    );
+
+-- Geography: the facet and per-session country/state counts only read these
+-- columns, so the facilities join becomes an index-only scan.
+CREATE INDEX IF NOT EXISTS facilities_nct_geo_idx
+    ON ctgov.facilities (nct_id) INCLUDE (country, state);
+
+-- VACUUM sets the visibility map, so the index-only scans skip heap fetches.
+VACUUM ANALYZE ctgov.conditions;
+VACUUM ANALYZE ctgov.studies;
+VACUUM ANALYZE ctgov.facilities;
@@ -8,7 +8,7 @@ import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from backend.agents.orchestrator import AgentOrchestrator
-from backend.session import SessionManager
+from backend.session import SessionManager, session_mgr
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -40,7 +40,6 @@ def _get_orchestrator(session_id: str, session_mgr: SessionManager) -> AgentOrch
 @router.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await websocket.accept()
-    session_mgr = SessionManager()
 
     # Validate session exists
     try:
@@ -97,9 +96,8 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             elif msg_type == "trial_selection":
                 # User selected trials for deep analysis
                 selected_ids = data.get("trialIds", [])
-                state = session_mgr.get_state(session_id)
-                state.selected_trial_ids = selected_ids
-                session_mgr.save_state(session_id, state)
+                with session_mgr.mutate_state(session_id) as state:
+                    state.selected_trial_ids = selected_ids
                 user_content = f"I've selected these trials for detailed analysis: {', '.join(selected_ids)}"
             elif msg_type == "config_update":
                 # Per-session model/compaction configuration
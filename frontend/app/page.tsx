@@ -9,6 +9,7 @@ import { BarChart3, FileText } from "lucide-react";
 import { FacetedFilters, ActiveFilter, StatsData } from "@/lib/types";
 import { fetchStats, reverseGeocode, forwardGeocode, fetchTopConditions, ConditionCount } from "@/lib/statsApi";
 import { requestGeolocation, UserLocation } from "@/lib/geolocation";
+import { downloadReportPdf } from "@/lib/reportPdf";
 
 interface DetectedLocation {
   display: string;
@@ -394,7 +395,7 @@ export default function Home() {
             <div className="flex gap-2 mt-1">
               <a href={reportUrls.html} target="_blank" rel="noopener noreferrer" className="text-xs text-blue-600 hover:underline">View Report</a>
               {reportUrls.pdf && (
-                <a href={reportUrls.pdf} target="_blank" rel="noopener noreferrer" className="text-xs text-blue-600 hover:underline">Download PDF</a>
+                <a href={reportUrls.pdf} onClick={(e) => downloadReportPdf(e, reportUrls.pdf)} target="_blank" rel="noopener noreferrer" className="text-xs text-blue-600 hover:underline">Download PDF</a>
               )}
             </div>
           </div>
@@ -1,6 +1,7 @@
 "use client";
 
 import { ChatMessage } from "@/lib/types";
+import { downloadReportPdf } from "@/lib/reportPdf";
 import { IntakeWidget } from "./IntakeWidget";
 import { TrialCard } from "./TrialCard";
 import { TrialCarousel } from "./TrialCarousel";
@@ -192,6 +193,7 @@ export function MessageBubble({ message, onWidgetSubmit, onTrialSelection, known
             {pdfUrl && (
               <a
                 href={pdfUrl}
+                onClick={(e) => downloadReportPdf(e, pdfUrl)}
                 target="_blank"
                 rel="noopener noreferrer"
                 className="text-blue-600 hover:underline text-sm ml-3"
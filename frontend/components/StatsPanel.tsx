@@ -5,15 +5,7 @@ import { ActiveFilter, FacetedFilters, StatsData, SponsorCount, EnrollmentBucket
 import {
   fetchSponsorDistribution,
   fetchEnrollmentDistribution,
-  fetchStudyTypes,
-  fetchGender,
-  fetchAgeGroups,
-  fetchInterventionTypes,
-  fetchDuration,
-  fetchStartYears,
-  fetchFacilityCounts,
-  fetchCompletionRate,
-  fetchFunderTypes,
+  fetchSessionStats,
   NameValue,
 } from "@/lib/statsApi";
 import { PhaseDonut } from "./charts/PhaseDonut";
@@ -104,41 +96,27 @@ export function StatsPanel({ stats, activeFilters, loading, error, userLocation,
     if (!sessionId) return;
     let ignore = false;
 
-    fetchStudyTypes(sessionId)
-      .then((data) => { if (!ignore) setStudyTypes(data); })
-      .catch(() => { if (!ignore) setStudyTypes([]); });
-
-    fetchGender(sessionId)
-      .then((data) => { if (!ignore) setGender(data); })
-      .catch(() => { if (!ignore) setGender([]); });
-
-    fetchAgeGroups(sessionId)
-      .then((data) => { if (!ignore) setAgeGroups(data); })
-      .catch(() => { if (!ignore) setAgeGroups([]); });
-
-    fetchInterventionTypes(sessionId)
-      .then((data) => { if (!ignore) setInterventionTypes(data); })
-      .catch(() => { if (!ignore) setInterventionTypes([]); });
-
-    fetchDuration(sessionId)
-      .then((data) => { if (!ignore) setDuration(data); })
-      .catch(() => { if (!ignore) setDuration([]); });
-
-    fetchStartYears(sessionId)
-      .then((data) => { if (!ignore) setStartYears(data); })
-      .catch(() => { if (!ignore) setStartYears([]); });
-
-    fetchFacilityCounts(sessionId)
-      .then((data) => { if (!ignore) setFacilityCounts(data); })
-      .catch(() => { if (!ignore) setFacilityCounts([]); });
-
-    fetchCompletionRate(sessionId)
-      .then((data) => { if (!ignore) setCompletionRate(data); })
-      .catch(() => { if (!ignore) setCompletionRate([]); });
-
-    fetchFunderTypes(sessionId)
-      .then((data) => { if (!ignore) setFunderTypes(data); })
-      .catch(() => { if (!ignore) setFunderTypes([]); });
+    const setters: Record<string, (data: NameValue[]) => void> = {
+      "study-types": setStudyTypes,
+      "gender": setGender,
+      "age-groups": setAgeGroups,
+      "intervention-types": setInterventionTypes,
+      "duration": setDuration,
+      "start-years": setStartYears,
+      "facility-counts": setFacilityCounts,
+      "completion-rate": setCompletionRate,
+      "funder-types": setFunderTypes,
+    };
+
+    fetchSessionStats(sessionId, Object.keys(setters))
+      .then((bundle) => {
+        if (ignore) return;
+        for (const [name, set] of Object.entries(setters)) set(bundle[name] ?? []);
+      })
+      .catch(() => {
+        if (ignore) return;
+        for (const set of Object.values(setters)) set([]);
+      });
 
     return () => { ignore = true; };
   }, [sessionId, stats?.matched]);
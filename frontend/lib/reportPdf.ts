@@ -0,0 +1,55 @@
+const POLL_INTERVAL_MS = 500;
+// Give up on the job after this long and let the synchronous endpoint take over
+const POLL_TIMEOUT_MS = 60_000;
+// Some browsers read the blob after click() returns; revoke its URL a little later
+const OBJECT_URL_TTL_MS = 10_000;
+const DEFAULT_FILENAME = "trial-report.pdf";
+
+/** The filename from a `Content-Disposition` header, if it names one. */
+function dispositionFilename(header: string | null): string | null {
+  const match = header?.match(/filename\*?=(?:UTF-8'')?"?([^";]+)"?/i);
+  return match ? decodeURIComponent(match[1]) : null;
+}
+
+/**
+ * Render a report PDF as a background job and poll until it is ready.
+ *
+ * `pdfUrl` is the absolute `/report.pdf` URL; resolves to the PDF blob and the
+ * server's download filename, or throws if the job fails or times out so
+ * callers can fall back to the synchronous link.
+ */
+export async function fetchReportPdf(pdfUrl: string): Promise<{ blob: Blob; filename: string }> {
+  const start = await fetch(`${pdfUrl}/jobs`, { method: "POST" });
+  if (!start.ok) throw new Error(`PDF job failed to start: ${start.status}`);
+  const { job_id } = await start.json();
+
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const res = await fetch(`${pdfUrl}/jobs/${job_id}`);
+    if (res.status === 202) continue;
+    if (!res.ok) throw new Error(`PDF job failed: ${res.status}`);
+    const filename = dispositionFilename(res.headers.get("Content-Disposition"));
+    return { blob: await res.blob(), filename: filename ?? DEFAULT_FILENAME };
+  }
+  throw new Error("PDF job timed out");
+}
+
+/** Click handler for "Download PDF" links: poll the job, then save the PDF. */
+export async function downloadReportPdf(event: { preventDefault(): void }, pdfUrl: string) {
+  event.preventDefault();
+  try {
+    const { blob, filename } = await fetchReportPdf(pdfUrl);
+    const objectUrl = URL.createObjectURL(blob);
+    const link = document.createElement("a");
+    link.href = objectUrl;
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    setTimeout(() => URL.revokeObjectURL(objectUrl), OBJECT_URL_TTL_MS);
+  } catch {
+    // The synchronous endpoint serves an HTML fallback when rendering is unavailable
+    if (!window.open(pdfUrl, "_blank")) window.location.href = pdfUrl;
+  }
+}
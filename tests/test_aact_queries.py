@@ -0,0 +1,288 @@
+"""Tests for AACT query assembly that don't need a database.
+
+The asyncpg pool is replaced with a fake that records SQL and returns canned rows.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from backend.mcp_servers import aact_queries
+
+
+class _FakePool:
+    """Answers fetch/fetchrow/fetchval from (sql substring, result) rules, recording each call."""
+
+    def __init__(self, fetch_rules, fetchval=0):
+        self.fetch_rules = fetch_rules
+        self.fetchval_result = fetchval
+        self.calls: list[tuple[str, tuple]] = []
+
+    async def fetch(self, sql, *params):
+        self.calls.append((sql, params))
+        for needle, rows in self.fetch_rules:
+            if needle in sql:
+                return rows
+        return []
+
+    async def fetchrow(self, sql, *params):
+        rows = await self.fetch(sql, *params)
+        return rows[0] if rows else None
+
+    async def fetchval(self, sql, *params):
+        self.calls.append((sql, params))
+        return self.fetchval_result
+
+
+@pytest.fixture(autouse=True)
+def _clear_aggregates():
+    aact_queries._AGGREGATES.clear()
+    yield
+    aact_queries._AGGREGATES.clear()
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    def install(fetch_rules, fetchval=0):
+        pool = _FakePool(fetch_rules, fetchval)
+
+        async def get_pool():
+            return pool
+
+        monkeypatch.setattr(aact_queries, "get_pool", get_pool)
+        return pool
+
+    return install
+
+
+# ---------------------------------------------------------------------------
+# TestFacetedStats
+# ---------------------------------------------------------------------------
+
+
+class TestFacetedStats:
+    """Verify the fused facet query is dispatched into the response dicts."""
+
+    async def test_facets_from_one_query(self, fake_pool):
+        facet_rows = [
+            {"kind": "matched", "key": None, "cnt": 12},
+            {"kind": "phase", "key": "PHASE2", "cnt": 7},
+            {"kind": "phase", "key": None, "cnt": 5},
+            {"kind": "status", "key": "RECRUITING", "cnt": 12},
+            {"kind": "country", "key": "United States", "cnt": 9},
+            {"kind": "state", "key": "California", "cnt": 4},
+        ]
+        pool = fake_pool([("WITH matched", facet_rows)], fetchval=500)
+        result = await aact_queries.query_faceted_stats({"statuses": ["RECRUITING"]})
+        assert result["matched"] == 12
+        assert result["phase_distribution"] == {"PHASE2": 7, "N/A": 5}
+        assert result["status_distribution"] == {"RECRUITING": 12}
+        assert result["geo_distribution"] == {"United States": 9}
+        assert result["geo_distribution_states"] == {"California": 4}
+        assert sum("WITH matched" in sql for sql, _ in pool.calls) == 1
+
+    async def test_age_bound_passed_once(self, fake_pool):
+        pool = fake_pool([])
+        await aact_queries.query_faceted_stats({"age": 40})
+        sql, params = next(call for call in pool.calls if "WITH matched" in call[0])
+        assert params.count(40) == 1
+        assert sql.count("REGEXP_REPLACE") == 2
+
+    async def test_list_filters_bound_as_arrays(self, fake_pool):
+        pool = fake_pool([])
+        filters = {"statuses": ["RECRUITING", "COMPLETED"], "states": ["Ohio"]}
+        await aact_queries.query_faceted_stats(filters)
+        sql, params = next(call for call in pool.calls if "WITH matched" in call[0])
+        assert "LOWER(s.overall_status) = ANY($1::text[])" in sql
+        assert "f.state = ANY($2::text[])" in sql
+        assert params == (["recruiting", "completed"], ["Ohio"])
+
+    async def test_all_status_rides_along_then_cached(self, fake_pool):
+        rows = [{"kind": "all_status", "key": "COMPLETED", "cnt": 30}]
+        funnel = [{"c_cond": 30, "c_status": 0, "c_age": 0}]
+        pool = fake_pool([("WITH matched", rows), ("WITH base", funnel)])
+        result = await aact_queries.query_faceted_stats({"condition": "asthma"})
+        assert result["all_status_distribution"] == {"COMPLETED": 30}
+        assert "'all_status'" in next(sql for sql, _ in pool.calls if "WITH matched" in sql)
+
+        pool.calls.clear()
+        again = await aact_queries.query_faceted_stats({"condition": "asthma"})
+        assert again["all_status_distribution"] == {"COMPLETED": 30}
+        assert not any("'all_status'" in sql for sql, _ in pool.calls)
+
+    async def test_empty_match(self, fake_pool):
+        fake_pool([("WITH matched", [{"kind": "matched", "key": None, "cnt": 0}])])
+        result = await aact_queries.query_faceted_stats({})
+        assert result["matched"] == 0
+        assert result["phase_distribution"] == {}
+        assert result["geo_distribution_states"] == {}
+
+
+# ---------------------------------------------------------------------------
+# TestFunnel
+# ---------------------------------------------------------------------------
+
+
+class TestFunnel:
+    """Verify the condition, status and age stages come from one query."""
+
+    async def test_stages_from_one_query(self, fake_pool):
+        pool = fake_pool([("WITH base", [{"c_cond": 90, "c_status": 30, "c_age": 20}])])
+        funnel = await aact_queries._build_funnel(
+            pool, {"condition": "asthma", "statuses": ["RECRUITING"], "age": 40, "sex": "female"}
+        )
+        assert funnel == [
+            {"stage": "Condition: asthma", "count": 90},
+            {"stage": "+ Recruiting", "count": 30},
+            {"stage": "+ Age: 40", "count": 20},
+            {"stage": "+ Sex: female", "count": -1},
+        ]
+        assert len(pool.calls) == 1
+        assert pool.calls[0][1][-2:] == (["recruiting"], 40)
+
+    async def test_no_condition_no_query(self, fake_pool):
+        pool = fake_pool([])
+        assert await aact_queries._build_funnel(pool, {"statuses": ["RECRUITING"]}) == []
+        assert pool.calls == []
+
+
+# ---------------------------------------------------------------------------
+# TestAggregateCache
+# ---------------------------------------------------------------------------
+
+
+class TestAggregateCache:
+    """Verify filter-independent aggregates are fetched once."""
+
+    async def test_total_count_cached(self, fake_pool):
+        pool = fake_pool([], fetchval=500_000)
+        assert await aact_queries.get_total_count() == 500_000
+        assert await aact_queries.get_total_count() == 500_000
+        assert len(pool.calls) == 1
+
+    async def test_all_status_cached_per_condition(self, fake_pool):
+        rows = [{"overall_status": "COMPLETED", "cnt": 3}]
+        pool = fake_pool([("overall_status", rows)])
+        await aact_queries.get_all_status_distribution("")
+        await aact_queries.get_all_status_distribution("")
+        assert await aact_queries.get_all_status_distribution("asthma") == {"COMPLETED": 3}
+        assert len(pool.calls) == 2
+
+    async def test_top_conditions_cached_per_limit(self, fake_pool):
+        rows = [{"condition": "asthma", "cnt": 40}]
+        pool = fake_pool([("downcase_name", rows)])
+        assert await aact_queries.get_top_conditions(5) == [{"condition": "asthma", "count": 40}]
+        await aact_queries.get_top_conditions(5)
+        await aact_queries.get_top_conditions(10)
+        assert [params[-1] for _, params in pool.calls] == [5, 10]
+
+
+# ---------------------------------------------------------------------------
+# TestMatchedTrials
+# ---------------------------------------------------------------------------
+
+
+class TestMatchedTrials:
+    """Verify the trial list pages over deduplicated IDs."""
+
+    async def test_page_rows_and_params(self, fake_pool):
+        rows = [{"nct_id": "NCT001", "brief_title": "A", "condition_name": None}]
+        pool = fake_pool([("WITH page", rows)], fetchval=21)
+        filters = {"statuses": ["RECRUITING"]}
+        result = await aact_queries.query_matched_trials(filters, page=3, per_page=10)
+        assert result["total"] == 21
+        assert result["trials"] == [{"nct_id": "NCT001", "brief_title": "A", "condition": ""}]
+        count_sql, _ = pool.calls[0]
+        page_sql, page_params = pool.calls[1]
+        assert "COUNT(DISTINCT" not in count_sql
+        assert "WITH page" in page_sql
+        assert page_params[-2:] == (10, 20)
+
+
+# ---------------------------------------------------------------------------
+# TestBuckets
+# ---------------------------------------------------------------------------
+
+
+class TestBuckets:
+    """Verify chart rows come back labelled and shaped from the raw records."""
+
+    async def test_enrollment_labels(self, fake_pool):
+        fake_pool([("width_bucket", [{"b": 0, "cnt": 4}, {"b": 4, "cnt": 1}])])
+        assert await aact_queries.query_enrollment_distribution({}) == [
+            {"bucket": "<50", "count": 4},
+            {"bucket": "1K+", "count": 1},
+        ]
+
+    async def test_facility_count_labels(self, fake_pool):
+        fake_pool([("width_bucket", [{"b": 1, "value": 3}])])
+        assert await aact_queries.query_facility_count_distribution(["NCT001"]) == [
+            {"name": "2-5", "value": 3}
+        ]
+
+    async def test_name_value_rows_unpack_by_position(self, fake_pool):
+        fake_pool([("ctgov.conditions", [("Asthma", 3), ("COPD", 1)])])
+        assert await aact_queries.query_related_conditions(["NCT001"]) == [
+            {"name": "Asthma", "value": 3},
+            {"name": "COPD", "value": 1},
+        ]
+
+
+# ---------------------------------------------------------------------------
+# TestFusedSessionFacets
+# ---------------------------------------------------------------------------
+
+
+class TestFusedSessionFacets:
+    """Verify grouping-set rows are split back into per-chart lists."""
+
+    @staticmethod
+    def _studies_row(facet, value, phase=None, enrollment=None, recruitment=None):
+        return {
+            "facet": facet,
+            "phase": phase,
+            "enrollment": enrollment,
+            "recruitment": recruitment,
+            "value": value,
+        }
+
+    async def test_studies_facets(self, fake_pool):
+        row = self._studies_row
+        rows = [
+            row("phase", 1, phase="Not Applicable"),
+            row("phase", 2, phase="Phase 3"),
+            row("phase", 4, phase="Phase 1"),
+            row("enrollment", 1, enrollment=5),
+            row("enrollment", 3),
+            row("enrollment", 2, enrollment=0),
+            row("recruitment", 2, recruitment="Completed"),
+            row("recruitment", 5, recruitment="Other"),
+        ]
+        pool = fake_pool([("GROUPING SETS", rows)])
+        facets = await aact_queries.query_studies_facets(["NCT001"])
+        assert len(pool.calls) == 1
+        phases = [r["name"] for r in facets["phase_pipeline"]]
+        assert phases == ["Phase 1", "Phase 3", "Not Applicable"]
+        targets = facets["enrollment_targets"]
+        assert targets == [{"name": "<20", "value": 2}, {"name": "1K+", "value": 1}]
+        assert [r["name"] for r in facets["recruitment_summary"]] == ["Other", "Completed"]
+
+    async def test_sponsor_facets(self, fake_pool):
+        rows = [
+            {"facet": "lead", "name": "NCI", "bucket": None, "value": 3},
+            {"facet": "collaboration", "name": None, "bucket": 2, "value": 1},
+            {"facet": "collaboration", "name": None, "bucket": 0, "value": 2},
+        ]
+        fake_pool([("WITH sp AS", rows)])
+        facets = await aact_queries.query_sponsor_facets(["NCT001"])
+        assert facets["lead_sponsors"] == [{"name": "NCI", "value": 3}]
+        assert facets["sponsor_collaboration"] == [
+            {"name": "Solo", "value": 2},
+            {"name": "3-5 sponsors", "value": 1},
+        ]
+
+    async def test_no_ids_no_query(self, fake_pool):
+        pool = fake_pool([])
+        assert (await aact_queries.query_studies_facets([]))["phase_pipeline"] == []
+        assert (await aact_queries.query_sponsor_facets([]))["lead_sponsors"] == []
+        assert pool.calls == []
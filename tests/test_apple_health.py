@@ -0,0 +1,75 @@
+"""Tests for the Apple Health export parser.
+
+Exports are generated in memory with records dated relative to today.
+"""
+
+from __future__ import annotations
+
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.api.sessions import _DUMMY_EXPORT
+from backend.mcp_servers import apple_health
+
+
+def _export(records: list[str]) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        "<!DOCTYPE HealthData [\n<!ELEMENT HealthData (Record|Workout|Correlation)*>\n]>\n"
+        '<HealthData locale="en_US">\n' + "\n".join(records) + "\n</HealthData>\n"
+    ).encode()
+
+
+def _record(rec_type: str, value: float, days_ago: int, unit: str = "count") -> str:
+    when = datetime.now().astimezone() - timedelta(days=days_ago)
+    stamp = when.strftime(apple_health._HK_DATE_FMT)
+    return f'<Record type="{rec_type}" unit="{unit}" value="{value}" startDate="{stamp}"/>'
+
+
+EXPORT = _export(
+    [
+        _record(apple_health._STEP_COUNT, 4000, 1),
+        _record(apple_health._STEP_COUNT, 6000, 2),
+        '<Workout workoutActivityType="HKWorkoutActivityTypeWalking">'
+        '<WorkoutEvent type="HKWorkoutEventTypePause"/></Workout>',
+        _record(apple_health._HEART_RATE, 70, 3, "count/min"),
+        _record(apple_health._HEART_RATE, 64, 1, "count/min"),
+        '<Correlation type="HKCorrelationTypeIdentifierBloodPressure">'
+        + _record(apple_health._BP_SYSTOLIC, 120, 1, "mmHg")
+        + "</Correlation>",
+        _record(apple_health._STEP_COUNT, 9000, 200),
+    ]
+)
+
+
+# ---------------------------------------------------------------------------
+# TestParseXml
+# ---------------------------------------------------------------------------
+
+
+class TestParseXml:
+    """Verify the lxml and stdlib backends extract the same data."""
+
+    @pytest.fixture(params=["lxml", "stdlib"])
+    def backend(self, request, monkeypatch):
+        if request.param == "stdlib":
+            monkeypatch.setattr(apple_health, "lxml_etree", None)
+        elif apple_health.lxml_etree is None:
+            pytest.skip("lxml not installed")
+        return request.param
+
+    def test_records_extracted(self, backend):
+        hk = apple_health.parse_apple_health_xml(io.BytesIO(EXPORT))
+        assert hk.activity_steps_per_day == 5000  # two days in range, 10000 steps
+        vitals = {v.type: v.value for v in hk.vitals}
+        assert vitals == {"Heart Rate": 64, "Blood Pressure Systolic": 120}
+
+    def test_dummy_export_matches_stdlib(self, monkeypatch):
+        with_lxml = apple_health.parse_apple_health_zip(_DUMMY_EXPORT)
+        monkeypatch.setattr(apple_health, "lxml_etree", None)
+        stdlib = apple_health.parse_apple_health_zip(_DUMMY_EXPORT)
+        assert with_lxml.lab_results and with_lxml.medications
+        exclude = {"import_date"}
+        assert with_lxml.model_dump(exclude=exclude) == stdlib.model_dump(exclude=exclude)
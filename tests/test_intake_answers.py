@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from unittest.mock import MagicMock
 
-from backend.agents.orchestrator import AgentOrchestrator
+from backend.agents.orchestrator import _TRIM_MARKER, AgentOrchestrator
 from backend.models.session import SessionPhase, SessionState
 
 
@@ -119,6 +119,32 @@ class TestBuildSessionContextWithAnswers:
         context = orch._build_session_context(state)
         assert "Patient description: Stage 3 NSCLC" in context
 
+    def test_revised_answer_refreshes_context(self):
+        orch = _make_orchestrator()
+        orch._extract_intake_answer('Question: "Age?" — My answer: 45')
+        state = SessionState(
+            session_id="test-session",
+            phase=SessionPhase.INTAKE,
+            profile_complete=False,
+        )
+        assert "Age?: 45" in orch._build_session_context(state)
+        orch._extract_intake_answer('Question: "Age?" — My answer: 46')
+        context = orch._build_session_context(state)
+        assert "Age?: 46" in context
+        assert "Age?: 45" not in context
+
+    def test_replaced_answers_refresh_context(self):
+        orch = _make_orchestrator()
+        state = SessionState(
+            session_id="test-session",
+            phase=SessionPhase.INTAKE,
+            profile_complete=False,
+        )
+        orch._intake_answers = {"Age?": "45"}
+        assert "Age?: 45" in orch._build_session_context(state)
+        orch._intake_answers = {"Age?": "46"}
+        assert "Age?: 46" in orch._build_session_context(state)
+
     def test_answers_omitted_after_profile_complete(self):
         orch = _make_orchestrator()
         orch._intake_answers = {"What is your sex?": "Male"}
@@ -209,6 +235,21 @@ class TestTrimHistoryIntake:
         orch._trim_history(state)
         assert len(orch.conversation_history) == 20
 
+    def test_repeat_trims_keep_one_marker(self):
+        """A marker left right after the first message isn't pinned under a second one."""
+        orch = _make_orchestrator()
+        self._fill_history(orch, 30)
+        orch.conversation_history[1]["content"] = [
+            {"type": "tool_use", "id": "t1", "name": "search", "input": {}}
+        ]
+        orch._trim_history(None)
+        self._fill_history(orch, 10)
+        orch._trim_history(None)
+        history = orch.conversation_history
+        assert sum(msg is _TRIM_MARKER for msg in history) == 1
+        assert history[1] is _TRIM_MARKER
+        assert len(history) == 22
+
     def test_no_state_uses_default_threshold(self):
         """When state is None, uses default threshold of 24."""
         orch = _make_orchestrator()
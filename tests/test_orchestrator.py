@@ -0,0 +1,221 @@
+"""Tests for AgentOrchestrator internals that don't need the Claude API.
+
+Covers instance layout and tool dispatch. The session manager is mocked.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.agents import orchestrator
+from backend.agents.orchestrator import _PRE_EXECUTION_STATUS, _TOOL_HANDLERS, AgentOrchestrator
+from backend.models.patient import PatientProfile
+from backend.models.session import SessionPhase, SessionState
+from backend.session import SessionManager
+
+
+def _make_orchestrator() -> AgentOrchestrator:
+    """Create an orchestrator with a mocked session manager."""
+    return AgentOrchestrator("test-session", MagicMock())
+
+
+async def _run_batch(orch: AgentOrchestrator, tool_uses: list[dict], state) -> list[str]:
+    """Execute a turn's tool calls run by run, as process_message does."""
+    results: list[str] = []
+    for run in orchestrator._tool_runs(tool_uses):
+        results += await orch._run_tool_run(run, state)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# TestSlots
+# ---------------------------------------------------------------------------
+
+
+class TestSlots:
+    """Verify the orchestrator keeps a slotted layout."""
+
+    def test_no_instance_dict(self):
+        orch = _make_orchestrator()
+        assert not hasattr(orch, "__dict__")
+
+    def test_undeclared_attribute_rejected(self):
+        orch = _make_orchestrator()
+        with pytest.raises(AttributeError):
+            orch._detected_locaton = {}  # typo of _detected_location
+
+
+# ---------------------------------------------------------------------------
+# TestToolDispatch
+# ---------------------------------------------------------------------------
+
+
+class TestToolDispatch:
+    """Verify tool results returned by the handler table."""
+
+    async def test_acknowledgements_are_valid_json(self):
+        orch = _make_orchestrator()
+        calls = [
+            ("emit_widget", {"widget_type": "single_select", "question": "Q?", "options": []}),
+            ("emit_status", {"phase": "search", "message": "Searching..."}),
+            ("emit_partial_filters", {"condition": "asthma"}),
+            ("emit_trial_cards", {"trials": [{}, {}]}),
+        ]
+        results = [json.loads(await orch._execute_tool(name, inp)) for name, inp in calls]
+        assert results == [
+            {"status": "widget_emitted"},
+            {"status": "status_emitted"},
+            {"status": "filters_emitted"},
+            {"status": "trial_cards_emitted", "count": 2},
+        ]
+        assert len(orch._pending_emissions) == 4
+
+    async def test_unknown_tool_returns_error(self):
+        orch = _make_orchestrator()
+        result = json.loads(await orch._execute_tool("no_such_tool", {}))
+        assert result == {"error": "Unknown tool: no_such_tool"}
+
+    async def test_handler_exception_returns_error(self):
+        orch = _make_orchestrator()
+        result = json.loads(await orch._execute_tool("emit_status", {}))
+        assert "error" in result
+
+    async def test_batch_results_keep_tool_use_order(self, monkeypatch):
+        orch = _make_orchestrator()
+        started: list[str] = []
+
+        async def slow_label(self, tool_input):
+            started.append(tool_input["drug_name"])
+            await asyncio.sleep(0.01 if tool_input["drug_name"] == "a" else 0)
+            return json.dumps({"drug": tool_input["drug_name"]})
+
+        monkeypatch.setitem(_TOOL_HANDLERS, "get_drug_label", slow_label)
+        tool_uses = [
+            {"name": "get_drug_label", "input": {"drug_name": "a"}},
+            {"name": "emit_status", "input": {"phase": "matching", "message": "m"}},
+            {"name": "get_drug_label", "input": {"drug_name": "b"}},
+        ]
+        state = SessionState(session_id="test-session", phase=SessionPhase.MATCHING)
+        results = await _run_batch(orch, tool_uses, state)
+        assert [json.loads(r) for r in results] == [
+            {"drug": "a"},
+            {"status": "status_emitted"},
+            {"drug": "b"},
+        ]
+        assert started == ["a", "b"]
+        assert orch._tools_executed == 3
+
+
+    async def test_searches_save_in_tool_use_order(self, monkeypatch):
+        orch = _make_orchestrator()
+
+        async def search(condition, **kwargs):
+            # The first search finishes last
+            await asyncio.sleep(0.01 if condition == "first" else 0)
+            return [{"nct_id": f"NCT-{condition}", "brief_title": condition}]
+
+        monkeypatch.setattr(orchestrator, "search_trials", search)
+        tool_uses = [
+            {"name": "search_trials", "input": {"condition": "first"}},
+            {"name": "search_trials", "input": {"condition": "second"}},
+        ]
+        state = SessionState(session_id="test-session", phase=SessionPhase.SEARCH)
+        await _run_batch(orch, tool_uses, state)
+        saved = [c.args[1][0].nct_id for c in orch.session_mgr.save_search_results.call_args_list]
+        assert saved == ["NCT-first", "NCT-second"]
+
+
+# ---------------------------------------------------------------------------
+# TestProfileSection
+# ---------------------------------------------------------------------------
+
+
+class TestProfileSection:
+    """Verify the profile block of the session context is cached per profile version."""
+
+    def test_profile_rendered_until_saved_again(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        profile = PatientProfile()
+        profile.condition.primary_diagnosis = "asthma"
+        mgr.save_profile(sid, profile)
+        orch = AgentOrchestrator(sid, mgr)
+        state = SessionState(session_id=sid, profile_complete=True)
+        assert '"primary_diagnosis": "asthma"' in orch._build_session_context(state)
+
+        (tmp_path / sid / "patient_profile.json").unlink()
+        assert '"primary_diagnosis": "asthma"' in orch._build_session_context(state)
+
+        profile.condition.primary_diagnosis = "copd"
+        mgr.save_profile(sid, profile)
+        assert '"primary_diagnosis": "copd"' in orch._build_session_context(state)
+
+
+# ---------------------------------------------------------------------------
+# TestPreExecutionStatus
+# ---------------------------------------------------------------------------
+
+
+class TestPreExecutionStatus:
+    """Verify the status table consulted before tools run."""
+
+    def test_eligibility_titles_only_the_fetched_trial(self):
+        orch = _make_orchestrator()
+        orch._current_nct_id, orch._current_brief_title = "NCT001", "Old trial"
+        assert _PRE_EXECUTION_STATUS["get_trial_details"](orch, {"nct_id": "NCT002"}) == (
+            "matching",
+            "Analyzing NCT002: fetching study details...",
+        )
+        assert _PRE_EXECUTION_STATUS["get_eligibility_criteria"](orch, {"nct_id": "NCT002"}) == (
+            "matching",
+            "Analyzing NCT002: checking eligibility...",
+        )
+
+    def test_status_reader_waits_for_details(self):
+        tool_uses = [
+            {"name": "get_trial_details", "input": {"nct_id": "NCT002"}},
+            {"name": "get_drug_label", "input": {"drug_name": "a"}},
+            {"name": "get_eligibility_criteria", "input": {"nct_id": "NCT002"}},
+            {"name": "calculate_distance", "input": {}},
+        ]
+        runs = orchestrator._tool_runs(tool_uses)
+        assert [[tu["name"] for tu in run] for run in runs] == [
+            ["get_trial_details"],
+            ["get_drug_label", "get_eligibility_criteria"],
+            ["calculate_distance"],
+        ]
+
+    async def test_heartbeats_stream_while_run_executes(self):
+        orch = _make_orchestrator()
+        finish = asyncio.Event()
+
+        async def run():
+            orch._heartbeat_queue.put_nowait({"type": "status", "message": "still working"})
+            await finish.wait()
+
+        task = asyncio.ensure_future(run())
+        heartbeats = orch._heartbeats_until(task)
+        assert await anext(heartbeats) == {"type": "status", "message": "still working"}
+        assert not task.done()
+        finish.set()
+        assert [beat async for beat in heartbeats] == []
+        assert task.done()
+
+    def test_distance_names_known_site(self):
+        orch = _make_orchestrator()
+        orch._last_locations = [
+            {"latitude": 37.77, "longitude": -122.42, "city": "SF", "state": "CA"},
+        ]
+        describe = _PRE_EXECUTION_STATUS["calculate_distance"]
+        assert describe(orch, {"lat2": 37.771, "lon2": -122.421}) == (
+            "matching",
+            "Calculating distance to SF, CA...",
+        )
+
+    def test_silent_tools(self):
+        assert _PRE_EXECUTION_STATUS["emit_status"] is None
+        assert _PRE_EXECUTION_STATUS["emit_partial_filters"] is None
@@ -0,0 +1,69 @@
+"""Tests for SessionManager file storage and its in-memory caches."""
+
+from __future__ import annotations
+
+from backend.models.patient import PatientProfile
+from backend.models.trial import TrialSummary
+from backend.session import SessionManager
+
+
+def _trial(nct_id: str) -> TrialSummary:
+    return TrialSummary(nct_id=nct_id, brief_title=f"Trial {nct_id}")
+
+
+class TestNctIds:
+    """Verify get_nct_ids caching and invalidation."""
+
+    def test_empty_before_search(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        assert mgr.get_nct_ids(sid) == ()
+
+    def test_save_search_results_refreshes_ids(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        mgr.save_search_results(sid, [_trial("NCT001")])
+        assert mgr.get_nct_ids(sid) == ("NCT001",)
+        mgr.save_search_results(sid, [_trial("NCT002"), _trial("NCT003")])
+        assert mgr.get_nct_ids(sid) == ("NCT002", "NCT003")
+
+    def test_repeat_reads_skip_disk(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        mgr.save_search_results(sid, [_trial("NCT001")])
+        mgr.get_nct_ids(sid)
+        (tmp_path / sid / "search_results.json").unlink()
+        assert mgr.get_nct_ids(sid) == ("NCT001",)
+
+
+class TestProfileCache:
+    """Verify profiles are served from memory and isolated from callers."""
+
+    def test_saved_profile_read_without_disk(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        profile = PatientProfile()
+        profile.condition.primary_diagnosis = "asthma"
+        mgr.save_profile(sid, profile)
+        (tmp_path / sid / "patient_profile.json").unlink()
+        assert mgr.get_profile(sid).condition.primary_diagnosis == "asthma"
+
+    def test_unsaved_mutation_does_not_leak(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        mgr.get_profile(sid).condition.primary_diagnosis = "copd"
+        assert mgr.get_profile(sid).condition.primary_diagnosis != "copd"
+
+        profile = PatientProfile()
+        mgr.save_profile(sid, profile)
+        profile.condition.primary_diagnosis = "copd"
+        assert mgr.get_profile(sid).condition.primary_diagnosis != "copd"
+
+    def test_version_not_reused_after_eviction(self, tmp_path):
+        mgr = SessionManager(base_dir=tmp_path)
+        sid = mgr.create_session()
+        mgr.save_profile(sid, PatientProfile())
+        saved = mgr.profile_version(sid)
+        assert mgr.profile_version(sid) == saved
+        mgr._profiles.clear()
+        assert mgr.profile_version(sid) != saved
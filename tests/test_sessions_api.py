@@ -0,0 +1,287 @@
+"""Tests for the /api/sessions endpoints that don't need Claude, AACT or Chromium.
+
+Sessions are written to a temporary directory; PDF rendering is faked.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import time
+import zipfile
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.api import sessions
+from backend.models.trial import TrialSummary
+from backend.report import pdf_generator
+from backend.session import session_mgr
+
+client = TestClient(main.app)
+
+
+@pytest.fixture
+def session_id(tmp_path, monkeypatch):
+    """A fresh session with a saved report, stored under tmp_path."""
+    monkeypatch.setattr(session_mgr, "base_dir", tmp_path)
+    sessions._pdf_cache.clear()
+    sessions._pdf_jobs.clear()
+    sid = session_mgr.create_session()
+    session_mgr.save_report(sid, "<html><body>report</body></html>")
+    yield sid
+    sessions._pdf_cache.clear()
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    render = AsyncMock(return_value=b"%PDF-1.7 fake")
+    monkeypatch.setattr(pdf_generator, "generate_pdf", render)
+    return render
+
+
+# ---------------------------------------------------------------------------
+# TestSessionReads
+# ---------------------------------------------------------------------------
+
+
+class TestSessionReads:
+    """Verify session GETs serialize the same JSON as model_dump()."""
+
+    def test_trials_match_model_dump(self, session_id):
+        trials = [TrialSummary(nct_id="NCT001", brief_title="A", phase="PHASE2")]
+        session_mgr.save_search_results(session_id, trials)
+        resp = client.get(f"/api/sessions/{session_id}/trials")
+        assert resp.headers["content-type"] == "application/json"
+        assert resp.json() == [t.model_dump() for t in trials]
+
+    def test_profile_and_state(self, session_id):
+        profile = client.get(f"/api/sessions/{session_id}/profile").json()
+        state = client.get(f"/api/sessions/{session_id}/state").json()
+        assert profile == session_mgr.get_profile(session_id).model_dump()
+        assert state == session_mgr.get_state(session_id).model_dump()
+
+
+# ---------------------------------------------------------------------------
+# TestReportPdf
+# ---------------------------------------------------------------------------
+
+
+class TestReportPdf:
+    """Verify PDF downloads reuse renders of unchanged reports."""
+
+    def test_repeat_download_renders_once(self, session_id, fake_pdf):
+        first = client.get(f"/api/sessions/{session_id}/report.pdf")
+        second = client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/pdf"
+        assert first.content == second.content == b"%PDF-1.7 fake"
+        assert fake_pdf.await_count == 1
+
+    def test_unchanged_report_is_304(self, session_id, fake_pdf):
+        url = f"/api/sessions/{session_id}/report.pdf"
+        etag = client.get(url).headers["etag"]
+        resp = client.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert fake_pdf.await_count == 1
+
+        session_mgr.save_report(session_id, "<html><body>updated</body></html>")
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_rendered_file_reused_after_cache_clear(self, session_id, fake_pdf):
+        url = f"/api/sessions/{session_id}/report.pdf"
+        client.get(url)
+        sessions._pdf_cache.clear()
+        assert client.get(url).content == b"%PDF-1.7 fake"
+        assert fake_pdf.await_count == 1
+
+    def test_regenerated_report_renders_again(self, session_id, fake_pdf):
+        client.get(f"/api/sessions/{session_id}/report.pdf")
+        session_mgr.save_report(session_id, "<html><body>updated</body></html>")
+        client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert fake_pdf.await_count == 2
+        assert len(list((session_mgr.base_dir / session_id).glob("report-*.pdf"))) == 1
+
+    def test_newer_render_is_kept(self, session_id, fake_pdf):
+        older = session_mgr.base_dir / session_id / "report-older.pdf"
+        newer = session_mgr.base_dir / session_id / "report-newer.pdf"
+        older.write_bytes(b"%PDF-1.7 older")
+        newer.write_bytes(b"%PDF-1.7 newer")
+        os.utime(newer, (time.time() + 60, time.time() + 60))  # finished after ours
+        client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert not older.exists()
+        assert newer.exists()
+
+    def test_deleted_file_renders_again(self, session_id, fake_pdf):
+        url = f"/api/sessions/{session_id}/report.pdf"
+        client.get(url)
+        for pdf in (session_mgr.base_dir / session_id).glob("report-*.pdf"):
+            pdf.unlink()
+        assert client.get(url).content == b"%PDF-1.7 fake"
+        assert fake_pdf.await_count == 2
+
+    def test_render_failure_falls_back_to_html(self, session_id, fake_pdf):
+        fake_pdf.side_effect = pdf_generator.PDFGenerationError("no chromium")
+        resp = client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/html")
+        assert resp.text.startswith("<html><body><div ")
+        assert "PDF generation unavailable" in resp.text
+        assert resp.text.endswith("</div>report</body></html>")
+
+    def test_renders_with_shared_browser(self, session_id, fake_pdf, monkeypatch):
+        browser = object()
+        monkeypatch.setattr(main.app.state, "pdf_browser", browser, raising=False)
+        client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert fake_pdf.await_args.kwargs["browser"] is browser
+
+    def test_download_registers_no_job(self, session_id, fake_pdf):
+        client.get(f"/api/sessions/{session_id}/report.pdf")
+        assert len(sessions._pdf_jobs) == 0
+
+    def test_missing_report_is_404(self, session_id, fake_pdf):
+        (session_mgr.base_dir / session_id / "report.html").unlink()
+        assert client.get(f"/api/sessions/{session_id}/report.pdf").status_code == 404
+        fake_pdf.assert_not_awaited()
+
+    async def test_concurrent_downloads_share_one_render(self, session_id, monkeypatch):
+        release = asyncio.Event()
+        renders = 0
+
+        async def slow_render(html, browser=None):
+            nonlocal renders
+            renders += 1
+            await release.wait()
+            return b"%PDF-1.7 slow"
+
+        monkeypatch.setattr(pdf_generator, "generate_pdf", slow_render)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            url = f"/api/sessions/{session_id}/report.pdf"
+            first = asyncio.create_task(ac.get(url))
+            second = asyncio.create_task(ac.get(url))
+            await asyncio.sleep(0.05)
+            release.set()
+            responses = await asyncio.gather(first, second)
+        assert [r.content for r in responses] == [b"%PDF-1.7 slow"] * 2
+        assert renders == 1
+
+
+# ---------------------------------------------------------------------------
+# TestReportPdfJobs
+# ---------------------------------------------------------------------------
+
+
+class TestReportPdfJobs:
+    """Verify background render jobs and their polling endpoint."""
+
+    async def test_poll_until_done(self, session_id, monkeypatch):
+        release = asyncio.Event()
+
+        async def slow_render(html, browser=None):
+            await release.wait()
+            return b"%PDF-1.7 job"
+
+        monkeypatch.setattr(pdf_generator, "generate_pdf", slow_render)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            base = f"/api/sessions/{session_id}/report.pdf/jobs"
+            started = await ac.post(base)
+            assert started.status_code == 202
+            job_id = started.json()["job_id"]
+
+            pending = await ac.get(f"{base}/{job_id}")
+            assert pending.status_code == 202
+            assert pending.json() == {"job_id": job_id, "status": "pending"}
+
+            release.set()
+            await sessions._pdf_jobs[job_id]["task"]
+            done = await ac.get(f"{base}/{job_id}")
+        assert done.status_code == 200
+        assert done.headers["content-type"] == "application/pdf"
+        assert done.content == b"%PDF-1.7 job"
+
+    async def test_failed_render_reports_error(self, session_id, monkeypatch):
+        monkeypatch.setattr(
+            pdf_generator,
+            "generate_pdf",
+            AsyncMock(side_effect=pdf_generator.PDFGenerationError("no chromium")),
+        )
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            base = f"/api/sessions/{session_id}/report.pdf/jobs"
+            job_id = (await ac.post(base)).json()["job_id"]
+            await asyncio.wait([sessions._pdf_jobs[job_id]["task"]])
+            resp = await ac.get(f"{base}/{job_id}")
+        assert resp.status_code == 500
+        assert resp.json() == {"job_id": job_id, "status": "error", "error": "no chromium"}
+
+    async def test_superseded_job_is_404(self, session_id, fake_pdf):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            base = f"/api/sessions/{session_id}/report.pdf/jobs"
+            job_id = (await ac.post(base)).json()["job_id"]
+            await sessions._pdf_jobs[job_id]["task"]
+            session_mgr.save_report(session_id, "<html><body>updated</body></html>")
+            assert (await ac.get(f"/api/sessions/{session_id}/report.pdf")).status_code == 200
+            resp = await ac.get(f"{base}/{job_id}")
+        assert resp.status_code == 404
+
+    def test_unknown_job_is_404(self, session_id):
+        resp = client.get(f"/api/sessions/{session_id}/report.pdf/jobs/nope")
+        assert resp.status_code == 404
+
+    def test_job_for_missing_report_is_404(self, session_id):
+        (session_mgr.base_dir / session_id / "report.html").unlink()
+        assert client.post(f"/api/sessions/{session_id}/report.pdf/jobs").status_code == 404
+
+
+# ---------------------------------------------------------------------------
+# TestHealthImport
+# ---------------------------------------------------------------------------
+
+
+class TestHealthImport:
+    """Verify the ZIP upload path matches the bundled dummy import."""
+
+    def test_upload_matches_dummy(self, session_id):
+        url = f"/api/sessions/{session_id}/health-import"
+        dummy = client.post(url, params={"use_dummy": "true"}).json()
+        zip_path = sessions._DUMMY_EXPORT
+        with open(zip_path, "rb") as fh:
+            resp = client.post(url, files={"file": ("export.zip", fh, "application/zip")})
+        assert resp.status_code == 200
+        uploaded = resp.json()
+        assert uploaded["source_file"] == "export.zip"
+        assert uploaded["lab_count"] == dummy["lab_count"] > 0
+        assert uploaded["labs"] == dummy["labs"]
+
+    def test_zip_without_xml_is_400(self, session_id):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("readme.txt", "no export here")
+        resp = client.post(
+            f"/api/sessions/{session_id}/health-import",
+            files={"file": ("export.zip", buf.getvalue(), "application/zip")},
+        )
+        assert resp.status_code == 400
+
+    def test_json_import(self, session_id):
+        payload = {"lab_results": [{"test_name": "HbA1c", "value": 6.1, "unit": "%"}]}
+        resp = client.post(f"/api/sessions/{session_id}/health-import-json", json=payload)
+        assert resp.status_code == 200
+        assert resp.json()["labs"] == [{"test_name": "HbA1c", "value": 6.1, "unit": "%"}]
+        assert session_mgr.get_profile(session_id).health_kit.lab_results[0].test_name == "HbA1c"
+
+    def test_json_import_validation_error_is_422(self, session_id):
+        resp = client.post(
+            f"/api/sessions/{session_id}/health-import-json",
+            json={"lab_results": "not a list"},
+        )
+        assert resp.status_code == 422
+        assert resp.json()["detail"][0]["loc"][:2] == ["body", "lab_results"]
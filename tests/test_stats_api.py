@@ -0,0 +1,344 @@
+"""Tests for the /api/stats router that don't need an AACT connection.
+
+Query functions are replaced with in-memory fakes; the session lookup is patched.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import stats
+from backend.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _isolate(monkeypatch):
+    """Clear the response cache and pin a session's nct_ids."""
+    stats._STATS_CACHE.clear()
+    monkeypatch.setattr(stats, "_get_nct_ids", lambda session_id: ("NCT001", "NCT002"))
+    yield
+    stats._STATS_CACHE.clear()
+
+
+def _counting(result):
+    """Fake query function that records each call."""
+    calls: list[tuple] = []
+
+    async def fn(*args):
+        calls.append(args)
+        return result
+
+    return fn, calls
+
+
+# ---------------------------------------------------------------------------
+# TestStatsQuery
+# ---------------------------------------------------------------------------
+
+
+class TestStatsQuery:
+    """Verify filter lists are normalized at validation time."""
+
+    def test_statuses_sorted_and_deduplicated(self):
+        q = stats.StatsQuery(statuses=["RECRUITING", "COMPLETED", "RECRUITING"])
+        assert q.statuses == ("COMPLETED", "RECRUITING")
+
+    def test_empty_list_means_no_filter(self):
+        assert stats.StatsQuery(states=[]).states is None
+
+
+# ---------------------------------------------------------------------------
+# TestDispatch
+# ---------------------------------------------------------------------------
+
+
+class TestDispatch:
+    """Verify the table-driven stats routes."""
+
+    def test_session_stat_passes_nct_ids(self, monkeypatch):
+        fn, calls = _counting([{"gender": "ALL", "count": 2}])
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", fn)
+        resp = client.get("/api/stats/gender", params={"session_id": "s"})
+        assert resp.status_code == 200
+        assert resp.json() == [{"gender": "ALL", "count": 2}]
+        assert calls == [(("NCT001", "NCT002"),)]
+
+    def test_unknown_stat_is_404(self):
+        assert client.get("/api/stats/nope", params={"session_id": "s"}).status_code == 404
+        assert client.post("/api/stats/nope", json={}).status_code == 404
+
+    def test_filter_stat_passes_filters(self, monkeypatch):
+        fn, calls = _counting([])
+        monkeypatch.setitem(stats.FILTER_STATS, "sponsors", fn)
+        resp = client.post("/api/stats/sponsors", json={"condition": "asthma"})
+        assert resp.status_code == 200
+        assert calls == [({"condition": "asthma", "sex": ""},)]
+
+    def test_unconfigured_database_is_503(self, monkeypatch):
+        async def fn(nct_ids):
+            raise RuntimeError("AACT_DATABASE_URL not configured")
+
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", fn)
+        resp = client.get("/api/stats/gender", params={"session_id": "s"})
+        assert resp.status_code == 503
+        assert resp.json()["detail"] == "AACT database not configured"
+
+
+# ---------------------------------------------------------------------------
+# TestResponseCache
+# ---------------------------------------------------------------------------
+
+
+class TestResponseCache:
+    """Verify repeated identical requests are served from the TTL cache."""
+
+    def test_repeat_filter_query_hits_cache(self, monkeypatch):
+        fn, calls = _counting([{"sponsor": "NCI", "count": 3}])
+        monkeypatch.setitem(stats.FILTER_STATS, "sponsors", fn)
+        body = {"condition": "asthma", "statuses": ["RECRUITING", "COMPLETED"]}
+        reordered = {"condition": "asthma", "statuses": ["COMPLETED", "RECRUITING"]}
+        first = client.post("/api/stats/sponsors", json=body).json()
+        second = client.post("/api/stats/sponsors", json=reordered).json()
+        assert first == second
+        assert len(calls) == 1
+
+    def test_different_filters_miss_cache(self, monkeypatch):
+        fn, calls = _counting([])
+        monkeypatch.setitem(stats.FILTER_STATS, "sponsors", fn)
+        client.post("/api/stats/sponsors", json={"condition": "asthma"})
+        client.post("/api/stats/sponsors", json={"condition": "asthma", "age": 40})
+        assert len(calls) == 2
+
+    def test_failures_are_not_cached(self, monkeypatch):
+        attempts = 0
+
+        async def flaky(nct_ids):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise ConnectionError("pool exhausted")
+            return []
+
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", flaky)
+        assert client.get("/api/stats/gender", params={"session_id": "s"}).status_code == 503
+        assert client.get("/api/stats/gender", params={"session_id": "s"}).status_code == 200
+        assert attempts == 2
+
+    async def test_concurrent_misses_share_one_query(self):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow(nct_ids):
+            nonlocal calls
+            calls += 1
+            started.set()
+            await release.wait()
+            return [{"count": len(nct_ids)}]
+
+        key = ("gender", ("NCT001",))
+        first = asyncio.create_task(stats._cached(key, slow, ["NCT001"]))
+        await started.wait()
+        second = asyncio.create_task(stats._cached(key, slow, ["NCT001"]))
+        await asyncio.sleep(0)
+        release.set()
+        assert await first == await second == [{"count": 1}]
+        assert calls == 1
+        assert key not in stats._INFLIGHT
+        assert stats._STATS_CACHE[key] == [{"count": 1}]
+
+    async def test_cancelled_waiter_does_not_abort_shared_query(self):
+        release = asyncio.Event()
+
+        async def slow(nct_ids):
+            await release.wait()
+            return []
+
+        key = ("gender", ("NCT001",))
+        first = asyncio.create_task(stats._cached(key, slow, ["NCT001"]))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(stats._cached(key, slow, ["NCT001"]))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == []
+
+
+# ---------------------------------------------------------------------------
+# TestSessionBundle
+# ---------------------------------------------------------------------------
+
+
+class TestSessionBundle:
+    """Verify /session-bundle runs several session stats in one request."""
+
+    def test_include_selects_subset(self, monkeypatch):
+        gender, gender_calls = _counting([{"name": "ALL", "value": 2}])
+        ages, _ = _counting([{"name": "Adult", "value": 2}])
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", gender)
+        monkeypatch.setitem(stats.SESSION_STATS, "age-groups", ages)
+        resp = client.get(
+            "/api/stats/session-bundle",
+            params={"session_id": "s", "include": "gender,age-groups"},
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "gender": [{"name": "ALL", "value": 2}],
+            "age-groups": [{"name": "Adult", "value": 2}],
+        }
+        assert gender_calls == [(("NCT001", "NCT002"),)]
+
+    def test_failed_stat_is_omitted(self, monkeypatch):
+        gender, _ = _counting([])
+
+        async def broken(nct_ids):
+            raise ConnectionError("timeout")
+
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", gender)
+        monkeypatch.setitem(stats.SESSION_STATS, "age-groups", broken)
+        resp = client.get(
+            "/api/stats/session-bundle",
+            params={"session_id": "s", "include": "gender,age-groups"},
+        )
+        assert resp.json() == {"gender": []}
+
+    def test_shares_cache_with_single_stat_route(self, monkeypatch):
+        gender, calls = _counting([])
+        monkeypatch.setitem(stats.SESSION_STATS, "gender", gender)
+        client.get("/api/stats/session-bundle", params={"session_id": "s", "include": "gender"})
+        client.get("/api/stats/gender", params={"session_id": "s"})
+        assert len(calls) == 1
+
+    def test_fused_facets_query_once(self, monkeypatch):
+        phases = [{"name": "Phase 2", "value": 2}]
+        fused, calls = _counting({"phase_pipeline": phases, "recruitment_summary": []})
+        for name, facet in (
+            ("phase-pipeline", "phase_pipeline"),
+            ("recruitment-summary", "recruitment_summary"),
+        ):
+            monkeypatch.setitem(stats.SESSION_STATS, name, stats._fused_stat(fused, facet))
+        resp = client.get(
+            "/api/stats/session-bundle",
+            params={"session_id": "s", "include": "phase-pipeline,recruitment-summary"},
+        )
+        assert resp.json() == {"phase-pipeline": phases, "recruitment-summary": []}
+        assert len(calls) == 1
+
+
+# ---------------------------------------------------------------------------
+# TestRawQueryGuard
+# ---------------------------------------------------------------------------
+
+
+class TestRawQueryGuard:
+    """Verify raw-query rejects statements before touching the database."""
+
+    def test_non_select_rejected(self):
+        resp = client.post("/api/stats/raw-query", json={"sql": "DELETE FROM studies"})
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Only SELECT queries are allowed"
+
+    def test_forbidden_keyword_rejected(self):
+        resp = client.post("/api/stats/raw-query", json={"sql": "select 1; drop table studies"})
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Forbidden keyword: DROP"
+
+    def test_keyword_inside_identifier_allowed(self):
+        assert stats._FORBIDDEN_KW.search("SELECT updated_at, created_by FROM studies") is None
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.readonly = None
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, readonly=False):
+        self.readonly = readonly
+        yield
+
+    async def fetch(self, sql):
+        return self.rows
+
+
+class _FakePool:
+    def __init__(self, rows):
+        self.conn = _FakeConn(rows)
+        self.released = 0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        try:
+            yield self.conn
+        finally:
+            self.released += 1
+
+
+class TestRawQuery:
+    """Verify raw-query returns the rows as one JSON document."""
+
+    def _patch_pool(self, monkeypatch, rows):
+        pool = _FakePool(rows)
+
+        async def get_pool():
+            return pool
+
+        monkeypatch.setattr(stats, "get_pool", get_pool)
+        return pool
+
+    def test_rows_encoded(self, monkeypatch):
+        rows = [{"nct_id": f"NCT{i:03d}", "enrollment": Decimal(i)} for i in range(250)]
+        pool = self._patch_pool(monkeypatch, rows)
+        resp = client.post("/api/stats/raw-query", json={"sql": "SELECT nct_id FROM studies"})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["columns"] == ["nct_id", "enrollment"]
+        assert len(data["rows"]) == 250
+        assert data["rows"][249] == {"nct_id": "NCT249", "enrollment": 249.0}
+        assert pool.conn.readonly is True
+        assert pool.released == 1
+
+    def test_empty_result(self, monkeypatch):
+        pool = self._patch_pool(monkeypatch, [])
+        resp = client.post("/api/stats/raw-query", json={"sql": "SELECT 1 WHERE false"})
+        assert resp.json() == {"columns": [], "rows": []}
+        assert pool.released == 1
+
+
+class TestQueryStats:
+    """Verify /query fills funnel placeholders and serves the cached body."""
+
+    def test_funnel_placeholder_filled(self, monkeypatch):
+        calls = 0
+
+        async def faceted(filters):
+            nonlocal calls
+            calls += 1
+            return {
+                "total": 100,
+                "matched": 7,
+                "phase_distribution": {"PHASE2": 7},
+                "status_distribution": {},
+                "geo_distribution": {},
+                "geo_distribution_states": {},
+                "funnel": [{"stage": "All", "count": 100}, {"stage": "Matched", "count": -1}],
+                "all_status_distribution": {},
+                "sql_query": "SELECT 1",
+                "sql_params": [],
+            }
+
+        monkeypatch.setattr(stats, "query_faceted_stats", faceted)
+        first = client.post("/api/stats/query", json={"condition": "asthma"})
+        second = client.post("/api/stats/query", json={"condition": "asthma"})
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/json"
+        assert first.json()["funnel"][1] == {"stage": "Matched", "count": 7}
+        assert second.content == first.content
+        assert calls == 1